@@ -0,0 +1,91 @@
+"""
+Benchmark for calculate_basic_analysis and calculate_xpts_table on a single tournament and on an
+entire league history.
+
+Run from the project root:
+    python -m benchmarks.benchmark_analytics
+"""
+import itertools
+import time
+import numpy as np
+import pandas as pd
+from utils import analytics_utils
+from utils.analytics_utils import calculate_basic_analysis, calculate_xpts_table
+
+
+def generate_tournament_results(num_players=12, seed=0, game_offset=0):
+    """
+    Generate a synthetic round-robin tournament in the saved "results" format.
+
+    Args:
+        num_players (int): Number of players in the tournament.
+        seed (int): Random seed for goals and xG.
+        game_offset (int): First game number, so several tournaments can share one frame.
+
+    Returns:
+        list: A list of result dictionaries.
+    """
+    rng = np.random.default_rng(seed)
+    players = [f"Player {i}" for i in range(1, num_players + 1)]
+    matchups = list(itertools.combinations(players, 2))
+    return [
+        {
+            "Game #": f"Game{game_offset + game_id:05}",
+            "Round": game_id // 2 + 1,
+            "Home": home,
+            "Away": away,
+            "Home Goals": int(rng.poisson(1.6)),
+            "Away Goals": int(rng.poisson(1.3)),
+            "Home xG": round(float(rng.gamma(2.0, 0.8)), 2),
+            "Away xG": round(float(rng.gamma(2.0, 0.7)), 2),
+        }
+        for game_id, (home, away) in enumerate(matchups, start=1)
+    ]
+
+
+def time_call(func, *args, repeat=7, cold=True):
+    """
+    Time a function call and return the median duration in milliseconds.
+
+    Args:
+        func (callable): The function to time.
+        repeat (int): Number of timed runs.
+        cold (bool): Clear the player-game memo before each run so the reshape is measured too.
+
+    Returns:
+        float: Median duration in milliseconds.
+    """
+    timings = []
+    for _ in range(repeat):
+        if cold:
+            analytics_utils._player_game_cache.clear()
+        start = time.perf_counter()
+        func(*args)
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings))
+
+
+def main(num_tournaments=250):
+    single = {"results": generate_tournament_results(seed=0)}
+
+    history_results = []
+    for t in range(num_tournaments):
+        history_results.extend(generate_tournament_results(seed=t, game_offset=len(history_results)))
+    history = {"results": history_results}
+
+    rows = [
+        ("Single tournament", len(single["results"]), time_call(calculate_basic_analysis, single),
+         time_call(calculate_basic_analysis, single, cold=False)),
+        (f"League history ({num_tournaments} tournaments)", len(history["results"]),
+         time_call(calculate_basic_analysis, history), time_call(calculate_basic_analysis, history, cold=False)),
+    ]
+    history_frame = pd.DataFrame(history_results)
+    rows.append(
+        (f"xPts, league history ({num_tournaments} tournaments)", len(history_frame),
+         time_call(calculate_xpts_table, history_frame), time_call(calculate_xpts_table, history_frame, cold=False))
+    )
+    print(pd.DataFrame(rows, columns=["Scenario", "Games", "Cold (ms)", "Warm (ms)"]).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -10,20 +10,27 @@ from utils.data_utils import (
     firestore_update_league_admins,
     firestore_add_players_to_league,
     firestore_remove_players_from_league,
-    firestore_batch_update_users,
-    filter_users_by_role
+    filter_users_by_role,
+    firestore_get_duration_profile,
+    rebuild_league_aggregates,
+    rebuild_league_ratings,
+    firestore_get_league,
+    firestore_find_leagues_by_name,
+    firestore_get_admin_leagues,
+    firestore_find_user_by_email
 )
 from utils.auth_utils import create_league_metadata
-import firebase_admin
-from firebase_admin import firestore
-import time
-
-# Initialize Firebase app if not already initialized
-if not firebase_admin._apps:
-    firebase_admin.initialize_app()
-
-# Initialize Firestore client
-db = firestore.client()
+from utils.tournament_utils import calibrate_league_duration_profile
+from utils.warehouse_utils import sync_league_warehouse
+from utils.offline_utils import (
+    prefetch_event_pack,
+    offline_pack_info,
+    offline_mode_active,
+    pending_offline_writes,
+    enter_offline_mode,
+    sync_offline_journal,
+    exit_offline_mode
+)
 
 # Helper Functions
 def to_snake_case(name):
@@ -59,14 +66,10 @@ if "expander_open" not in st.session_state:
 col1, col2, col3 = st.columns(3)
 user_role = st.session_state.get("role", "user")
 
-# Fetch all users once and cache them in session state
-if "all_users" not in st.session_state:
-    st.session_state["all_users"] = firestore_get_all_users()
-
-
-# Initialize 'all_leagues' in session_state if not already present
-if 'all_leagues' not in st.session_state:
-    st.session_state['all_leagues'] = firestore_get_all_leagues()
+# Users and leagues come from the process-wide directories (in-memory mirrors kept current by change listeners);
+# sessions only hold references to the shared read-only snapshots, so refreshing them on every rerun is free
+st.session_state["all_users"] = firestore_get_all_users()
+st.session_state["all_leagues"] = firestore_get_all_leagues()
 
 # Helper function to fetch user ID
 def fetch_user_id():
@@ -77,9 +80,9 @@ def fetch_user_id():
             st.error("Email not found in session state. Please log in again.", icon="❌")
             st.stop()
         try:
-            user_doc = db.collection("users").where("email", "==", user_email).get()
-            if user_doc:
-                st.session_state["user_id"] = user_doc[0].id
+            user_id, _ = firestore_find_user_by_email(user_email)
+            if user_id:
+                st.session_state["user_id"] = user_id
             else:
                 st.error("Failed to retrieve user ID. Please reauthenticate.", icon="❌")
                 st.stop()
@@ -181,7 +184,7 @@ if selected_tab == "Create League" and user_role == "super_admin":
                 else:
                     # Check if a league with the same name already exists
                     try:
-                        existing_leagues = db.collection("leagues").where("league_name", "==", league_name).get()
+                        existing_leagues = firestore_find_leagues_by_name(league_name)
                         if existing_leagues:
                             st.error(f"A league with the name '{league_name}' already exists. Please choose a different name.", icon="❌")
                         else:
@@ -195,17 +198,8 @@ if selected_tab == "Create League" and user_role == "super_admin":
                                     super_admin=creator_id,
                                 )
                                 if created_league.get("success"):
-                                    # Update session state
-                                    new_league_id = created_league["league_id"]
-                                    st.session_state["all_leagues"][new_league_id] = {
-                                        "league_name": league_name,
-                                        "league_type": league_type,
-                                        "created_by": creator_id,
-                                        "admins": selected_admins,
-                                        "super_admin": creator_id,
-                                        "members": [],  # No members initially
-                                        "created_at": "Just now",  # Placeholder for Firestore's SERVER_TIMESTAMP
-                                    }
+                                    # The write invalidated the cached listing, so this re-reads it once
+                                    st.session_state["all_leagues"] = firestore_get_all_leagues()
                                     st.success(f"League '{league_name}' created successfully!", icon="✅")
                                 else:
                                     st.error(created_league.get("message", "Unexpected issue while creating the league."), icon="❌")
@@ -302,8 +296,7 @@ if selected_tab == "Create League" and user_role == "super_admin":
                             result = firestore_update_league_admins(selected_league_id, selected_new_admins)
                             if result["success"]:
                                 # Update local session state for immediate feedback
-                                selected_league["admins"] = selected_new_admins
-                                st.session_state["all_leagues"][selected_league_id] = selected_league
+                                st.session_state["all_leagues"] = firestore_get_all_leagues()
                                 st.success(result["message"], icon="✅")
                             else:
                                 st.error(result["message"], icon="❌")
@@ -330,20 +323,10 @@ elif selected_tab == "Manage Leagues" and user_role in ["super_admin", "admin"]:
     )
 
     # Fetch leagues and filter by current user
-    leagues_ref = db.collection("leagues").get()
-    leagues = {
-        league.id: league.to_dict() for league in leagues_ref
-        if st.session_state.user_id in league.to_dict().get("admins", [])
-        or league.to_dict().get("super_admin") == st.session_state.user_id
-    }
-
-    # Fetch all users from Firestore
-    try:
-        users_ref = db.collection("users").get()
-        users = {user.id: user.to_dict() for user in users_ref}
-    except Exception as e:
-        st.error(f"Error fetching users: {e}", icon="❌")
-        users = {}
+    leagues = firestore_get_admin_leagues(st.session_state.user_id)
+
+    # Fetch all users (membership writes invalidate the cache, so league lists are current)
+    users = firestore_get_all_users()
 
     if leagues and users:
         # Select a league to manage
@@ -413,9 +396,8 @@ elif selected_tab == "Manage Leagues" and user_role in ["super_admin", "admin"]:
                         st.warning("No players selected. Please select players to add.", icon="⚠️")
                     else:
                         try:
-                            # Cache current members for Firestore writes
-                            league_ref = db.collection("leagues").document(selected_league_id)
-                            league_data = league_ref.get().to_dict()
+                            # Current members (cached), to validate the selection
+                            league_data = firestore_get_league(selected_league_id)
                             current_members = league_data.get("members", {})
                             
                             # Ensure `current_members` is a dictionary
@@ -439,32 +421,18 @@ elif selected_tab == "Manage Leagues" and user_role in ["super_admin", "admin"]:
                             if not valid_new_players:
                                 st.warning("No new players to add. All selected players are already in the league.", icon="ℹ️")
                             else:
-                                # Prepare Firestore updates
-                                batch = db.batch()
-                                update_log = {}
-
-                                # Update league members
-                                for player_id in valid_new_players:
-                                    user_data = users[player_id]
-                                    user_name = user_data.get("username", "Unknown User")
-                                    current_members[player_id] = user_name
-                                    update_log[player_id] = user_name
-
-                                # Add batch updates for league members
-                                batch.update(league_ref, {"members": current_members})
-
-                                # Update user league memberships
-                                for player_id in valid_new_players:
-                                    user_ref = db.collection("users").document(player_id)
-                                    user_league_list = users[player_id].get("league_id", [])
-                                    user_league_list.append(selected_league_id)
-                                    batch.update(user_ref, {"league_id": user_league_list})
-
-                                # Commit the batch
-                                batch.commit()
+                                # New members and their usernames
+                                update_log = {
+                                    player_id: users[player_id].get("username", "Unknown User") for player_id in valid_new_players
+                                }
+
+                                # Add to the league's members and the users' league lists in one atomic write
+                                result = firestore_add_players_to_league(selected_league_id, update_log)
+                                if not result["success"]:
+                                    raise RuntimeError(result["message"])
 
                                 # Update session state
-                                st.session_state["all_leagues"][selected_league_id]["members"] = current_members
+                                st.session_state["all_leagues"] = firestore_get_all_leagues()
 
                                 st.success("Players successfully added to the league!", icon="✅")
                                 st.write("The following players were added:")
@@ -478,9 +446,8 @@ elif selected_tab == "Manage Leagues" and user_role in ["super_admin", "admin"]:
             # Remove Players Section
             with st.expander("➖ Remove Players from League", expanded=False):
                 try:
-                    # Cache current members for Firestore writes
-                    league_ref = db.collection("leagues").document(selected_league_id)
-                    league_data = league_ref.get().to_dict()
+                    # Current members (cached), to validate the selection
+                    league_data = firestore_get_league(selected_league_id)
                     current_members = league_data.get("members", {})
 
                     # Ensure `current_members` is a dictionary
@@ -510,31 +477,17 @@ elif selected_tab == "Manage Leagues" and user_role in ["super_admin", "admin"]:
                                     if not valid_remove_players:
                                         st.warning("None of the selected players are currently in the league.", icon="⚠️")
                                     else:
-                                        # Prepare Firestore updates
-                                        batch = db.batch()
-                                        update_log = []
-
-                                        # Update league members
-                                        for player_id in valid_remove_players:
-                                            current_members.pop(player_id, None)
-                                            update_log.append(users.get(player_id, {}).get("username", "Unknown User"))
+                                        update_log = [
+                                            users.get(player_id, {}).get("username", "Unknown User") for player_id in valid_remove_players
+                                        ]
 
-                                        # Add batch update for league members
-                                        batch.update(league_ref, {"members": current_members})
-
-                                        # Update user league memberships
-                                        for player_id in valid_remove_players:
-                                            user_ref = db.collection("users").document(player_id)
-                                            user_league_list = users.get(player_id, {}).get("league_id", [])
-                                            if selected_league_id in user_league_list:
-                                                user_league_list.remove(selected_league_id)
-                                                batch.update(user_ref, {"league_id": user_league_list})
-
-                                        # Commit the batch
-                                        batch.commit()
+                                        # Remove from the league's members and the users' league lists in one atomic write
+                                        result = firestore_remove_players_from_league(selected_league_id, list(valid_remove_players))
+                                        if not result["success"]:
+                                            raise RuntimeError(result["message"])
 
                                         # Update session state
-                                        st.session_state["all_leagues"][selected_league_id]["members"] = current_members
+                                        st.session_state["all_leagues"] = firestore_get_all_leagues()
 
                                         st.success("Players successfully removed from the league!", icon="✅")
                                         st.write("The following players were removed:")
@@ -546,6 +499,125 @@ elif selected_tab == "Manage Leagues" and user_role in ["super_admin", "admin"]:
                 except Exception as e:
                     st.error(f"Error fetching league data: {e}", icon="❌")
 
+            # Duration Calibration Section
+            with st.expander("⏱️ Duration Estimates", expanded=False):
+                duration_profile = firestore_get_duration_profile(selected_league_id)
+                if duration_profile:
+                    st.markdown(
+                        f"**Game Length Factor:** {duration_profile.get('game_length_factor')}  \n"
+                        f"**Break Between Games:** {duration_profile.get('break_time')} minutes  \n"
+                        f"**Buffer Per Round:** {duration_profile.get('misc_time')} minutes  \n"
+                        f"**Calibrated From:** {duration_profile.get('samples')} rounds"
+                    )
+                else:
+                    st.info("This league uses default duration estimates.", icon="ℹ️")
+
+                if st.button("⏱️ Recalibrate from History"):
+                    result = calibrate_league_duration_profile(selected_league_id)
+                    if result["success"]:
+                        st.success("Duration estimates recalibrated!", icon="✅")
+                    else:
+                        st.warning(result["message"], icon="⚠️")
+
+            # League Records Maintenance Section
+            with st.expander("🏛️ League Records", expanded=False):
+                st.markdown("Career records are updated automatically when a tournament is saved.")
+                if st.button("🔁 Rebuild League Records"):
+                    with st.spinner("Rebuilding league records from saved tournaments..."):
+                        result = rebuild_league_aggregates(selected_league_id)
+                    if result["success"]:
+                        st.success(result["message"], icon="✅")
+                    else:
+                        st.error(result["message"], icon="❌")
+
+            # League Ratings Maintenance Section
+            with st.expander("📊 League Ratings", expanded=False):
+                st.markdown("Elo ratings are updated automatically when a tournament is saved.")
+                if st.button("🔁 Rebuild Ratings"):
+                    with st.spinner("Replaying league history to rebuild ratings..."):
+                        result = rebuild_league_ratings(selected_league_id)
+                    if result["success"]:
+                        st.success(result["message"], icon="✅")
+                    else:
+                        st.error(result["message"], icon="❌")
+
+            # Analytics Warehouse Section
+            with st.expander("🗄️ Analytics Warehouse", expanded=False):
+                st.markdown("Saved tournaments are exported to local Parquet files for historical analytics.")
+                if st.button("🔄 Sync Warehouse"):
+                    with st.spinner("Syncing tournaments to the warehouse..."):
+                        result = sync_league_warehouse(selected_league_id)
+                    if result["success"]:
+                        st.success(result["message"], icon="✅")
+                    else:
+                        st.error(result["message"], icon="❌")
+
+            # Offline Event Mode Section
+            with st.expander("📴 Offline Event Mode", expanded=offline_mode_active()):
+                st.markdown(
+                    "For venues with poor connectivity: prefetch your leagues while online, then run the event "
+                    "on this device and sync the results once the connection is back."
+                )
+                pack_info = offline_pack_info()
+                if offline_mode_active():
+                    pending = pending_offline_writes()
+                    st.info(f"Offline event mode is on. {pending} change(s) are waiting to sync.", icon="📴")
+                    force_sync = st.checkbox(
+                        "Save conflicting tournaments anyway",
+                        help="Use when a tournament was held back, e.g. because a player left the league meanwhile.",
+                    )
+                    if st.button("🔄 Sync Offline Results", disabled=not pending):
+                        with st.spinner("Syncing offline results..."):
+                            result = sync_offline_journal(force=force_sync)
+                        if result["success"]:
+                            st.success(result["message"], icon="✅")
+                        else:
+                            st.warning(result["message"], icon="⚠️")
+                        for tournament_id, reason in {**result["conflicts"], **result["failed"]}.items():
+                            st.write(f"- **{tournament_id}**: {reason}")
+                    if st.button("🌐 Go Back Online", disabled=bool(pending) or user_role != "super_admin"):
+                        result = exit_offline_mode()
+                        if result["success"]:
+                            # Refit duration estimates and export the synced tournaments, now against the online data
+                            with st.spinner("Updating league estimates and the warehouse..."):
+                                for league_id in (pack_info or {}).get("league_ids", []):
+                                    calibrate_league_duration_profile(league_id)
+                                    sync_league_warehouse(league_id)
+                            st.success(result["message"], icon="✅")
+                            st.rerun()
+                        else:
+                            st.error(result["message"], icon="❌")
+                else:
+                    if pack_info:
+                        st.caption(
+                            f"Event data for {len(pack_info['league_ids'])} league(s) prefetched at {pack_info['prefetched_at']}."
+                        )
+                    if st.button("📥 Prefetch Event Data"):
+                        with st.spinner("Downloading your leagues and their members..."):
+                            result = prefetch_event_pack(list(leagues.keys()), user_ids=[creator_id])
+                        if result["success"]:
+                            st.success(result["message"], icon="✅")
+                        else:
+                            st.error(result["message"], icon="❌")
+                    # Offline mode swaps the data backend for the whole server process, not just this session
+                    confirm_offline = st.checkbox(
+                        "I understand that every user's session on this server switches to the event data, "
+                        "and leagues and users outside it will be unavailable until we go back online.",
+                        disabled=user_role != "super_admin",
+                    )
+                    if user_role != "super_admin":
+                        st.caption("Only a super admin can switch this server to offline event mode.")
+                    if st.button(
+                        "📴 Go Offline",
+                        disabled=not pack_info or not confirm_offline or user_role != "super_admin",
+                    ):
+                        result = enter_offline_mode()
+                        if result["success"]:
+                            st.success(result["message"], icon="✅")
+                            st.rerun()
+                        else:
+                            st.error(result["message"], icon="❌")
+
 
 
     else:
@@ -566,24 +638,7 @@ elif selected_tab == "Search Leagues":
         unsafe_allow_html=True,
     )
 
-    # Initialize refresh-related session state variables
-    if "last_refresh_time" not in st.session_state:
-        st.session_state["last_refresh_time"] = 0
-    if "all_leagues" not in st.session_state:
-        st.session_state["all_leagues"] = firestore_get_all_leagues()
-
-    # Refresh Button with Cooldown
-    cooldown = 60  # Cooldown in seconds
-    can_refresh = time.time() - st.session_state["last_refresh_time"] >= cooldown
-
-    if st.button("🔄 Refresh Leagues", disabled=not can_refresh, use_container_width=True):
-        if can_refresh:
-            st.session_state["all_leagues"] = firestore_get_all_leagues()
-            st.session_state["last_refresh_time"] = time.time()
-            st.success("Leagues refreshed successfully!", icon="✅")
-        else:
-            remaining_time = cooldown - int(time.time() - st.session_state["last_refresh_time"])
-            st.warning(f"Please wait {remaining_time} seconds before refreshing again.", icon="⏳")
+    # Leagues come from the live league mirror (assigned at the top of the page): new leagues appear on the next rerun
 
     # Fetch current user details
     current_user_data = firestore_get_user(st.session_state.user_id)
@@ -693,17 +748,15 @@ elif selected_tab == "Search Leagues":
                                 st.info(f"You are already a member of {league_data['league_name']}.", icon="ℹ️")
                                 st.stop()
 
-                            # Add the league to the user's `league_id` list
+                            # The user's league list for the session (copied: user_data may be shared)
                             updated_user_leagues = user_leagues.copy() if isinstance(user_leagues, list) else []
                             updated_user_leagues.append(selected_league_id)
 
-                            firestore_batch_update_users(
-                                {st.session_state.user_id: {"league_id": updated_user_leagues}}
+                            # Add the user to the league's members and the league to the user's list in one atomic write
+                            result = firestore_add_players_to_league(
+                                selected_league_id, {st.session_state.user_id: st.session_state.get("username") or ""}
                             )
 
-                            # Add the user to the league's `members` list
-                            result = firestore_add_players_to_league(selected_league_id, [st.session_state.user_id])
-
                             if result["success"]:
                                 # Update session state and success message
                                 st.session_state["user_data"]["league_id"] = updated_user_leagues
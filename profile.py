@@ -1,12 +1,8 @@
 import streamlit as st
-import firebase_admin
-from utils.data_utils import firestore_get_leagues, create_league_mapping, firestore_get_user
+from utils.data_utils import firestore_get_leagues, create_league_mapping, firestore_get_user, firestore_get_league_ratings
+from utils.rating_utils import build_ratings_table
 import time
 
-# Initialize Firebase app if not already initialized
-if not firebase_admin._apps:
-    firebase_admin.initialize_app()
-
 def display_account_details(username, email, role, league_names):
     """
     Display user account details in a styled card.
@@ -119,6 +115,23 @@ if st.session_state.get("authenticated", False):
         league_names=st.session_state.get("league_names", []),
     )
 
+    # Display the user's Elo rating in each league
+    league_mapping = st.session_state.get("league_mapping") or {}
+    rating_rows = []
+    for league_id, league_name in league_mapping.items():
+        ratings_table = build_ratings_table(firestore_get_league_ratings(league_id))
+        user_row = ratings_table[ratings_table["Player"] == st.session_state.get("username")]
+        if not user_row.empty:
+            rating_rows.append({
+                "League": league_name,
+                "Rating": user_row["Rating"].iloc[0],
+                "Rank": f"{user_row['Rank'].iloc[0]} / {len(ratings_table)}",
+                "Games": user_row["Games"].iloc[0],
+            })
+    if rating_rows:
+        st.markdown("#### 📊 League Ratings")
+        st.dataframe(rating_rows, use_container_width=True, hide_index=True)
+
     # Initialize session state variables for cooldown
     if "last_refresh_time" not in st.session_state:
         st.session_state["last_refresh_time"] = 0
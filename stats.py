@@ -1,8 +1,16 @@
 import streamlit as st
 import pandas as pd
-from utils.analytics_utils import calculate_basic_analysis, calculate_playoff_ranks
-from utils.data_utils import create_league_mapping, firestore_query_tournaments_by_league
-from utils.tournament_utils import sort_standings
+from utils.analytics_utils import build_career_table
+from utils.data_utils import (
+    create_league_mapping,
+    firestore_list_tournaments_by_league,
+    firestore_get_tournament,
+    firestore_get_league_aggregates,
+    firestore_get_league_ratings
+)
+from utils.rating_utils import build_ratings_table
+from utils.warehouse_utils import list_warehouse_seasons, season_leaderboard, season_luck_table
+from utils.tournament_utils import sort_standings, get_saved_tournament_analysis
 
 # Page Header: Mobile-First Design
 st.markdown(
@@ -28,22 +36,59 @@ else:
         format_func=lambda x: league_mapping.get(x, "Unknown League"),
     )
 
-    # Fetch Tournaments for Selected League
-    @st.cache_data(ttl=600)
-    def fetch_tournaments_by_league(league_id):
-        return firestore_query_tournaments_by_league(league_id)
+    # League Records: career aggregates maintained on every tournament save
+    league_aggregates = firestore_get_league_aggregates(selected_league_id)
+    career_table = build_career_table(league_aggregates)
+    if not career_table.empty:
+        with st.expander("🏛️ League Records", expanded=False):
+            st.markdown(
+                f"**{league_aggregates.get('tournaments', 0)}** tournaments · "
+                f"**{league_aggregates.get('games', 0)}** games · "
+                f"**{league_aggregates.get('goals', 0)}** goals"
+            )
+            st.dataframe(career_table, use_container_width=True, hide_index=True)
 
-    filtered_tournaments = st.session_state.get(f"tournaments_{selected_league_id}")
-    if not filtered_tournaments:
-        filtered_tournaments = fetch_tournaments_by_league(selected_league_id)
-        st.session_state[f"tournaments_{selected_league_id}"] = filtered_tournaments
+    # League Ratings: Elo ratings updated game by game on every tournament save
+    ratings_table = build_ratings_table(firestore_get_league_ratings(selected_league_id))
+    if not ratings_table.empty:
+        with st.expander("📊 League Ratings", expanded=False):
+            st.dataframe(ratings_table, use_container_width=True, hide_index=True)
+
+    # Season Leaderboard: historical totals read from the local Parquet warehouse
+    warehouse_seasons = list_warehouse_seasons(selected_league_id)
+    if warehouse_seasons:
+        with st.expander("🗓️ Season Leaderboard", expanded=False):
+            selected_seasons = st.multiselect(
+                "Seasons", options=warehouse_seasons, default=warehouse_seasons[:1], key="leaderboard_seasons"
+            )
+            selected_stage = st.radio(
+                "Games", options=["All", "League", "Playoff"], horizontal=True, key="leaderboard_stage"
+            )
+            leaderboard = season_leaderboard(
+                selected_league_id,
+                seasons=selected_seasons or None,
+                stage=None if selected_stage == "All" else selected_stage,
+            )
+            if leaderboard.empty:
+                st.info("No games found for the selected seasons.", icon="ℹ️")
+            else:
+                st.dataframe(leaderboard.round(2), use_container_width=True, hide_index=True)
+
+        # League Luck Table: points versus xG-implied expected points over the league's history (warehouse)
+        league_xpts = season_luck_table(selected_league_id)
+        if not league_xpts.empty:
+            with st.expander("🍀 League Luck Table", expanded=False):
+                st.dataframe(league_xpts, use_container_width=True, hide_index=True)
+
+    # Fetch the Tournament List for Selected League (metadata only; results are loaded on selection)
+    filtered_tournaments = firestore_list_tournaments_by_league(selected_league_id)
 
     if not filtered_tournaments:
         st.info("No tournaments found for the selected league.", icon="ℹ️")
     else:
         # Tournament Selection
         tournament_names = {
-            t["metadata"]["tournament_id"]: t["metadata"].get("tournament_name", "Unnamed Tournament")
+            t["metadata"]["tournament_id"]: t["metadata"].get("tournament_name") or "Unnamed Tournament"
             for t in filtered_tournaments
         }
         selected_tournament_id = st.selectbox(
@@ -52,10 +97,9 @@ else:
             format_func=lambda x: tournament_names[x],
         )
 
-        # Fetch Selected Tournament Data (dictionary)
-        selected_tournament = next(
-            (t for t in filtered_tournaments if t["metadata"]["tournament_id"] == selected_tournament_id), {}
-        )
+        # Fetch Selected Tournament Data (dictionary), cached per tournament in memory and on local disk
+        update_times = {t["metadata"]["tournament_id"]: t.get("update_time") for t in filtered_tournaments}
+        selected_tournament = firestore_get_tournament(selected_tournament_id, update_times.get(selected_tournament_id))
 
         # Breakdown Selected Tournament Data into functional elements
         results_df = pd.DataFrame(selected_tournament.get("results", []))
@@ -66,8 +110,9 @@ else:
         if results_df.empty and playoff_results.empty:
             st.info("No results available for this tournament.", icon="ℹ️")
         else:
-            # Perform Basic Analysis
-            stats = calculate_basic_analysis(selected_tournament)
+            # Perform Basic Analysis (cached per tournament version, shared across sessions)
+            analysis = get_saved_tournament_analysis(selected_tournament)
+            stats = analysis["stats"]
             username = st.session_state.user_data.get("username", "Player")
 
             # Display Summary KPIs Section
@@ -82,9 +127,6 @@ else:
                 unsafe_allow_html=True,
             )
 
-            # Retrieve Overall Stats
-            overall_stats = stats.get("overall", pd.DataFrame())
-
             # Incorporate Final Standings
             if "final_standings" in st.session_state:
                 final_standings = st.session_state.final_standings
@@ -93,38 +135,36 @@ else:
                     {v: k for k, v in team_selection.items()}
                 )
                 # Merge Rankings and Team Details
-                overall_stats = overall_stats.merge(
+                overall_stats = stats.get("overall", pd.DataFrame()).merge(
                     final_standings[["Player", "Rank", "Team"]], on="Player", how="left"
                 )
-            else:
-                # Assign Rankings if Final Standings are Missing
-                overall_stats = overall_stats.assign(Rank=range(1, len(overall_stats) + 1))
-
-            # Rename Columns for Clarity
-            overall_stats.rename(
-                columns={
-                    "Goals_For": "GF",
-                    "Goals_Against": "GA",
-                    "xG_For": "xGF",
-                    "xG_Against": "xGA",
-                    "Wins": "W",
-                    "Draws": "D",
-                    "Losses": "L",
-                },
-                inplace=True,
-            )
 
-            # Define Tiebreakers and Column Mapping
-            tiebreakers = selected_tournament.get("metadata", {}).get("tiebreakers", [])
-            column_mapping = {"Goals For": "GF", "xG For": "xGF", "Wins": "W", "Draws": "D"}
+                # Rename Columns for Clarity
+                overall_stats = overall_stats.rename(
+                    columns={
+                        "Goals_For": "GF",
+                        "Goals_Against": "GA",
+                        "xG_For": "xGF",
+                        "xG_Against": "xGA",
+                        "Wins": "W",
+                        "Draws": "D",
+                        "Losses": "L",
+                    }
+                )
 
-            # Reorder Columns for Display
-            display_columns = ["Rank", "Player", "Points", "Games", "W", "D", "L", "GF", "GA", "xGF", "xGA"]
-            overall_stats = overall_stats[display_columns]
+                # Define Tiebreakers and Column Mapping
+                tiebreakers = selected_tournament.get("metadata", {}).get("tiebreakers", [])
+                column_mapping = {"Goals For": "GF", "xG For": "xGF", "Wins": "W", "Draws": "D"}
 
-            # Sort Standings Based on Tiebreakers and Rankings
-            overall_stats_final = sort_standings(overall_stats, tiebreakers, column_mapping)
+                # Reorder Columns for Display
+                display_columns = ["Rank", "Player", "Points", "Games", "W", "D", "L", "GF", "GA", "xGF", "xGA"]
+                overall_stats = overall_stats[display_columns]
 
+                # Sort Standings Based on Tiebreakers and Rankings
+                overall_stats_final = sort_standings(overall_stats, tiebreakers, column_mapping)
+            else:
+                # League table sorted by the tournament's own tiebreakers
+                overall_stats_final = analysis["league_table"]
 
             # User Stats and League Averages
             user_stats = overall_stats_final[overall_stats_final["Player"] == username]
@@ -173,7 +213,7 @@ else:
                     """,
                     unsafe_allow_html=True,
                 )
-                playoff_rankings = calculate_playoff_ranks(playoff_results)
+                playoff_rankings = analysis["playoff_rankings"]
                 st.dataframe(
                     playoff_rankings[["Rank", "Player", "Goals For", "Goals Against", "xG", "Games Played"]],
                     use_container_width=True,
@@ -193,6 +233,30 @@ else:
                 )
                 st.dataframe(overall_stats_final, use_container_width=True, hide_index=True)
 
+            # Expected Points: xG-implied points, luck and finishing over/under-performance
+            expected_points = analysis["expected_points"]
+            if not expected_points.empty:
+                st.markdown("---")
+                st.markdown(
+                    """
+                    <div style='text-align: center; margin-top: 20px;'>
+                        <h3>🍀 Expected Points </h3>
+                        <p style="color: #808080;">Luck = Points - xPts · Finishing = Goals - xG · Goalkeeping = xGA - Goals Against</p>
+                    </div>
+                    """,
+                    unsafe_allow_html=True,
+                )
+                user_xpts = expected_points[expected_points["Player"] == username]
+                if not user_xpts.empty:
+                    luck = user_xpts.iloc[0]["Luck"]
+                    st.markdown(
+                        f"<div style='text-align:center;'><strong>{username}</strong> "
+                        f"{'over' if luck >= 0 else 'under'}performed expected points by "
+                        f"<span style='color: {'green' if luck >= 0 else 'red'};'>{abs(luck):.2f}</span></div>",
+                        unsafe_allow_html=True,
+                    )
+                st.dataframe(expected_points, use_container_width=True, hide_index=True)
+
 # Footer Branding
 st.markdown("---")
 st.write("💡 Use this page to analyze past tournaments and improve your strategies.")
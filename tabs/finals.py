@@ -4,13 +4,18 @@
 
 import streamlit as st
 import pandas as pd
+from datetime import datetime, timezone
 from utils.tournament_utils import (
     determine_winner,
     validate_playoffs_completion,
     update_playoff_results,
-    update_final_matches
+    update_final_matches,
+    calibrate_league_duration_profile
     )
-from utils.data_utils import save_tournament_complete
+from utils.data_utils import save_tournament_complete, autosave_games, autosave_tournament_progress, tournament_saved_complete
+from utils.warehouse_utils import export_tournament_to_warehouse
+from utils.write_queue import write_queue
+from utils.offline_utils import offline_mode_active
 
 #-_-_-_-_-_-_-_-_-_-_-_-_-_-_-_-_-_-_-_-
 #-- tournament.py: finals tab (4th)
@@ -63,6 +68,7 @@ def render():
             )
             if st.button("🚀 Generate Finals Bracket", key="generate_finals_button", use_container_width=True):
                 st.session_state["generate_finals_clicked"] = True
+                autosave_tournament_progress(st.session_state["selected_tournament_id"], finals_generated=True)
                 st.rerun()  # Refresh the app to proceed
 
         # Only proceed if the finals have been generated
@@ -93,12 +99,38 @@ def render():
                 #-1- save results to firebase
                 st.markdown("<div style='text-align: center; margin: 10px;'><h3>💾 Save Tournament Results</h3></div>", unsafe_allow_html=True)
                 if st.button("💾 Save Tournament Results", use_container_width=True):
-                    with st.spinner("Saving tournament results..."):
-                        try:
-                            save_tournament_complete(st.session_state, verbose=True)
-                            st.success("Tournament results saved successfully! 🎉", icon="✅")
-                        except Exception as e:
-                            st.error(f"An error occurred: {str(e)}", icon="❌")
+                    try:
+                        league_id = tournament_details["league_id"]
+                        tournament_id = st.session_state["selected_tournament_id"]
+
+                        def after_save():
+                            if offline_mode_active():
+                                return  # Both run online once the offline results are synced
+                            # Refit the league's duration estimates with this tournament's timings
+                            calibrate_league_duration_profile(league_id)
+                            # Export the new tournament to the local analytics warehouse
+                            export_tournament_to_warehouse(tournament_id, league_id)
+
+                        # Queued: the write and the follow-ups above run in the background
+                        save_tournament_complete(st.session_state, verbose=True, background=True, on_commit=after_save)
+                    except Exception as e:
+                        st.error(f"An error occurred: {str(e)}", icon="❌")
+
+                # Report the queued save (it keeps retrying in the background while the connection is down)
+                save_status = write_queue.status(("tournament", st.session_state["selected_tournament_id"]))
+                if save_status == "committed" and offline_mode_active():
+                    st.success("Tournament results saved on this device; sync them from the League Portal once you are back online.", icon="📴")
+                elif save_status == "committed":
+                    st.success("Tournament results saved successfully! 🎉", icon="✅")
+                elif save_status == "pending":
+                    st.info("Tournament results are being saved in the background. You can keep using the app.", icon="⏳")
+                elif save_status == "failed":
+                    save_key = ("tournament", st.session_state["selected_tournament_id"])
+                    save_error = next((failed["error"] for failed in write_queue.failed(save_key)), "unknown error")
+                    st.error(f"Saving the tournament failed: {save_error}", icon="❌")
+                    if st.button("🔁 Retry Saving", use_container_width=True):
+                        write_queue.retry(save_key)
+                        st.rerun()
                 #-2- display the champion
                 overall_winner = determine_winner(final_matches)
                 winner_team = teams[overall_winner]
@@ -232,6 +264,7 @@ def render():
                             "Away Goals": away_goals,
                             "Home xG": home_xg,
                             "Away xG": away_xg,
+                            "Recorded At": datetime.now(timezone.utc).isoformat(),
                         }
 
                         # Update playoff results
@@ -240,6 +273,13 @@ def render():
                         # Reflect changes in session state
                         st.session_state.playoff_results = updated_results
 
+                        # Autosave just this game
+                        autosave = autosave_games(
+                            st.session_state["selected_tournament_id"], "Playoff", updated_results, [selected_game]
+                        )
+                        if not autosave["success"]:
+                            st.warning(autosave["message"], icon="⚠️")
+
                         st.success(f"Results updated for Finals {selected_game}.", icon="✅")
 
             # RESET FINALS BUTTON
@@ -252,9 +292,11 @@ def render():
                 """,
                 unsafe_allow_html=True,
             )
-            # Reset Playoff Bracket
-            if st.button("🔄 Reset Finals", use_container_width=True):
+            # Reset Playoff Bracket (not once the tournament is saved)
+            saved = tournament_saved_complete(st.session_state["selected_tournament_id"])
+            if st.button("🔄 Reset Finals", use_container_width=True, disabled=saved):
                 if "generate_finals_clicked" in st.session_state:
                     st.session_state.pop("generate_finals_clicked", None)  # Safely remove finals button state
+                autosave_tournament_progress(st.session_state["selected_tournament_id"], finals_generated=False)
                 st.success("Finals results and state have been cleared!", icon="✅")
                 st.rerun()
\ No newline at end of file
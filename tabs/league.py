@@ -5,10 +5,12 @@
 # main libraries
 import streamlit as st
 import pandas as pd
+from datetime import datetime, timezone
 # custom libraries
 from utils.tournament_utils import (
     update_league_game_results,
 )
+from utils.data_utils import autosave_games
 
 #-_-_-_-_-_-_-_-_-_-_-_-_-_-_-_-_-_-_-_-
 #-- tournament.py: league tab (2nd)
@@ -191,6 +193,7 @@ def render():
                         "Away Goals": away_goals,
                         "Home xG": home_xg,
                         "Away xG": away_xg,
+                        "Recorded At": datetime.now(timezone.utc).isoformat(),
                     }
 
                     # Update results and standings
@@ -205,6 +208,13 @@ def render():
                     st.session_state["results"] = updated_results
                     st.session_state["standings"] = updated_standings
 
+                    # Autosave just this game
+                    autosave = autosave_games(
+                        st.session_state["selected_tournament_id"], "League", updated_results, [selected_game]
+                    )
+                    if not autosave["success"]:
+                        st.warning(autosave["message"], icon="⚠️")
+
                     st.success(f"Result updated for League {selected_game}.", icon="✅")
 
         else:
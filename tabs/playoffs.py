@@ -5,6 +5,7 @@
 # main libraries
 import streamlit as st
 import pandas as pd
+from datetime import datetime, timezone
 import numpy as np
 # custom libraries
 from utils.tournament_utils import (
@@ -19,6 +20,13 @@ from utils.tournament_utils import (
     validate_league_completion,
     update_playoff_results
 )
+from utils.data_utils import (
+    firestore_get_league_ratings,
+    autosave_games,
+    autosave_tournament_progress,
+    reset_live_games,
+)
+from utils.rating_utils import matchup_expected_score
 
 
 #-_-_-_-_-_-_-_-_-_-_-_-_-_-_-_-_-_-_-_-
@@ -121,15 +129,25 @@ def render():
                 )
                 last_game_id = int(last_game_id) if not pd.isna(last_game_id) else 0
 
+                # Seed the qualifiers by league rating if requested
+                ratings = (
+                    firestore_get_league_ratings(tournament_details["league_id"])
+                    if tournament_details.get("playoff_seeding") == "Ratings"
+                    else None
+                )
+
                 # Generate the playoff bracket
                 playoff_bracket = generate_playoffs_bracket(
                     tournament_details=tournament_details,
                     standings=st.session_state.standings,
                     last_game_id=last_game_id,
-                    debug=True  # Enable debugging
+                    debug=True,  # Enable debugging
+                    ratings=ratings,
                 )
                 st.session_state["playoff_results"] = pd.DataFrame(playoff_bracket)
                 st.session_state["playoff_results"][["Home Goals", "Away Goals", "Home xG", "Away xG"]] = np.nan
+                autosave_games(st.session_state["selected_tournament_id"], "Playoff", st.session_state["playoff_results"])
+                autosave_tournament_progress(st.session_state["selected_tournament_id"], playoffs_generated=True)
                 st.success("Playoffs bracket generated successfully!", icon="✅")
                 st.rerun()
             except ValueError as e:
@@ -181,7 +199,18 @@ def render():
         )
 
         # Display playoff results with consistent attributes
-        playoff_bracket = playoff_results[["Game #", "Match", "Home Team", "Away Team", "Console", "Status"]]
+        bracket_columns = ["Game #", "Match", "Home Team", "Away Team", "Console", "Status"]
+
+        # Home expected score from league ratings, draws counting half (only once both players are known)
+        ratings = firestore_get_league_ratings(tournament_details["league_id"])
+        if ratings:
+            playoff_results["Home Expected Score %"] = [
+                round(100 * matchup_expected_score(ratings, home, away), 1) if home in teams and away in teams else None
+                for home, away in zip(playoff_results["Home"], playoff_results["Away"])
+            ]
+            bracket_columns.insert(4, "Home Expected Score %")
+
+        playoff_bracket = playoff_results[bracket_columns]
         st.markdown(
             """
             <div style="text-align: center; margin-bottom: 0px;">
@@ -335,6 +364,7 @@ def render():
                             "Away Goals": away_goals,
                             "Home xG": home_xg,
                             "Away xG": away_xg,
+                            "Recorded At": datetime.now(timezone.utc).isoformat(),
                         }
 
                         # Update playoff results
@@ -343,6 +373,13 @@ def render():
                         # Reflect changes in session state
                         st.session_state["playoff_results"] = updated_results
 
+                        # Autosave just this game
+                        autosave = autosave_games(
+                            st.session_state["selected_tournament_id"], "Playoff", updated_results, [selected_game]
+                        )
+                        if not autosave["success"]:
+                            st.warning(autosave["message"], icon="⚠️")
+
                         st.success(f"Result updated for Playoff {selected_game}.", icon="✅")
                     
             # RESET PLAYOFFS BUTTON
@@ -363,7 +400,10 @@ def render():
                     st.session_state.pop("generate_playoffs_clicked", None)
                 if "generate_finals_clicked" in st.session_state:
                     st.session_state.pop("generate_finals_clicked", None)
-
+                reset_live_games(st.session_state["selected_tournament_id"], "Playoff")
+                autosave_tournament_progress(
+                    st.session_state["selected_tournament_id"], playoffs_generated=False, finals_generated=False
+                )
 
                 st.success("Playoff results cache has been cleared!", icon="✅")
                 st.rerun()
@@ -14,6 +14,7 @@ from utils.tournament_utils import (
     initialize_standings,
 )
 from utils.general_utils import initialize_session_state
+from utils.data_utils import firestore_get_league_ratings, autosave_tournament_header, autosave_games
 
 #-_-_-_-_-_-_-_-_-_-_-_-_-_-_-_-_-_-_-_-
 #-- tournament.py: finals tab (1st)
@@ -66,6 +67,7 @@ def render():
         games_per_player=games_per_player,
         league_format=league_format,
         playoff_format=playoff_format,
+        league_id=tournament_details.get("league_id"),
     )
 
     league_details = tournament_duration_details["league_details"]
@@ -89,6 +91,7 @@ def render():
         st.write(f"**🏅 League Format:** {tournament_details['league_format']}")
         st.write(f"**↕️ League Tiebreaker Order:** {tournament_details['tiebreakers']}")
         st.write(f"**⚔️ Playoff Format:** {tournament_details['playoff_format']}")
+        st.write(f"**🎲 Seeding:** Schedule by {tournament_details.get('schedule_seeding', 'Random')}, Playoffs by {tournament_details.get('playoff_seeding', 'Points')}")
         st.write(f"**👥 Players:** {tournament_details['num_players']}")
         st.write(f"**🎮 Consoles:** {tournament_details['num_consoles']}")
         st.write(f"**⏱️ Half Duration:** {tournament_details['half_duration']} minutes")
@@ -133,8 +136,13 @@ def render():
                 if key not in tournament_details:
                     raise KeyError(f"Missing required field in tournament details: '{key}'")
 
-            # Generate the league schedule
-            schedule = generate_league_schedule(tournament_details)
+            # Generate the league schedule, optionally seeded by league ratings
+            ratings = (
+                firestore_get_league_ratings(tournament_details["league_id"])
+                if tournament_details.get("schedule_seeding") == "Ratings"
+                else None
+            )
+            schedule = generate_league_schedule(tournament_details, ratings=ratings)
 
             # Validate the generated schedule
             validation_messages = validate_schedule(schedule, tournament_details)
@@ -161,6 +169,10 @@ def render():
             st.session_state["results"] = results_df
             st.session_state["standings"] = standings_df
 
+            # Autosave the header and every scheduled game, so the event can be resumed after a refresh
+            autosave_tournament_header(st.session_state, progress={"playoffs_generated": False, "finals_generated": False})
+            autosave_games(selected_tournament_id, "League", results_df)
+
             # Mark the tournament as ready
             st.session_state["tournament_ready"] = True
             st.success("Tournament schedule generated successfully! Tabs are now unlocked.", icon="✅")
@@ -52,6 +52,8 @@ def render_start_over_button(tab):
             "num_players",
             "num_consoles",
             "half_duration",
+            "schedule_seeding",
+            "playoff_seeding",
             "players_selected",
             "selected_players",
             "team_selection",
@@ -366,6 +368,25 @@ def render():
                 help="Set the duration (in minutes) for each half of a game.",
             )
 
+            # Seeding Options
+            setup_col5, setup_col6 = st.columns(2, gap="medium")
+
+            with setup_col5:
+                schedule_seeding = st.selectbox(
+                    "Schedule Seeding",
+                    ["Random", "Ratings"],
+                    help="'Ratings' pairs players with similar league ratings first. 'Random' shuffles matchups.",
+                    key="setup_schedule_seeding",
+                )
+
+            with setup_col6:
+                playoff_seeding = st.selectbox(
+                    "Playoff Seeding",
+                    ["Points", "Ratings"],
+                    help="The top 6 in points qualify either way. 'Ratings' seeds the qualifiers by league rating.",
+                    key="setup_playoff_seeding",
+                )
+
             # Proceed Button
             proceed_button = st.button(
                 "🚀 Proceed to Games Setup",
@@ -382,6 +403,8 @@ def render():
                 st.session_state["num_players"] = num_players
                 st.session_state["num_consoles"] = num_consoles
                 st.session_state["half_duration"] = half_duration
+                st.session_state["schedule_seeding"] = schedule_seeding
+                st.session_state["playoff_seeding"] = playoff_seeding
                 st.session_state["tournament_type"] = (
                     f'League ({num_players}-Team-{league_format}) '
                     f'Playoffs (6-Team-{playoff_format})'
@@ -444,6 +467,7 @@ def render():
                     games_per_player=games,
                     league_format=league_format,
                     playoff_format=playoff_format,
+                    league_id=st.session_state.get("league_id"),
                 )
                 for games in viable_games
             }
@@ -677,6 +701,7 @@ def render():
                 games_per_player=games_per_player,
                 league_format=league_format,
                 playoff_format=playoff_format,
+                league_id=st.session_state.get("league_id"),
             )
 
             league_details = tournament_details["league_details"]
@@ -700,6 +725,7 @@ def render():
                 st.write(f"**🏅 League Format:** {st.session_state['league_format']}")
                 st.write(f"**↕️ League Tiebreaker Order:** {st.session_state['tiebreakers']}")
                 st.write(f"**⚔️ Playoff Format:** {st.session_state['playoff_format']}")
+                st.write(f"**🎲 Seeding:** Schedule by {st.session_state.get('schedule_seeding', 'Random')}, Playoffs by {st.session_state.get('playoff_seeding', 'Points')}")
                 st.write(f"**👥 Players:** {num_players}")
                 st.write(f"**🎮 Consoles:** {num_consoles}")
                 st.write(f"**⏱️ Half Duration:** {half_duration} minutes")
@@ -742,6 +768,8 @@ def render():
                     "league_format": st.session_state["league_format"],
                     "tiebreakers": st.session_state["tiebreakers"],
                     "playoff_format": st.session_state["playoff_format"],
+                    "schedule_seeding": st.session_state.get("schedule_seeding", "Random"),
+                    "playoff_seeding": st.session_state.get("playoff_seeding", "Points"),
                     "tournament_type": st.session_state["tournament_type"],
                     "num_players":  st.session_state["num_players"],
                     "num_consoles":  st.session_state["num_consoles"],
@@ -13,6 +13,7 @@ from utils.tournament_utils import (
     get_session_state,
     sort_standings
 )
+from utils.analytics_utils import get_player_game_table, aggregate_player_games, calculate_strength_rankings
 
 #-_-_-_-_-_-_-_-_-_-_-_-_-_-_-_-_-_-_-_-
 #-- tournament.py: standings tab (1st)
@@ -65,11 +66,8 @@ def render():
     if "playoff_results" in st.session_state and not st.session_state.playoff_results.empty:
         playoff_games = st.session_state.playoff_results.dropna(subset=["Home Goals", "Away Goals"])
         playoff_counts = (
-            playoff_games[["Game #", "Home", "Away"]]
-            .melt(id_vars=["Game #"], value_vars=["Home", "Away"], var_name="Role", value_name="Player")
-            .groupby("Player")
-            .agg(Playoff_Played=("Game #", "nunique"))
-            .reset_index()
+            aggregate_player_games(get_player_game_table(playoff_games, stage="Playoff"))
+            .rename(columns={"Games": "Playoff_Played"})[["Player", "Playoff_Played"]]
         )
         standings = standings.merge(playoff_counts, on="Player", how="left").fillna({"Playoff_Played": 0})
     else:
@@ -135,6 +133,35 @@ def render():
     # Update session state with the standings
     st.session_state.standings = standings
 
+    # Display strength-adjusted rankings (Bradley-Terry), which account for strength of schedule
+    if not games_played.empty:
+        st.markdown(
+            """
+            <div style="text-align: center; margin-bottom: 0px;">
+                <h3>💪 Strength Rankings</h3>
+            </div>
+            """,
+            unsafe_allow_html=True,
+        )
+        strength_rankings = calculate_strength_rankings(games_played, players=players)
+        strength_rankings["Team"] = strength_rankings["Player"].map(teams)
+        strength_rankings = strength_rankings.merge(
+            standings[["Team", "Rank"]].rename(columns={"Rank": "Table Rank"}), on="Team", how="left"
+        )
+        st.markdown(
+            """
+            <div class="tiebreaker-note">
+                <strong>Win % vs Avg:</strong> expected score against an average player. <strong>SoS:</strong> average strength of opponents faced.
+            </div>
+            """,
+            unsafe_allow_html=True,
+        )
+        st.dataframe(
+            strength_rankings[["Rank", "Team", "Win % vs Avg", "SoS", "Table Rank"]],
+            use_container_width=True,
+            hide_index=True,
+        )
+
 
     # Display the Games Played Table (League)
     st.markdown(
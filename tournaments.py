@@ -9,6 +9,10 @@ from tabs import (
     playoffs_render,
     finals_render,
 )
+from utils.data_utils import firestore_list_live_tournaments
+from utils.tournament_utils import resume_live_tournament
+from utils.write_queue import write_queue
+from utils.offline_utils import offline_mode_active, pending_offline_writes
 
 
 st.markdown(
@@ -66,6 +70,20 @@ if setup_button:
 if management_button:
     st.session_state["active_section"] = "Tournament Management"
 
+# Autosaves are written in the background; show when some are still waiting (e.g. on slow venue Wi-Fi)
+write_status = write_queue.stats()
+if write_status["pending"] or write_status["in_flight"]:
+    st.caption(f"💾 {write_status['pending'] + write_status['in_flight']} change(s) waiting to sync...")
+if write_status["failed"]:
+    st.warning(f"{write_status['failed']} change(s) could not be saved: {write_status['last_error']}", icon="⚠️")
+    if st.button("🔁 Retry Sync", key="retry_sync_button"):
+        write_queue.retry_failed()
+        st.rerun()
+
+# Offline event mode: everything is saved on this device until it is synced from the League Portal
+if offline_mode_active():
+    st.caption(f"📴 Offline event mode: {pending_offline_writes()} change(s) saved on this device, waiting to sync.")
+
 # Render Active Section
 if st.session_state["active_section"] == "Tournament Setup":
     setup_render()
@@ -81,6 +99,23 @@ elif st.session_state["active_section"] == "Tournament Management":
             """,
             unsafe_allow_html=True,
         )
+
+        # Offer to resume tournaments that were interrupted mid-event (every entered result is autosaved)
+        live_tournaments = firestore_list_live_tournaments(st.session_state.get("user_data", {}).get("league_id", []) or [])
+        if live_tournaments:
+            st.markdown("---")
+            resume_id = st.selectbox(
+                "⏯️ Resume a Tournament in Progress",
+                options=list(live_tournaments.keys()),
+                format_func=lambda x: f"{live_tournaments[x].get('details', {}).get('tournament_name', 'Unnamed Tournament')} ({x})",
+                key="resume_tournament_selector",
+            )
+            if st.button("▶️ Resume Tournament", use_container_width=True, key="resume_tournament_button"):
+                if resume_live_tournament(st.session_state, resume_id):
+                    st.success("Tournament restored from its autosaved games.", icon="✅")
+                    st.rerun()
+                else:
+                    st.error("This tournament could not be found. It may have been saved already.", icon="❌")
         st.stop()
 
     # Management Tabs
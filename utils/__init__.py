@@ -25,6 +25,7 @@ from .tournament_utils import (
     estimate_league_duration,
     estimate_playoff_duration,
     estimate_tournament_duration,
+    calibrate_league_duration_profile,
     generate_playoffs_bracket,
     determine_winner,
     validate_league_completion,
@@ -1,11 +1,146 @@
 import pandas as pd
+import numpy as np
 import os
- 
+import hashlib
+from utils.cache_utils import LRUCache
+
+
+# --- PLAYER-GAME FACT TABLE ---
+
+PLAYER_GAME_COLUMNS = [
+    "Game #", "Player", "Opponent", "Goals For", "Goals Against",
+    "xG For", "xG Against", "Result", "Points", "Round", "Match", "Stage",
+]
+
+# Memoized fact tables keyed by (results hash, stage); small, as only a few results versions are live at once
+_player_game_cache = LRUCache(maxsize=32)
+
+
+def hash_results(results):
+    """
+    Compute a content hash for a results DataFrame (values and column names).
+
+    Args:
+        results (pd.DataFrame): Results DataFrame.
+
+    Returns:
+        str: A hex digest identifying this version of the results.
+    """
+    if results is None or results.empty:
+        return "empty"
+    row_hashes = pd.util.hash_pandas_object(results.astype(str), index=False).to_numpy()
+    digest = hashlib.sha1(row_hashes.tobytes())
+    digest.update("|".join(map(str, results.columns)).encode())
+    return digest.hexdigest()
+
+
+def build_player_game_table(results, stage="League"):
+    """
+    Reshape Home/Away game results into a long player-game table (one row per player per completed game).
+
+    Args:
+        results (pd.DataFrame): Results with "Home", "Away", "Home Goals", "Away Goals", "Home xG" and "Away xG".
+        stage (str): Stage label for these games ("League" or "Playoff").
+
+    Returns:
+        pd.DataFrame: A table with the PLAYER_GAME_COLUMNS columns.
+    """
+    required = ["Game #", "Home", "Away", "Home Goals", "Away Goals"]
+    if results is None or results.empty or not set(required).issubset(results.columns):
+        return pd.DataFrame(columns=PLAYER_GAME_COLUMNS)
+
+    games = results.dropna(subset=["Home Goals", "Away Goals"])
+    home_goals = games["Home Goals"].to_numpy(dtype="int32")
+    away_goals = games["Away Goals"].to_numpy(dtype="int32")
+    home_xg = games["Home xG"].to_numpy(dtype="float64") if "Home xG" in games else np.zeros(len(games))
+    away_xg = games["Away xG"].to_numpy(dtype="float64") if "Away xG" in games else np.zeros(len(games))
+    rounds = games["Round"].to_numpy() if "Round" in games else np.full(len(games), np.nan)
+    matches = games["Match"].to_numpy() if "Match" in games else np.full(len(games), stage, dtype=object)
+
+    # Stack the home block on top of the away block, swapping sides for the away rows
+    goals_for = np.concatenate([home_goals, away_goals])
+    goals_against = np.concatenate([away_goals, home_goals])
+    result = np.select([goals_for > goals_against, goals_for == goals_against], ["W", "D"], default="L")
+
+    facts = pd.DataFrame({
+        "Game #": np.concatenate([games["Game #"].to_numpy(), games["Game #"].to_numpy()]),
+        "Player": pd.Categorical(np.concatenate([games["Home"].to_numpy(), games["Away"].to_numpy()])),
+        "Opponent": pd.Categorical(np.concatenate([games["Away"].to_numpy(), games["Home"].to_numpy()])),
+        "Goals For": goals_for,
+        "Goals Against": goals_against,
+        "xG For": np.concatenate([home_xg, away_xg]),
+        "xG Against": np.concatenate([away_xg, home_xg]),
+        "Result": pd.Categorical(result, categories=["W", "D", "L"]),
+        "Points": np.select([result == "W", result == "D"], [3, 1], default=0).astype("int8"),
+        "Round": np.concatenate([rounds, rounds]),
+        "Match": pd.Categorical(np.concatenate([matches, matches])),
+        "Stage": pd.Categorical([stage] * (2 * len(games))),
+    })
+    return facts
+
+
+def get_player_game_table(results, stage="League"):
+    """
+    Return the player-game table for a results DataFrame, building it at most once per results version.
+
+    The returned DataFrame is shared between callers and must not be modified in place.
+
+    Args:
+        results (pd.DataFrame): Results DataFrame.
+        stage (str): Stage label for these games ("League" or "Playoff").
+
+    Returns:
+        pd.DataFrame: The memoized player-game table.
+    """
+    key = (hash_results(results), stage)
+    facts = _player_game_cache.get(key)
+    if facts is None:
+        facts = build_player_game_table(results, stage=stage)
+        _player_game_cache.set(key, facts)
+    return facts
+
+
+def aggregate_player_games(facts):
+    """
+    Aggregate a player-game table into per-player totals.
+
+    Args:
+        facts (pd.DataFrame): Player-game table from get_player_game_table.
+
+    Returns:
+        pd.DataFrame: One row per player with Games, Wins, Draws, Losses, Goals_For, Goals_Against,
+        xG_For, xG_Against and Points.
+    """
+    totals = (
+        facts.assign(
+            Wins=facts["Result"].eq("W").astype(int),
+            Draws=facts["Result"].eq("D").astype(int),
+            Losses=facts["Result"].eq("L").astype(int),
+        )
+        .groupby("Player", observed=True)
+        .agg(
+            Games=("Game #", "count"),  # One row per player per game, also across tournaments
+            Wins=("Wins", "sum"),
+            Draws=("Draws", "sum"),
+            Losses=("Losses", "sum"),
+            Goals_For=("Goals For", "sum"),
+            Goals_Against=("Goals Against", "sum"),
+            xG_For=("xG For", "sum"),
+            xG_Against=("xG Against", "sum"),
+            Points=("Points", "sum"),
+        )
+    )
+    totals.index = totals.index.astype(object)
+    return totals.reset_index()
+
 
 def calculate_basic_analysis(tournament_dictionary):
     """
     Perform advanced analysis on tournament results for mobile-first analytics.
 
+    Fully vectorized: per-player figures come from the shared player-game table, so the same
+    function also works on the concatenated results of an entire league history.
+
     Args:
         tournament_dictionary (dict): A single Tournament's standings, results (league), playoff_results, & metadata
 
@@ -18,7 +153,7 @@ def calculate_basic_analysis(tournament_dictionary):
 
     # KPI Summary
     total_games = len(results_df)
-    total_goals = results_df["Home Goals"].sum() + results_df["Away Goals"].sum()
+    total_goals = results_df["Home Goals"].sum() + results_df["Away Goals"].sum() if total_games else 0
     avg_goals_per_game = total_goals / total_games if total_games else 0
 
     analysis["kpi_summary"] = {
@@ -28,54 +163,16 @@ def calculate_basic_analysis(tournament_dictionary):
     }
 
     # Overall Performance
-    overall_performance = (
-        results_df.melt(
-            id_vars=["Game #"],
-            value_vars=["Home", "Away"],
-            var_name="Role",
-            value_name="Player",
-        )
-        .merge(
-            results_df[["Game #", "Home Goals", "Away Goals", "Home xG", "Away xG"]],
-            on="Game #",
-        )
-        .assign(
-            Goals=lambda df: df.apply(
-                lambda row: row["Home Goals"] if row["Role"] == "Home" else row["Away Goals"], axis=1
-            ),
-            Opponent_Goals=lambda df: df.apply(
-                lambda row: row["Away Goals"] if row["Role"] == "Home" else row["Home Goals"], axis=1
-            ),
-            xG_For=lambda df: df.apply(
-                lambda row: row["Home xG"] if row["Role"] == "Home" else row["Away xG"], axis=1
-            ),
-            xG_Against=lambda df: df.apply(
-                lambda row: row["Away xG"] if row["Role"] == "Home" else row["Home xG"], axis=1
-            ),
-            Wins=lambda df: (df["Goals"] > df["Opponent_Goals"]).astype(int),
-            Draws=lambda df: (df["Goals"] == df["Opponent_Goals"]).astype(int),
-            Losses=lambda df: (df["Goals"] < df["Opponent_Goals"]).astype(int),
-        )
-        .groupby("Player", as_index=False)
-        .agg(
-            Games=("Game #", "nunique"),
-            Wins=("Wins", "sum"),
-            Draws=("Draws", "sum"),
-            Losses=("Losses", "sum"),
-            Goals_For=("Goals", "sum"),
-            Goals_Against=("Opponent_Goals", "sum"),
-            xG_For=("xG_For", "sum"),
-            xG_Against=("xG_Against", "sum"),
-        )
-        .assign(Points=lambda df: df["Wins"] * 3 + df["Draws"])
-    )
+    overall_performance = aggregate_player_games(get_player_game_table(results_df))
 
     analysis["overall"] = overall_performance
 
     # Win Rates
-    analysis["win_rates"] = overall_performance.assign(
-        Win_Rate=lambda df: (df["Wins"] / df["Games"]).fillna(0).round(2)
-    )["Player Win_Rate".split()]
+    wins, games = overall_performance["Wins"].to_numpy(), overall_performance["Games"].to_numpy()
+    analysis["win_rates"] = pd.DataFrame({
+        "Player": overall_performance["Player"],
+        "Win_Rate": np.divide(wins, games, out=np.zeros(len(games)), where=games > 0).round(2),
+    })
 
     # Frequent Matchups
     matchups = (
@@ -88,92 +185,392 @@ def calculate_basic_analysis(tournament_dictionary):
     return analysis
 
 def calculate_playoff_ranks(df):
-    # Assign numeric round values for ranking (lower is better)
-    round_order = {"Final": 1, "SF1": 2, "SF2": 2, "WC1": 3, "WC2": 3}
-    df['round_numeric'] = df['Round'].map(round_order)
-
-    # Calculate total goals scored for each player
-    total_goals = (
-        pd.concat([
-            df[['Home', 'Home Goals']].rename(columns={'Home': 'Player', 'Home Goals': 'Goals'}),
-            df[['Away', 'Away Goals']].rename(columns={'Away': 'Player', 'Away Goals': 'Goals'})
-        ])
-        .groupby('Player', as_index=False)['Goals']
-        .sum()
-    )
+    """
+    Rank playoff participants by how far they progressed, then by their deepest tie, then by goals.
+
+    Progression is read from the numeric "Round" of each game (later rounds are deeper in the
+    bracket), so the ranking works for any bracket shape without relying on match names.
+    The input DataFrame is not modified.
+
+    Args:
+        df (pd.DataFrame): Playoff results with "Round", "Match", "Home", "Away", goals and xG columns.
+
+    Returns:
+        pd.DataFrame: Rank, Player, Goals, xG, Goals For, Goals Against, Games Played, Round (the deepest
+        tie reached) and round_numeric (1 = deepest stage reached).
+    """
+    facts = get_player_game_table(df, stage="Playoff")
 
-    # Calculate total xG for each player
-    total_xg = (
-        pd.concat([
-            df[['Home', 'Home xG']].rename(columns={'Home': 'Player', 'Home xG': 'xG'}),
-            df[['Away', 'Away xG']].rename(columns={'Away': 'Player', 'Away xG': 'xG'})
-        ])
-        .groupby('Player', as_index=False)['xG']
-        .sum()
+    # One pass over the stacked frame: every metric per player and tie (two-legged Match)
+    ties = facts.groupby(["Player", "Match"], observed=True, as_index=False).agg(
+        Goals_For=("Goals For", "sum"),
+        Goals_Against=("Goals Against", "sum"),
+        xG_For=("xG For", "sum"),
+        xG_Against=("xG Against", "sum"),
+        Games=("Game #", "count"),
+        Last_Round=("Round", "max"),
     )
 
-    # Count games played by each player
-    games_played = (
-        pd.concat([
-            df[['Home']].rename(columns={'Home': 'Player'}),
-            df[['Away']].rename(columns={'Away': 'Player'})
-        ])
-        .groupby('Player', as_index=False)
-        .size()
-        .rename(columns={'size': 'Games Played'})
+    # The deepest tie each player reached decides progression; its aggregate breaks ties at that stage
+    deepest_tie = (
+        ties.sort_values("Last_Round", kind="stable")
+        .drop_duplicates("Player", keep="last")
+        .assign(
+            Tie_Goal_Diff=lambda t: t["Goals_For"] - t["Goals_Against"],
+            Tie_xG_Diff=lambda t: t["xG_For"] - t["xG_Against"],
+        )
+        .set_index("Player")[["Match", "Last_Round", "Tie_Goal_Diff", "Tie_xG_Diff"]]
     )
 
-    # Determine the best round each player participated in
-    best_round = (
-        pd.concat([
-            df[['Home', 'Round']].rename(columns={'Home': 'Player'}),
-            df[['Away', 'Round']].rename(columns={'Away': 'Player'})
-        ])
-        .groupby('Player', as_index=False)['Round']
-        .min()
+    totals = ties.groupby("Player", observed=True)[["Goals_For", "Goals_Against", "xG_For", "Games"]].sum()
+    ranking_data = totals.join(deepest_tie).reset_index()
+    ranking_data["Player"] = ranking_data["Player"].astype(object)
+    ranking_data["round_numeric"] = ranking_data["Last_Round"].rank(method="dense", ascending=False).astype(int)
+
+    ranking_data = ranking_data.sort_values(
+        by=["round_numeric", "Tie_Goal_Diff", "Tie_xG_Diff", "Goals_For"],
+        ascending=[True, False, False, False],
+        kind="stable",
+    ).reset_index(drop=True)
+    ranking_data["Rank"] = range(1, len(ranking_data) + 1)
+
+    ranking_data = ranking_data.rename(columns={
+        "Goals_For": "Goals For",
+        "Goals_Against": "Goals Against",
+        "xG_For": "xG",
+        "Games": "Games Played",
+        "Match": "Round",
+    })
+    ranking_data["Goals"] = ranking_data["Goals For"]
+
+    return ranking_data[['Rank', 'Player', 'Goals', 'xG', 'Goals For', 'Goals Against', 'Games Played', 'Round', 'round_numeric']]
+
+
+# --- LEAGUE CAREER AGGREGATES ---
+
+CAREER_STAT_FIELDS = [
+    "tournaments", "games", "wins", "draws", "losses",
+    "goals_for", "goals_against", "xg_for", "xg_against", "titles",
+]
+
+
+def summarize_tournament_careers(tournament):
+    """
+    Summarize one tournament into per-player career increments and league totals.
+
+    Values are native Python numbers so they can be written to Firestore directly.
+
+    Args:
+        tournament (dict): Tournament with "results" and "playoff_results" (lists of dicts or DataFrames).
+
+    Returns:
+        tuple: (players, league_totals) where players maps each player to a dict of CAREER_STAT_FIELDS
+        and league_totals has "tournaments", "games" and "goals".
+    """
+    results = pd.DataFrame(tournament.get("results", []))
+    playoff_results = pd.DataFrame(tournament.get("playoff_results", []))
+
+    facts = pd.concat(
+        [get_player_game_table(results, stage="League"), get_player_game_table(playoff_results, stage="Playoff")],
+        ignore_index=True,
     )
+    totals = aggregate_player_games(facts)
+
+    champion = None
+    if not get_player_game_table(playoff_results, stage="Playoff").empty:
+        champion = calculate_playoff_ranks(playoff_results).iloc[0]["Player"]
+
+    players = {
+        row.Player: {
+            "tournaments": 1,
+            "games": int(row.Games),
+            "wins": int(row.Wins),
+            "draws": int(row.Draws),
+            "losses": int(row.Losses),
+            "goals_for": int(row.Goals_For),
+            "goals_against": int(row.Goals_Against),
+            "xg_for": round(float(row.xG_For), 2),
+            "xg_against": round(float(row.xG_Against), 2),
+            "titles": int(row.Player == champion),
+        }
+        for row in totals.itertuples(index=False)
+    }
+    league_totals = {
+        "tournaments": 1,
+        "games": int(len(facts) // 2),
+        "goals": int(facts["Goals For"].sum()) if not facts.empty else 0,
+    }
+    return players, league_totals
+
+
+def merge_career_summaries(summaries):
+    """
+    Add up several (players, league_totals) summaries, e.g. when rebuilding aggregates from history.
+
+    Args:
+        summaries (list): Outputs of summarize_tournament_careers.
+
+    Returns:
+        tuple: (players, league_totals) with the summed values.
+    """
+    players, league_totals = {}, {"tournaments": 0, "games": 0, "goals": 0}
+    for tournament_players, tournament_totals in summaries:
+        for player, stats in tournament_players.items():
+            career = players.setdefault(player, dict.fromkeys(CAREER_STAT_FIELDS, 0))
+            for field in CAREER_STAT_FIELDS:
+                career[field] = round(career[field] + stats.get(field, 0), 2)
+        for field in league_totals:
+            league_totals[field] += tournament_totals.get(field, 0)
+    return players, league_totals
+
+
+def build_career_table(league_aggregates):
+    """
+    Turn a league aggregate document into a career table for display.
 
-    # Calculate goals for and against for each player
-    goals_for = (
-        pd.concat([
-            df[['Home', 'Home Goals']].rename(columns={'Home': 'Player', 'Home Goals': 'Goals For'}),
-            df[['Away', 'Away Goals']].rename(columns={'Away': 'Player', 'Away Goals': 'Goals For'})
-        ])
-        .groupby('Player', as_index=False)['Goals For']
-        .sum()
+    Args:
+        league_aggregates (dict): Document from firestore_get_league_aggregates.
+
+    Returns:
+        pd.DataFrame: One row per player, sorted by titles, points and goal difference.
+    """
+    players = league_aggregates.get("players", {})
+    if not players:
+        return pd.DataFrame()
+
+    careers = pd.DataFrame.from_dict(players, orient="index").reindex(columns=CAREER_STAT_FIELDS).fillna(0)
+    return (
+        careers.rename_axis("Player")
+        .reset_index()
+        .assign(
+            Points=lambda df: (df["wins"] * 3 + df["draws"]).astype(int),
+            GD=lambda df: (df["goals_for"] - df["goals_against"]).astype(int),
+        )
+        .rename(
+            columns={
+                "titles": "Titles",
+                "tournaments": "Events",
+                "games": "Games",
+                "wins": "W",
+                "draws": "D",
+                "losses": "L",
+                "goals_for": "GF",
+                "goals_against": "GA",
+                "xg_for": "xGF",
+                "xg_against": "xGA",
+            }
+        )
+        .sort_values(by=["Titles", "Points", "GD"], ascending=False)
+        .reset_index(drop=True)
+        [["Player", "Titles", "Events", "Games", "Points", "W", "D", "L", "GF", "GA", "GD", "xGF", "xGA"]]
     )
 
-    goals_against = (
-        pd.concat([
-            df[['Home', 'Away Goals']].rename(columns={'Home': 'Player', 'Away Goals': 'Goals Against'}),
-            df[['Away', 'Home Goals']].rename(columns={'Away': 'Player', 'Home Goals': 'Goals Against'})
-        ])
-        .groupby('Player', as_index=False)['Goals Against']
-        .sum()
+
+# --- STRENGTH MODEL (BRADLEY-TERRY) ---
+
+# Fitted strengths keyed by results hash, and the latest fit per player set used to warm-start the next one
+_strength_fits = LRUCache(maxsize=32)
+_strength_warm_starts = LRUCache(maxsize=32)
+
+
+def fit_bradley_terry(facts, players=None, initial=None, prior_games=1.0, max_iter=500, tol=1e-8):
+    """
+    Fit Bradley-Terry strengths with the MM (minorize-maximize) algorithm.
+
+    A win counts 1 and a draw 0.5 for each side. Every player also gets prior_games virtual games
+    (half won) against a reference player of strength 1, which anchors the scale and keeps winless
+    or unbeaten players finite.
+
+    Args:
+        facts (pd.DataFrame): Player-game table from get_player_game_table.
+        players (list): Players to rate; defaults to those in the facts. Players without games get 1.0.
+        initial (dict): Starting strengths by player (warm start); missing players start at 1.0.
+        prior_games (float): Number of virtual games against the reference player.
+        max_iter (int): Maximum MM iterations.
+        tol (float): Convergence tolerance on the largest change in log strength.
+
+    Returns:
+        tuple: (pd.Series of strengths indexed by player, number of iterations used).
+    """
+    players = list(players) if players is not None else sorted(facts["Player"].astype(str).unique())
+    index = {player: i for i, player in enumerate(players)}
+    n = len(players)
+
+    known = facts["Player"].astype(str).isin(index) & facts["Opponent"].astype(str).isin(index)
+    player_idx = facts.loc[known, "Player"].astype(str).map(index).to_numpy()
+    opponent_idx = facts.loc[known, "Opponent"].astype(str).map(index).to_numpy()
+    scores = facts.loc[known, "Result"].map({"W": 1.0, "D": 0.5, "L": 0.0}).astype(float).to_numpy()
+
+    # Games between each pair (symmetric, as every game appears once per side) and total score per player
+    games = np.zeros((n, n))
+    np.add.at(games, (player_idx, opponent_idx), 1.0)
+    wins = np.bincount(player_idx, weights=scores, minlength=n) + prior_games / 2
+
+    strength = np.array([(initial or {}).get(player, 1.0) for player in players], dtype=float)
+    for iteration in range(1, max_iter + 1):
+        denominator = (games / (strength[:, None] + strength[None, :])).sum(axis=1) + prior_games / (strength + 1.0)
+        updated = wins / denominator
+        change = np.max(np.abs(np.log(updated) - np.log(strength))) if n else 0.0
+        strength = updated
+        if change < tol:
+            break
+
+    return pd.Series(strength, index=players, name="Strength"), iteration if n else 0
+
+
+def calculate_strength_rankings(results, players=None):
+    """
+    Rank players by strength-adjusted Bradley-Terry ratings, accounting for strength of schedule.
+
+    Fits are cached per results version, and each new fit warm-starts from the previous fit for the
+    same players, so recording one more result converges in a few iterations.
+
+    Args:
+        results (pd.DataFrame): Results with "Home", "Away", "Home Goals" and "Away Goals".
+        players (list): Players to include (defaults to everyone in the results).
+
+    Returns:
+        pd.DataFrame: Rank, Player, Win % vs Avg (expected score against a strength-1 player),
+        SoS (mean Win % vs Avg of opponents faced) and Games, best first.
+    """
+    facts = get_player_game_table(results)
+    if facts.empty:
+        return pd.DataFrame(columns=["Rank", "Player", "Win % vs Avg", "SoS", "Games"])
+
+    player_key = tuple(sorted(players)) if players is not None else tuple(sorted(facts["Player"].astype(str).unique()))
+    fit_key = (hash_results(results), player_key)
+    strength = _strength_fits.get(fit_key)
+    if strength is None:
+        strength, _ = fit_bradley_terry(facts, players=player_key, initial=_strength_warm_starts.get(player_key))
+        _strength_fits.set(fit_key, strength)
+        _strength_warm_starts.set(player_key, strength.to_dict())
+
+    win_vs_average = 100 * strength / (strength + 1.0)
+    schedule = (
+        facts.assign(Opponent_Strength=facts["Opponent"].astype(str).map(win_vs_average))
+        .groupby("Player", observed=True)
+        .agg(SoS=("Opponent_Strength", "mean"), Games=("Game #", "count"))
     )
+    schedule.index = schedule.index.astype(str)
 
-    # Merge all metrics into a single DataFrame
-    ranking_data = total_goals.merge(total_xg, on='Player')
-    ranking_data = ranking_data.merge(games_played, on='Player')
-    ranking_data = ranking_data.merge(best_round, on='Player')
-    ranking_data = ranking_data.merge(goals_for, on='Player')
-    ranking_data = ranking_data.merge(goals_against, on='Player')
-    
-    # Add round progression information
-    ranking_data = ranking_data.merge(
-        pd.concat([
-            df[['Home', 'round_numeric']].rename(columns={'Home': 'Player'}),
-            df[['Away', 'round_numeric']].rename(columns={'Away': 'Player'})
-        ])
-        .groupby('Player', as_index=False)['round_numeric']
-        .min(),
-        on='Player'
+    rankings = (
+        pd.DataFrame({"Player": list(player_key), "Win % vs Avg": win_vs_average.to_numpy()})
+        .join(schedule, on="Player")
+        .fillna({"Games": 0})
+        .sort_values("Win % vs Avg", ascending=False)
+        .reset_index(drop=True)
     )
+    rankings["Rank"] = range(1, len(rankings) + 1)
+    rankings["Games"] = rankings["Games"].astype(int)
+    return rankings[["Rank", "Player", "Win % vs Avg", "SoS", "Games"]].round({"Win % vs Avg": 1, "SoS": 1})
 
-    # Sort players by round_numeric (progression) and total goals (descending)
-    ranking_data.sort_values(by=['round_numeric', 'Goals'], ascending=[True, False], inplace=True)
 
-    # Assign ranks
-    ranking_data['Rank'] = range(1, len(ranking_data) + 1)
+# --- EXPECTED POINTS (xPts) ---
 
-    return ranking_data[['Rank', 'Player', 'Goals', 'xG', 'Goals For', 'Goals Against', 'Games Played', 'Round', 'round_numeric']]
+# Goal grid truncation; P(more than 10 goals) is negligible for realistic xG and the grid is renormalized
+MAX_GOALS = 10
+
+
+def poisson_outcome_probabilities(xg_for, xg_against, max_goals=MAX_GOALS):
+    """
+    Exact win/draw/loss probabilities implied by independent Poisson scorelines, for many games at once.
+
+    Args:
+        xg_for (array-like): Expected goals of the side of interest, one per game.
+        xg_against (array-like): Expected goals of the opponent, one per game.
+        max_goals (int): Largest goal count on the scoreline grid.
+
+    Returns:
+        tuple: (win, draw, loss) probability arrays.
+    """
+    goals = np.arange(max_goals + 1)
+    factorials = np.cumprod(np.concatenate([[1.0], goals[1:].astype(float)]))
+
+    def goal_pmf(xg):
+        xg = np.clip(np.nan_to_num(np.asarray(xg, dtype=float)), 0.0, None)[:, None]
+        pmf = xg ** goals / factorials * np.exp(-xg)
+        return pmf / pmf.sum(axis=1, keepdims=True)
+
+    # Sum the scoreline grid without materializing it: P(win) = sum_i P(for = i) * P(against < i)
+    pmf_for, pmf_against = goal_pmf(xg_for), goal_pmf(xg_against)
+    against_below = np.cumsum(pmf_against, axis=1) - pmf_against
+    win = (pmf_for * against_below).sum(axis=1)
+    draw = (pmf_for * pmf_against).sum(axis=1)
+    return win, draw, 1.0 - win - draw
+
+
+def calculate_expected_points(results):
+    """
+    Add expected points to every completed game of a results DataFrame.
+
+    Args:
+        results (pd.DataFrame): Results with "Home xG" and "Away xG".
+
+    Returns:
+        pd.DataFrame: The completed games with P(Home), P(Draw), P(Away), Home xPts and Away xPts.
+    """
+    games = results.dropna(subset=["Home Goals", "Away Goals"]).copy()
+    home_win, draw, away_win = poisson_outcome_probabilities(games["Home xG"], games["Away xG"])
+    games["P(Home)"], games["P(Draw)"], games["P(Away)"] = home_win, draw, away_win
+    games["Home xPts"] = 3 * home_win + draw
+    games["Away xPts"] = 3 * away_win + draw
+    return games
+
+
+def calculate_xpts_table(results):
+    """
+    Build the points-versus-expected-points ("luck") table for a set of results.
+
+    Works on a single tournament or on the concatenated results of a whole league history.
+
+    Args:
+        results (pd.DataFrame): Results with "Home", "Away", goals and xG columns.
+
+    Returns:
+        pd.DataFrame: Player, Games, Points, xPts, Luck (Points - xPts), Finishing (goals minus xG)
+        and Goalkeeping (xG against minus goals against), sorted by Luck.
+    """
+    return calculate_xpts_table_from_facts(get_player_game_table(results))
+
+
+def calculate_xpts_table_from_facts(facts):
+    """
+    Build the luck table from a player-game table (e.g. one read from the warehouse).
+
+    Args:
+        facts (pd.DataFrame): Player-game rows with goals, xG and points.
+
+    Returns:
+        pd.DataFrame: See calculate_xpts_table.
+    """
+    columns = ["Player", "Games", "Points", "xPts", "Luck", "Finishing", "Goalkeeping"]
+    if facts.empty:
+        return pd.DataFrame(columns=columns)
+
+    win, draw, _ = poisson_outcome_probabilities(facts["xG For"], facts["xG Against"])
+    table = (
+        facts.assign(xPts=3 * win + draw)
+        .groupby("Player", observed=True)
+        .agg(
+            Games=("Game #", "count"),
+            Points=("Points", "sum"),
+            xPts=("xPts", "sum"),
+            Goals_For=("Goals For", "sum"),
+            Goals_Against=("Goals Against", "sum"),
+            xG_For=("xG For", "sum"),
+            xG_Against=("xG Against", "sum"),
+        )
+        .assign(
+            Luck=lambda df: df["Points"] - df["xPts"],
+            Finishing=lambda df: df["Goals_For"] - df["xG_For"],
+            Goalkeeping=lambda df: df["xG_Against"] - df["Goals_Against"],
+        )
+    )
+    table.index = table.index.astype(object)
+    return (
+        table.reset_index()[columns]
+        .astype({"Points": int})
+        .sort_values("Luck", ascending=False)
+        .round(2)
+        .reset_index(drop=True)
+    )
@@ -1,16 +1,21 @@
 import os
 from datetime import datetime
 import firebase_admin
-from firebase_admin import credentials, firestore, auth
+from firebase_admin import credentials, auth
 from dotenv import load_dotenv
 import re
 import requests
 import random
 from utils.general_utils import generate_unique_id 
+from utils.repositories import get_repositories, AlreadyExistsError
+from utils.cache_utils import invalidate_league, invalidate_users
 
 # Load environment variables
 load_dotenv()
 
+# Random league IDs drawn before giving up (each costs one create-only write; collisions are rare)
+LEAGUE_ID_ATTEMPTS = 10
+
 google_credentials_path = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
 project_id = os.getenv("FIRESTORE_PROJECT_ID")
 
@@ -19,8 +24,7 @@ if not firebase_admin._apps:
     cred = credentials.Certificate(google_credentials_path)
     firebase_admin.initialize_app(cred, {"projectId": project_id})
 
-# Firestore client
-db = firestore.client()
+# User, league and tournament documents are read and written through the repositories
 
 def create_user_metadata(email, password, username, role="user", league_id=None):
     """
@@ -44,7 +48,8 @@ def create_user_metadata(email, password, username, role="user", league_id=None)
         user_record = auth.create_user(email=email, password=password, display_name=username)
 
         # Check for duplicate UID in Firestore
-        if db.collection("users").document(user_record.uid).get().exists:
+        users = get_repositories().users
+        if users.get(user_record.uid) is not None:
             print(f"Duplicate UID detected for {user_record.uid}. Rolling back user creation.")
             auth.delete_user(user_record.uid)  # Rollback user creation in Firebase Auth
             return False
@@ -56,9 +61,9 @@ def create_user_metadata(email, password, username, role="user", league_id=None)
             "email": email,
             "role": role,
             "league_id": league_id,
-            "created_at": firestore.SERVER_TIMESTAMP,
         }
-        db.collection("users").document(user_record.uid).set(user_doc)
+        users.create(user_record.uid, user_doc)  # Stamps the creation time
+        invalidate_users([user_record.uid])
 
         print(f"User {username} created successfully.")
         return True
@@ -89,21 +94,26 @@ def create_league_metadata(league_name, league_type="private", created_by=None):
         if league_type.lower() not in ["private", "public"]:
             raise ValueError("Invalid league_type. Allowed values are 'private' or 'public'.")
 
-        # Generate a unique league ID
-        existing_league_ids = {doc.id for doc in db.collection("leagues").stream()}  # Use set for efficiency
-        league_id = generate_unique_id(existing_league_ids, id_length=9, id_type="numeric")
-
-        # League metadata
-        league_doc = {
-            "league_id": league_id,
-            "league_name": league_name.strip(),
-            "league_type": league_type.lower(),
-            "created_by": created_by,  # UID of the user who created the league
-            "created_at": firestore.SERVER_TIMESTAMP,
-        }
+        leagues = get_repositories().leagues
+
+        def claim_league_id(candidate):
+            # Store league metadata under the candidate ID (the repository stamps the creation time);
+            # the write is create-only, so a taken ID is rejected and another candidate is drawn
+            league_doc = {
+                "league_id": candidate,
+                "league_name": league_name.strip(),
+                "league_type": league_type.lower(),
+                "created_by": created_by,  # UID of the user who created the league
+            }
+            try:
+                leagues.add(league_doc, league_id=candidate)
+                return True
+            except AlreadyExistsError:
+                return False
 
-        # Store league metadata in Firestore
-        db.collection("leagues").document(league_id).set(league_doc)
+        # Generate a unique league ID without scanning the leagues collection
+        league_id = generate_unique_id(id_length=9, id_type="numeric", verify=claim_league_id, max_attempts=LEAGUE_ID_ATTEMPTS)
+        invalidate_league(league_id)
 
         print(f"League '{league_name}' created successfully with ID: {league_id}")
         return {
@@ -133,13 +143,13 @@ def is_username_or_email_taken(username, email):
     """
     try:
         # Check for existing username
-        username_ref = db.collection("users").document(username).get()
-        if username_ref.exists:
+        users = get_repositories().users
+        if users.get(username) is not None:
             return True, "Username already exists."
 
         # Check for existing email
-        email_query = db.collection("users").where("email", "==", email).stream()
-        if any(email_query):
+        existing_user_id, _ = users.find_by_email(email)
+        if existing_user_id is not None:
             return True, "Email already exists."
 
         return False, None
@@ -189,7 +199,8 @@ def register_user(email, password, username, role="user", league_id=None):
             "league_id": league_id if league_id else [],  # Initialize with empty list if None
             "created_at": datetime.now(),
         }
-        db.collection("users").document(user.uid).set(user_metadata)
+        get_repositories().users.create(user.uid, user_metadata)
+        invalidate_users([user.uid])
 
         return True, "User registered successfully."
     except Exception as e:
@@ -220,12 +231,11 @@ def authenticate_user(identifier, password=None):
             uid = firebase_user.uid
         else:
             # Authenticate by username
-            user_ref = db.collection("users").where("username", "==", identifier).limit(1).get()
-            if not user_ref:
+            uid, user_data = get_repositories().users.find_by_username(identifier)
+            if uid is None:
                 print("Username not found in Firestore.")
                 return None
-            user_data = user_ref[0].to_dict()
-            uid = user_ref[0].id  # Firestore document ID corresponds to UID
+            # The user document ID corresponds to the UID
             identifier = user_data.get("email")  # Retrieve the associated email for Firebase Authentication
 
             # Fetch Firebase user by email
@@ -248,7 +258,7 @@ def authenticate_user(identifier, password=None):
                 return None
 
         # Fetch user metadata from Firestore
-        user_metadata = db.collection("users").document(uid).get().to_dict()
+        user_metadata = get_repositories().users.get(uid)
         if not user_metadata:
             print("User metadata not found in Firestore.")
             return None
@@ -270,9 +280,9 @@ def get_user_metadata(username):
     Retrieve user metadata from Firestore.
     """
     try:
-        user_ref = db.collection("users").document(username).get()
-        if user_ref.exists():
-            return user_ref.to_dict()
+        user_metadata = get_repositories().users.get(username)
+        if user_metadata is not None:
+            return user_metadata
         else:
             print(f"No metadata found for user '{username}'.")
             return None
@@ -295,9 +305,11 @@ def get_tournaments_for_admin(username):
             print("User does not have admin privileges.")
             return None
 
-        league_id = user_metadata.get("league_id")
-        tournaments = db.collection("tournaments").where("league_id", "==", league_id).stream()
-        return [tournament.to_dict() for tournament in tournaments]
+        league_ids = user_metadata.get("league_id") or []
+        if not isinstance(league_ids, list):
+            league_ids = [league_ids]
+        tournaments = get_repositories().tournaments
+        return [tournament for league_id in league_ids for tournament in tournaments.list_by_league(league_id)]
     except Exception as e:
         print(f"Error retrieving tournaments: {e}")
         return None
@@ -317,8 +329,7 @@ def get_leagues_for_admin(username):
             print("User does not have admin privileges.")
             return None
 
-        leagues = db.collection("leagues").stream()
-        return [league.to_dict() for league in leagues]
+        return list(get_repositories().leagues.get_all().values())
     except Exception as e:
         print(f"Error retrieving leagues: {e}")
         return None
@@ -0,0 +1,753 @@
+import os
+import copy
+import time
+import pickle
+import hashlib
+import json
+import sqlite3
+import threading
+from types import MappingProxyType
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Thread-safe, size-bounded mapping with least-recently-used eviction and hit/miss counters.
+
+    Module-level instances are shared by every Streamlit session in the process.
+    """
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.RLock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            return self._data.pop(key, default)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def keys(self):
+        with self._lock:
+            return list(self._data.keys())
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def stats(self):
+        """
+        Return cache counters.
+
+        Returns:
+            dict: hits, misses, size and maxsize.
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._data), "maxsize": self.maxsize}
+
+
+class ReadThroughCache:
+    """
+    Read-through cache for storage lookups, with per-key TTL, LRU eviction and explicit invalidation.
+
+    Writers call invalidate() for every key they touch, so entries can live much longer than a
+    blind TTL would allow. A load that overlaps an invalidation is returned but not stored, so a
+    slow read can never put pre-write data back into the cache. Values are deep-copied in and out,
+    so callers may mutate what they get back.
+    """
+
+    def __init__(self, maxsize=1024, ttl=3600):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries = LRUCache(maxsize=maxsize)
+        self._generation = 0
+        self._lock = threading.RLock()
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self.hits += 1
+                return True, copy.deepcopy(entry[1])
+            if entry is not None:
+                self._entries.pop(key)
+            self.misses += 1
+            return False, None
+
+    def _store(self, key, value, generation):
+        with self._lock:
+            if generation == self._generation:
+                self._entries.set(key, (time.monotonic() + self.ttl, copy.deepcopy(value)))
+
+    def get_or_load(self, key, loader):
+        """
+        Return the cached value for a key, calling loader() and caching its result on a miss.
+
+        Args:
+            key (hashable): Cache key, e.g. ("league", league_id).
+            loader (callable): Zero-argument function reading the value from storage.
+
+        Returns:
+            A copy of the cached or freshly loaded value.
+        """
+        found, value = self._lookup(key)
+        if found:
+            return value
+        generation = self._generation
+        value = loader()
+        self._store(key, value, generation)
+        return value
+
+    def get_many_or_load(self, keys, loader):
+        """
+        Per-key variant of get_or_load: only the missing keys are passed to the (batch) loader.
+
+        Args:
+            keys (list): Cache keys.
+            loader (callable): Takes the list of missing keys and returns {key: value}.
+
+        Returns:
+            dict: key -> value for every requested key the loader returned.
+        """
+        values, missing = {}, []
+        for key in keys:
+            found, value = self._lookup(key)
+            if found:
+                values[key] = value
+            else:
+                missing.append(key)
+        if missing:
+            generation = self._generation
+            loaded = loader(missing)
+            for key, value in loaded.items():
+                self._store(key, value, generation)
+            values.update(loaded)
+        return values
+
+    def put(self, key, value):
+        """
+        Store a value read elsewhere (e.g. per-key entries from a full listing).
+        """
+        self._store(key, value, self._generation)
+
+    def invalidate(self, *keys):
+        """
+        Drop entries after a write; in-flight loads started before this call are not cached.
+        """
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+            for key in keys:
+                self._entries.pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Return cache counters.
+
+        Returns:
+            dict: hits, misses, invalidations, size, maxsize and ttl.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "size": len(self._entries),
+                "maxsize": self._entries.maxsize,
+                "ttl": self.ttl,
+            }
+
+
+class SharedDirectory:
+    """
+    Process-wide, read-only snapshot of a whole collection (e.g. all users), shared by every session.
+
+    get() returns the same snapshot object to every caller until it is replaced, so sessions hold
+    references instead of copies. Snapshots are never mutated in place: a change builds a new mapping
+    and swaps the reference.
+
+    With a watcher (a change listener such as Firestore's on_snapshot) the snapshot is an in-memory
+    mirror: the listener's first delivery fills it and every later delivery applies only the changed
+    documents, so reads scale with the volume of changes. After a local write (mark_stale(doc_ids)) the
+    next get() reads just those documents back with load_documents and applies them, so it never waits
+    on a delivery that a no-op write would not produce. If the listener dies, the directory falls back
+    to polling.
+
+    Without one (or if the backend cannot push changes), a daemon thread reloads the snapshot every
+    refresh_interval seconds (picking up writes from other processes) and mark_stale() makes the next
+    get() reload synchronously, so an admin sees their own write on the following rerun.
+    """
+
+    def __init__(self, name, loader, refresh_interval=60, watcher=None, write_wait=2.0, load_documents=None):
+        self.name = name
+        self.loader = loader
+        self.load_documents = load_documents
+        self.refresh_interval = refresh_interval
+        self.watcher = watcher
+        self._initial_watcher = watcher
+        self.write_wait = write_wait
+        self.loads = 0
+        self.deltas = 0
+        self.loaded_at = None
+        self._snapshot = None
+        self._stale = True
+        self._lock = threading.Lock()
+        self._thread = None
+        self._watch = None
+        self._written = set()  # Documents written locally since the last get()
+        self._delivered = threading.Event()
+
+    def _reload(self):
+        # Clear the flag first: a write landing during the load marks the new snapshot stale again
+        self._stale = False
+        try:
+            snapshot = MappingProxyType(dict(self.loader()))
+        except Exception:
+            self._stale = True
+            raise
+        self._snapshot = snapshot
+        self.loads += 1
+        self.loaded_at = time.time()
+        return snapshot
+
+    def _apply_changes(self, changes):
+        # Listener callback (runs on the listener's thread): copy-on-write, then swap the reference
+        with self._lock:
+            documents = dict(self._snapshot or {})
+            for doc_id, data in changes.items():
+                if data is None:
+                    documents.pop(doc_id, None)
+                else:
+                    documents[doc_id] = data
+            self._snapshot = MappingProxyType(documents)
+            self._stale = False
+            self.deltas += 1
+            self.loaded_at = time.time()
+        self._delivered.set()
+
+    def _start_watch(self):
+        # Called with the lock held; returns True once the mirror is live
+        if self._watch is not None:
+            return True
+        if self.watcher is None:
+            return False
+        try:
+            self._watch = self.watcher(self._apply_changes)
+        except Exception as e:
+            print(f"Error watching {self.name} directory, falling back to polling: {e}")
+            self._watch = None
+        if self._watch is None:
+            self.watcher = None  # The backend cannot push changes
+        return self._watch is not None
+
+    def _refresh_forever(self):
+        while True:
+            time.sleep(self.refresh_interval)
+            try:
+                with self._lock:
+                    self._reload()
+            except Exception as e:
+                print(f"Error refreshing {self.name} directory: {e}")
+
+    def _start_refresher(self):
+        if self._thread is None and self.refresh_interval:
+            self._thread = threading.Thread(
+                target=self._refresh_forever, name=f"{self.name}-directory-refresher", daemon=True
+            )
+            self._thread.start()
+
+    def _watch_alive(self):
+        # Firestore's Watch stops (is_active turns False) after an unrecoverable stream error
+        return self._watch is not None and getattr(self._watch, "is_active", True)
+
+    def _fall_back_to_polling(self):
+        with self._lock:
+            if self._watch is None:
+                return
+            print(f"The {self.name} directory listener stopped; falling back to polling.")
+            try:
+                self._watch.unsubscribe()
+            except Exception:
+                pass
+            self._watch = None
+            self.watcher = None
+            self._stale = True
+
+    def get(self):
+        """
+        Return the current snapshot, loading it on first use (or, when polling, after a local write).
+
+        Returns:
+            MappingProxyType: Read-only mapping of document ID -> document. Treat documents as read-only.
+        """
+        if self._watch is not None and not self._watch_alive():
+            self._fall_back_to_polling()
+
+        if self._watch is not None:
+            if self._stale:
+                written, self._written = self._written, set()
+                self._stale = False
+                if written and self.load_documents is not None:
+                    # Read the written documents back instead of waiting for the listener to deliver them
+                    try:
+                        self._apply_changes(self.load_documents(sorted(written)))
+                    except Exception as e:
+                        print(f"Error reading back written {self.name}: {e}")
+                elif written:
+                    self._delivered.wait(self.write_wait)
+            return self._snapshot
+
+        snapshot = self._snapshot
+        if snapshot is not None and not self._stale:
+            return snapshot
+        with self._lock:
+            watching = self._start_watch()
+        if watching:
+            # The first delivery carries the whole collection
+            self._delivered.wait(self.write_wait * 5)
+            if self._snapshot is not None:
+                self._stale = False
+                return self._snapshot
+        with self._lock:
+            if not watching:
+                self._start_refresher()
+            if self._snapshot is None or self._stale:
+                return self._reload()
+            return self._snapshot
+
+    def mark_stale(self, doc_ids=()):
+        """
+        Invalidation hook, called after a committed write: the next get() reloads the collection or, when
+        mirrored, reads the written documents back.
+
+        Args:
+            doc_ids (iterable): The documents that were written.
+        """
+        self._delivered.clear()
+        self._written.update(doc_ids)
+        self._stale = True
+
+    def reset(self):
+        """
+        Drop the snapshot and stop listening (e.g. after switching storage backends); the next get() starts over.
+        """
+        with self._lock:
+            if self._watch is not None:
+                try:
+                    self._watch.unsubscribe()
+                except Exception as e:
+                    print(f"Error unsubscribing from {self.name} changes: {e}")
+            self._watch = None
+            self.watcher = self._initial_watcher
+            self._snapshot = None
+            self._written = set()
+            self._delivered.clear()
+            self._stale = True
+
+    def stats(self):
+        """
+        Return directory counters.
+
+        Returns:
+            dict: loads, deltas, size, loaded_at, stale, watching and refresh_interval.
+        """
+        snapshot = self._snapshot
+        return {
+            "loads": self.loads,
+            "deltas": self.deltas,
+            "size": len(snapshot) if snapshot is not None else 0,
+            "loaded_at": self.loaded_at,
+            "stale": self._stale,
+            "watching": self._watch is not None,
+            "refresh_interval": self.refresh_interval,
+        }
+
+
+def content_hash(payload):
+    """
+    Compute a stable hash of a JSON-like payload (e.g. a tournament document).
+
+    Args:
+        payload: Any JSON-serializable object; other values are converted with str().
+
+    Returns:
+        str: A hex digest.
+    """
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode()
+    return hashlib.sha1(encoded).hexdigest()
+
+
+class AnalysisCache:
+    """
+    Process-wide cache of per-tournament analysis results.
+
+    Entries are keyed by tournament ID and hold a single version (the document's update time, or a
+    content hash when no update time is known). A lookup with a different version recomputes and
+    replaces the entry, so saved tournaments are only re-analysed when their document changes.
+    An optional on-disk tier (one pickle per tournament) survives process restarts.
+    """
+
+    def __init__(self, maxsize=64, cache_dir=None):
+        self.memory = LRUCache(maxsize=maxsize)
+        self.cache_dir = cache_dir
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _disk_path(self, tournament_id):
+        safe_id = hashlib.sha1(str(tournament_id).encode()).hexdigest()
+        return os.path.join(self.cache_dir, f"analysis_{safe_id}.pkl")
+
+    def _read_disk(self, tournament_id, version):
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._disk_path(tournament_id), "rb") as f:
+                cached_version, value = pickle.load(f)
+            return value if cached_version == version else None
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+            return None
+
+    def _write_disk(self, tournament_id, version, value):
+        if not self.cache_dir:
+            return
+        try:
+            tmp_path = f"{self._disk_path(tournament_id)}.tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump((version, value), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._disk_path(tournament_id))
+        except OSError as e:
+            print(f"Error writing analysis cache for {tournament_id}: {e}")
+
+    def get_or_compute(self, tournament_id, version, compute):
+        """
+        Return the cached analysis for a tournament version, computing and storing it on a miss.
+
+        Args:
+            tournament_id (str): The tournament ID.
+            version (str): The document version (update time or content hash).
+            compute (callable): Zero-argument function producing the analysis.
+
+        Returns:
+            The cached or freshly computed analysis.
+        """
+        cached = self.memory.get(tournament_id)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        value = self._read_disk(tournament_id, version)
+        if value is None:
+            value = compute()
+            self._write_disk(tournament_id, version, value)
+
+        self.memory.set(tournament_id, (version, value))
+        return value
+
+    def invalidate(self, tournament_id):
+        """
+        Drop a tournament from both cache tiers.
+
+        Args:
+            tournament_id (str): The tournament ID.
+        """
+        self.memory.pop(tournament_id)
+        if self.cache_dir:
+            try:
+                os.remove(self._disk_path(tournament_id))
+            except OSError:
+                pass
+
+
+class TournamentDiskCache:
+    """
+    Persistent local cache of saved tournament payloads in a single SQLite file, shared by every
+    session and process on the server, so cold starts read completed tournaments from disk.
+
+    Entries are keyed by tournament ID and hold one version (the document's update time): a lookup
+    with another update time misses, so a re-saved tournament is fetched again. Payloads are pickled;
+    the file is capped at max_bytes of payload and evicts the least recently read tournaments first.
+    An empty path disables the cache (every lookup misses, nothing is stored).
+    """
+
+    def __init__(self, path, max_bytes=256 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._connection = None
+
+    def _connect(self):
+        # Called with the lock held
+        if self._connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._connection = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS tournaments ("
+                "tournament_id TEXT PRIMARY KEY, update_time TEXT, payload BLOB, size INTEGER, last_read REAL)"
+            )
+            self._connection.execute("CREATE INDEX IF NOT EXISTS tournaments_last_read ON tournaments (last_read)")
+        return self._connection
+
+    def get(self, tournament_id, update_time):
+        """
+        Return a cached tournament if it is stored for exactly this update time.
+
+        Args:
+            tournament_id (str): The tournament ID.
+            update_time (str): The document's update time (from a listing).
+
+        Returns:
+            dict: The cached tournament, or None on a miss.
+        """
+        if not update_time or not self.path:
+            return None
+        try:
+            with self._lock:
+                connection = self._connect()
+                row = connection.execute(
+                    "SELECT payload FROM tournaments WHERE tournament_id = ? AND update_time = ?",
+                    (tournament_id, update_time),
+                ).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                connection.execute("UPDATE tournaments SET last_read = ? WHERE tournament_id = ?", (time.time(), tournament_id))
+                connection.commit()
+                self.hits += 1
+            return pickle.loads(row[0])
+        except (sqlite3.Error, pickle.UnpicklingError, EOFError, ValueError) as e:
+            print(f"Error reading tournament cache for {tournament_id}: {e}")
+            return None
+
+    def put(self, tournament_id, update_time, tournament):
+        """
+        Store a tournament version, evicting the least recently read entries beyond the size cap.
+
+        Args:
+            tournament_id (str): The tournament ID.
+            update_time (str): The document's update time; tournaments without one are not cached.
+            tournament (dict): The tournament payload.
+        """
+        if not update_time or not self.path:
+            return
+        try:
+            payload = pickle.dumps(tournament, protocol=pickle.HIGHEST_PROTOCOL)
+            with self._lock:
+                connection = self._connect()
+                connection.execute(
+                    "INSERT OR REPLACE INTO tournaments VALUES (?, ?, ?, ?, ?)",
+                    (tournament_id, update_time, payload, len(payload), time.time()),
+                )
+                total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM tournaments").fetchone()[0]
+                for evicted_id, size in connection.execute(
+                    "SELECT tournament_id, size FROM tournaments WHERE tournament_id != ? ORDER BY last_read",
+                    (tournament_id,),
+                ).fetchall():
+                    if total <= self.max_bytes:
+                        break
+                    connection.execute("DELETE FROM tournaments WHERE tournament_id = ?", (evicted_id,))
+                    total -= size
+                    self.evictions += 1
+                connection.commit()
+        except (sqlite3.Error, pickle.PicklingError, TypeError) as e:
+            print(f"Error writing tournament cache for {tournament_id}: {e}")
+
+    def invalidate(self, tournament_id):
+        """
+        Drop a tournament from the cache.
+
+        Args:
+            tournament_id (str): The tournament ID.
+        """
+        if not self.path:
+            return
+        try:
+            with self._lock:
+                connection = self._connect()
+                connection.execute("DELETE FROM tournaments WHERE tournament_id = ?", (tournament_id,))
+                connection.commit()
+        except sqlite3.Error as e:
+            print(f"Error invalidating tournament cache for {tournament_id}: {e}")
+
+    def stats(self):
+        """
+        Return cache counters.
+
+        Returns:
+            dict: hits, misses, evictions, entries, bytes and max_bytes.
+        """
+        entries, size = 0, 0
+        if self.path:
+            with self._lock:
+                entries, size = self._connect().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM tournaments").fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+        }
+
+
+# Shared by all sessions in this process
+analysis_cache = AnalysisCache(
+    maxsize=int(os.getenv("TOURNALYTICS_ANALYSIS_CACHE_SIZE", "64")),
+    cache_dir=os.getenv("TOURNALYTICS_CACHE_DIR"),
+)
+
+
+# League and user lookups, shared by all sessions; invalidated by every league/user writer
+directory_cache = ReadThroughCache(
+    maxsize=int(os.getenv("TOURNALYTICS_DIRECTORY_CACHE_SIZE", "1024")),
+    ttl=int(os.getenv("TOURNALYTICS_DIRECTORY_TTL", "3600")),
+)
+
+
+
+def _load_all_users():
+    from utils.repositories import get_repositories
+
+    return get_repositories().users.get_all()
+
+
+def _load_all_leagues():
+    from utils.repositories import get_repositories
+
+    return get_repositories().leagues.get_all()
+
+
+def _load_users(user_ids):
+    from utils.repositories import get_repositories
+
+    users = get_repositories().users
+    return {user_id: users.get(user_id) for user_id in user_ids}
+
+
+def _load_leagues(league_ids):
+    from utils.repositories import get_repositories
+
+    return get_repositories().leagues.get_many(list(league_ids))
+
+
+def _watcher(kind, repository):
+    # Change listener feeding a directory; changed documents also leave the per-document cache
+    def watch(on_changes):
+        from utils.repositories import get_repositories
+
+        def apply(changes):
+            directory_cache.invalidate(*[(kind, doc_id) for doc_id in changes])
+            on_changes(changes)
+
+        return getattr(get_repositories(), repository).watch_all(apply)
+
+    return watch
+
+
+# Full user and league listings, one snapshot per process. Mirrored through change listeners where the
+# backend supports them (Firestore); otherwise reloaded every refresh interval (seconds, 0 disables the thread)
+DIRECTORY_REFRESH_INTERVAL = int(os.getenv("TOURNALYTICS_DIRECTORY_REFRESH", "60"))
+DIRECTORY_WATCH = os.getenv("TOURNALYTICS_DIRECTORY_WATCH", "1") != "0"
+user_directory = SharedDirectory(
+    "users", _load_all_users, refresh_interval=DIRECTORY_REFRESH_INTERVAL,
+    watcher=_watcher("user", "users") if DIRECTORY_WATCH else None, load_documents=_load_users,
+)
+league_directory = SharedDirectory(
+    "leagues", _load_all_leagues, refresh_interval=DIRECTORY_REFRESH_INTERVAL,
+    watcher=_watcher("league", "leagues") if DIRECTORY_WATCH else None, load_documents=_load_leagues,
+)
+
+
+def invalidate_league(league_id):
+    """
+    Invalidation hook for league writers: drops the league's entry and marks the league directory stale.
+
+    Args:
+        league_id (str): The league that was written.
+    """
+    directory_cache.invalidate(("league", league_id))
+    league_directory.mark_stale([league_id])
+
+
+def invalidate_users(user_ids):
+    """
+    Invalidation hook for user writers: drops the users' entries and marks the user directory stale.
+
+    Args:
+        user_ids (iterable): The users that were written.
+    """
+    directory_cache.invalidate(*[("user", user_id) for user_id in user_ids])
+    user_directory.mark_stale(user_ids)
+
+
+# Saved tournaments: per-league metadata listings and lazily loaded full documents, invalidated on save
+tournament_cache = ReadThroughCache(
+    maxsize=int(os.getenv("TOURNALYTICS_TOURNAMENT_CACHE_SIZE", "64")),
+    ttl=int(os.getenv("TOURNALYTICS_TOURNAMENT_TTL", "3600")),
+)
+
+
+# Completed tournaments on local disk, shared by every process on the server ("" disables it)
+TOURNAMENT_DISK_CACHE_PATH = os.getenv("TOURNALYTICS_TOURNAMENT_CACHE_PATH", "tournament_cache.sqlite")
+tournament_disk_cache = TournamentDiskCache(
+    TOURNAMENT_DISK_CACHE_PATH,
+    max_bytes=int(os.getenv("TOURNALYTICS_TOURNAMENT_CACHE_MB", "256")) * 1024 * 1024,
+)
+
+
+def invalidate_tournament(tournament_id, league_id=None):
+    """
+    Invalidation hook for tournament writers: drops the tournament (in memory and on disk) and its league's listing.
+
+    Args:
+        tournament_id (str): The tournament that was written.
+        league_id (str): Its league, if any.
+    """
+    tournament_cache.invalidate(("tournament", tournament_id), ("listing", league_id))
+    tournament_disk_cache.invalidate(tournament_id)
+
+
+def reset_storage_caches():
+    """
+    Drop every cached league, user and tournament (e.g. after switching storage backends).
+    """
+    directory_cache.clear()
+    tournament_cache.clear()
+    user_directory.reset()
+    league_directory.reset()
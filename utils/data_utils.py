@@ -1,58 +1,73 @@
 ## Libraries
+import copy
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, date
+import numpy as np
 import pandas as pd
 import sqlalchemy
 import streamlit as st
-import firebase_admin
-from firebase_admin import firestore
+from utils.cache_utils import (
+    directory_cache,
+    user_directory,
+    league_directory,
+    tournament_cache,
+    tournament_disk_cache,
+    invalidate_league,
+    invalidate_users,
+    invalidate_tournament,
+)
+from utils.analytics_utils import summarize_tournament_careers, merge_career_summaries
+from utils.rating_utils import apply_tournament, replay_ratings
+from utils.repositories import get_repositories, live_game_id, player_document_id
+from utils.write_queue import write_queue
 
-# Initialize Firestore client
-if not firebase_admin._apps:
-    firebase_admin.initialize_app()
 
-db = firestore.client()
+# --- FIRESTORE READ/WRITE FUNCTIONS ---
+# All storage access goes through the repositories (Firestore by default, in-memory with TOURNALYTICS_STORAGE=memory)
+# League and user reads go through directory_cache (per document) and the shared user/league directories
+# (full listings); every writer below calls invalidate_league/invalidate_users
 
+# Slow work after a save (refits, warehouse exports) runs here, off the write-behind queue's worker thread
+_save_follow_ups = ThreadPoolExecutor(max_workers=1, thread_name_prefix="save-follow-up")
 
-# --- FIRESTORE READ/WRITE FUNCTIONS ---
-@st.cache_data(ttl=600)
 def firestore_get_leagues(league_ids):
     """
-    Fetch data for multiple league IDs using batch reads.
+    Fetch data for multiple league IDs using batch reads (only uncached leagues are read).
     """
+    def load(keys):
+        leagues = get_repositories().leagues.get_many([league_id for _, league_id in keys])
+        # Missing leagues are not cached, so a league created later is found on the next lookup
+        return {("league", league_id): data for league_id, data in leagues.items() if data is not None}
+
     try:
-        doc_refs = [db.collection("leagues").document(league_id) for league_id in league_ids]
-        docs = db.get_all(doc_refs)
+        cached = directory_cache.get_many_or_load([("league", league_id) for league_id in league_ids], load)
         return {
-            doc.id: doc.to_dict() if doc.exists else {"error": "League not found"}
-            for doc in docs
+            league_id: cached.get(("league", league_id), {"error": "League not found"})
+            for league_id in league_ids
         }
     except Exception as e:
         st.error(f"Error fetching league data: {e}")
         return {}
 
 
-@st.cache_data(ttl=600)
 def firestore_get_all_users():
     """
-    Fetch all users from Firestore.
+    Fetch all users from the process-wide user directory (a shared, read-only snapshot).
     """
     try:
-        users_ref = db.collection("users").get()
-        return {user.id: user.to_dict() for user in users_ref}
+        return user_directory.get()
     except Exception as e:
         st.error(f"Error fetching all users: {e}")
         return {}
 
-@st.cache_data(ttl=600)
 def firestore_get_all_leagues():
     """
-    Fetch all leagues from Firestore.
+    Fetch all leagues from the process-wide league directory (a shared, read-only snapshot).
     """
     try:
-        leagues_ref = db.collection("leagues").get()
-        return {league.id: league.to_dict() for league in leagues_ref}
+        return league_directory.get()
     except Exception as e:
         st.error(f"Error fetching all leagues: {e}")
         return {}
@@ -63,17 +78,16 @@ def firestore_add_league(league_name, league_type, created_by, admins, super_adm
     Add a new league to Firestore with its metadata, admins, and super admin.
     """
     try:
-        league_ref = db.collection("leagues").document()
         league_data = {
             "league_name": league_name,
             "league_type": league_type,
             "created_by": created_by,
             "admins": admins,
             "super_admin": super_admin,
-            "created_at": firestore.SERVER_TIMESTAMP,  # Adds creation timestamp
         }
-        league_ref.set(league_data)
-        return {"success": True, "league_id": league_ref.id}
+        league_id = get_repositories().leagues.add(league_data)  # Stamps the creation time
+        invalidate_league(league_id)
+        return {"success": True, "league_id": league_id}
     except Exception as e:
         return {"success": False, "message": str(e)}
 
@@ -90,8 +104,8 @@ def firestore_update_league_admins(league_id, new_admins):
         dict: A dictionary indicating success or failure with a message.
     """
     try:
-        league_ref = db.collection("leagues").document(league_id)
-        league_ref.update({"admins": new_admins})
+        get_repositories().leagues.update(league_id, {"admins": new_admins})
+        invalidate_league(league_id)
         return {"success": True, "message": "Admins updated successfully."}
     except Exception as e:
         return {"success": False, "message": str(e)}
@@ -99,53 +113,40 @@ def firestore_update_league_admins(league_id, new_admins):
 
 def firestore_add_players_to_league(league_id, player_ids):
     """
-    Add multiple players to a league in Firestore, ensuring no duplicates.
-    
+    Add players to a league and the league to each player's league list, atomically and without reading the members first.
+
     Args:
         league_id (str): The ID of the league.
-        player_ids (list): A list of player IDs to add.
+        player_ids (list | dict): Player IDs to add, or a {player_id: username} mapping.
 
     Returns:
         dict: A success flag and a message.
     """
     try:
-        league_ref = db.collection("leagues").document(league_id)
-        league_data = league_ref.get().to_dict()
-
-        if not league_data:
-            return {"success": False, "message": f"League with ID {league_id} not found."}
-
-        # Ensure 'members' is treated as a list
-        current_members = league_data.get("members", [])
-        if not isinstance(current_members, list):
-            current_members = []
-
-        # Add new members and remove duplicates
-        new_members = list(set(current_members + player_ids))
-        league_ref.update({"members": new_members})
-
+        members = dict(player_ids) if isinstance(player_ids, dict) else {player_id: "" for player_id in player_ids}
+        get_repositories().leagues.change_members(league_id, add=members)
+        invalidate_league(league_id)
+        invalidate_users(members)
         return {"success": True, "message": "Players added successfully."}
     except Exception as e:
         return {"success": False, "message": f"Error adding players to league: {e}"}
 
 
-    except Exception as e:
-        # Log and return the error message
-        error_message = f"Error adding players to league: {e}"
-        st.error(error_message)
-        return {"success": False, "message": error_message}
-
-
-
 def firestore_remove_players_from_league(league_id, player_ids):
     """
-    Remove multiple players from a league in Firestore.
+    Remove players from a league and the league from each player's league list, atomically.
+
+    Args:
+        league_id (str): The ID of the league.
+        player_ids (list): Player IDs to remove.
+
+    Returns:
+        dict: A success flag and a message.
     """
     try:
-        league_ref = db.collection("leagues").document(league_id)
-        current_members = league_ref.get().to_dict().get("members", [])
-        updated_members = [player for player in current_members if player not in player_ids]
-        league_ref.update({"members": updated_members})
+        get_repositories().leagues.change_members(league_id, remove=list(player_ids))
+        invalidate_league(league_id)
+        invalidate_users(player_ids)
         return {"success": True, "message": "Players removed successfully."}
     except Exception as e:
         st.error(f"Error removing players from league: {e}")
@@ -157,9 +158,9 @@ def firestore_get_user(user_id):
     Fetch a single user's data by their ID.
     """
     try:
-        user_doc = db.collection("users").document(user_id).get()
-        if user_doc.exists:
-            return user_doc.to_dict()
+        user_data = directory_cache.get_or_load(("user", user_id), lambda: get_repositories().users.get(user_id))
+        if user_data is not None:
+            return user_data
         else:
             return {"error": "User not found"}
     except Exception as e:
@@ -169,20 +170,86 @@ def firestore_get_user(user_id):
 
 def firestore_batch_update_users(user_updates):
     """
-    Batch update user data in Firestore.
+    Batch update user data in Firestore (any number of users; written in concurrent 500-write chunks).
+
+    Returns:
+        dict: A success flag, a message and "failed" (user ID -> error) for users that could not be updated.
     """
     try:
-        batch = db.batch()
-        for user_id, updates in user_updates.items():
-            user_ref = db.collection("users").document(user_id)
-            batch.update(user_ref, updates)
-        batch.commit()
-        return {"success": True, "message": "Batch update completed successfully."}
+        result = get_repositories().users.update_many(user_updates)
+        invalidate_users([user_id for user_id in user_updates if user_id not in result["failed"]])
+        if result["failed"]:
+            return {
+                "success": False,
+                "message": f"{result['written']} users updated, {len(result['failed'])} failed.",
+                "failed": result["failed"],
+            }
+        return {"success": True, "message": "Batch update completed successfully.", "failed": {}}
     except Exception as e:
         st.error(f"Error in batch updating users: {e}")
         return {"success": False, "message": str(e)}
 
 
+def firestore_get_league(league_id):
+    """
+    Fetch a single league's data by its ID.
+
+    Args:
+        league_id (str): The ID of the league.
+
+    Returns:
+        dict: The league data, or an empty dict if it does not exist.
+    """
+    try:
+        return directory_cache.get_or_load(("league", league_id), lambda: get_repositories().leagues.get(league_id)) or {}
+    except Exception as e:
+        st.error(f"Error fetching league data: {e}")
+        return {}
+
+
+def firestore_find_leagues_by_name(league_name):
+    """
+    Find leagues with exactly the given name.
+
+    Args:
+        league_name (str): The league name to look up.
+
+    Returns:
+        dict: Matching leagues keyed by league ID.
+    """
+    return get_repositories().leagues.find_by_name(league_name)
+
+
+def firestore_get_admin_leagues(user_id):
+    """
+    Fetch the leagues a user administers (as an admin or the super admin).
+
+    Args:
+        user_id (str): The user's ID.
+
+    Returns:
+        dict: Leagues keyed by league ID.
+    """
+    try:
+        return get_repositories().leagues.list_for_admin(user_id)
+    except Exception as e:
+        st.error(f"Error fetching leagues: {e}")
+        return {}
+
+
+def firestore_find_user_by_email(email):
+    """
+    Look up a user by email address.
+
+    Args:
+        email (str): The user's email.
+
+    Returns:
+        tuple: (user_id, user_data), or (None, None) if no user has this email.
+    """
+    return get_repositories().users.find_by_email(email)
+
+
 def firestore_query_tournaments_by_league(league_id):
     """
     Query Firestore for tournaments associated with a specific league.
@@ -193,21 +260,145 @@ def firestore_query_tournaments_by_league(league_id):
     Returns:
         list: A list of dictionaries representing the tournaments for the given league.
     """
-    db = firestore.client()
     try:
-        # Query the tournaments collection filtered by league_id
-        tournaments_ref = db.collection("tournaments").where("metadata.league_id", "==", league_id).stream()
-        
-        # Parse the query results
-        tournaments = [doc.to_dict() for doc in tournaments_ref]
-        
-        return tournaments
+        # Completed tournaments rarely change: when the (projected) listing shows every tournament in the
+        # local disk cache at its current update time, no results are transferred at all
+        tournaments = get_repositories().tournaments
+        listing = tournaments.list_metadata_by_league(league_id)
+        cached = [
+            tournament_disk_cache.get(listed["metadata"].get("tournament_id"), listed.get("update_time"))
+            for listed in listing
+        ]
+        if all(tournament is not None for tournament in cached):
+            return cached
+
+        # Each tournament carries its update time so cached analyses can be invalidated
+        if all(tournament is None for tournament in cached):
+            # Cold cache: one query beats a read per tournament
+            loaded = tournaments.list_by_league(league_id)
+            for tournament in loaded:
+                tournament_disk_cache.put(tournament.get("metadata", {}).get("tournament_id"), tournament.get("update_time"), tournament)
+            return loaded
+
+        # Otherwise only the missing or changed tournaments (e.g. the one just saved) are fetched
+        merged = []
+        for listed, tournament in zip(listing, cached):
+            if tournament is None:
+                tournament_id = listed["metadata"].get("tournament_id")
+                tournament = tournaments.get(tournament_id)
+                if tournament is None:
+                    continue  # Deleted since the listing
+                tournament_disk_cache.put(tournament_id, tournament.get("update_time"), tournament)
+            merged.append(tournament)
+        return merged
     except Exception as e:
         # Log error and return an empty list
         print(f"Error querying tournaments by league: {e}")
         return []
 
 
+def firestore_list_tournaments_by_league(league_id):
+    """
+    List a league's tournaments without their results (metadata and update time only).
+
+    Args:
+        league_id (str): The ID of the league.
+
+    Returns:
+        list: Dictionaries with "metadata" (tournament_id, tournament_name, event_date) and "update_time".
+    """
+    try:
+        return tournament_cache.get_or_load(
+            ("listing", league_id), lambda: get_repositories().tournaments.list_metadata_by_league(league_id)
+        )
+    except Exception as e:
+        print(f"Error listing tournaments by league: {e}")
+        return []
+
+
+def firestore_get_tournament(tournament_id, update_time=None):
+    """
+    Fetch one full tournament document, cached per tournament in memory and on local disk.
+
+    Args:
+        tournament_id (str): The ID of the tournament.
+        update_time (str): Its update time from the listing; enables the disk cache lookup.
+
+    Returns:
+        dict: The tournament (with "update_time"), or an empty dict if it does not exist.
+    """
+    def load():
+        tournament = tournament_disk_cache.get(tournament_id, update_time)
+        if tournament is None:
+            tournament = get_repositories().tournaments.get(tournament_id)
+            if tournament is not None:
+                tournament_disk_cache.put(tournament_id, tournament.get("update_time"), tournament)
+        return tournament
+
+    try:
+        return tournament_cache.get_or_load(("tournament", tournament_id), load) or {}
+    except Exception as e:
+        print(f"Error fetching tournament: {e}")
+        return {}
+
+
+def firestore_query_tournament_timings_by_league(league_id):
+    """
+    Bulk-fetch the fields needed to calibrate duration estimates for a league.
+
+    Uses a single projected query so only the results arrays and the half duration
+    are transferred, rather than reading each tournament document individually.
+
+    Args:
+        league_id (str): The ID of the league to filter tournaments by.
+
+    Returns:
+        list: A list of dictionaries with "results", "playoff_results" and "metadata" keys.
+    """
+    try:
+        return get_repositories().tournaments.list_timings_by_league(league_id)
+    except Exception as e:
+        print(f"Error querying tournament timings by league: {e}")
+        return []
+
+
+@st.cache_data(ttl=600)
+def firestore_get_duration_profile(league_id):
+    """
+    Fetch the calibrated duration profile for a league.
+
+    Args:
+        league_id (str): The ID of the league.
+
+    Returns:
+        dict: The fitted duration parameters, or an empty dict if the league has none yet.
+    """
+    try:
+        return get_repositories().leagues.get_duration_profile(league_id)
+    except Exception as e:
+        print(f"Error fetching duration profile: {e}")
+        return {}
+
+
+def firestore_save_duration_profile(league_id, profile):
+    """
+    Store the calibrated duration profile for a league and refresh the cached copy.
+
+    Args:
+        league_id (str): The ID of the league.
+        profile (dict): The fitted duration parameters.
+
+    Returns:
+        dict: A success flag and a message.
+    """
+    try:
+        get_repositories().leagues.save_duration_profile(league_id, profile)
+        firestore_get_duration_profile.clear()
+        return {"success": True, "message": "Duration profile saved successfully."}
+    except Exception as e:
+        return {"success": False, "message": str(e)}
+
+
 
 # --- FIRESTORE FUNCTIONS, SAVE TOURNAMENT ---
 
@@ -268,13 +459,34 @@ def enhance_dataframe_with_tournament_id(dataframe, tournament_id):
     return dataframe.to_dict(orient="records")
 
 
-def save_tournament_complete(session_state, verbose=False):
+def _run_follow_up(follow_up, tournament_id):
+    try:
+        follow_up()
+    except Exception as e:
+        print(f"Error after saving tournament {tournament_id}: {e}")
+
+
+def save_tournament_complete(session_state, verbose=False, background=False, on_commit=None):
     """
     Save tournament data to Firestore under the tournaments/ collection.
-    """
-    # Firestore client
-    db = firestore.client()
 
+    In the same transaction, the tournament is folded into the league's career aggregates
+    (league_stats/{league_id} and its players/ subcollection) and its games are applied to the
+    league's Elo ratings (league_ratings/{league_id}), unless it was already counted.
+
+    With background=True the payload is built from session_state right away and the write is handed
+    to the write-behind queue, so the call returns at once; follow it with write_queue.status(("tournament", tournament_id)).
+
+    Args:
+        session_state: Streamlit session state of the finished tournament.
+        verbose (bool): Print a confirmation once saved.
+        background (bool): Queue the write instead of committing it before returning.
+        on_commit (callable): Called without arguments on a follow-up thread once the tournament is committed
+            (e.g. refits); the save's status is "committed" without waiting for it.
+
+    Returns:
+        str: The tournament ID.
+    """
     # Validate required keys
     required_keys = ["standings", "results", "playoff_results", "selected_tournament_id"]
     validate_session_state_keys(session_state, required_keys)
@@ -285,11 +497,16 @@ def save_tournament_complete(session_state, verbose=False):
         raise ValueError("The selected tournament ID is missing or not set in session_state.")
 
     tournament_metadata = extract_and_validate_tournament_metadata(session_state, tournament_id)
+    league_id = tournament_metadata.get("league_id")
+
+    # Snapshot the results: the session keeps changing while a queued write waits
+    results_df = session_state.results.copy()
+    playoff_results_df = session_state.playoff_results.copy()
 
     # Enhance dataframes with tournament_id
     standings = enhance_dataframe_with_tournament_id(session_state.final_standings, tournament_id)
-    results = enhance_dataframe_with_tournament_id(session_state.results, tournament_id)
-    playoff_results = enhance_dataframe_with_tournament_id(session_state.playoff_results, tournament_id)
+    results = enhance_dataframe_with_tournament_id(results_df, tournament_id)
+    playoff_results = enhance_dataframe_with_tournament_id(playoff_results_df, tournament_id)
 
     # Prepare tournament data for saving
     tournament_data = {
@@ -299,18 +516,371 @@ def save_tournament_complete(session_state, verbose=False):
         "metadata": tournament_metadata,
     }
 
-    # Save to Firestore
-    try:
-        doc_ref = db.collection("tournaments").document(tournament_id)
-        doc_ref.set(tournament_data)  # Write tournament data to Firestore
-
+    # Career increments for the league aggregates
+    players, league_totals = summarize_tournament_careers(
+        {"results": results_df, "playoff_results": playoff_results_df}
+    )
+
+    def write():
+        get_repositories().tournaments.save_complete(
+            tournament_id,
+            tournament_data,
+            league_id,
+            players,
+            league_totals,
+            update_ratings=lambda ratings: apply_tournament(
+                ratings, {"results": results_df, "playoff_results": playoff_results_df}
+            ),
+        )
+
+    def committed():
+        invalidate_tournament(tournament_id, league_id)
+        firestore_get_league_aggregates.clear()
+        firestore_get_league_ratings.clear()
         if verbose:
             print(f"Tournament data saved successfully to Firestore for ID: {tournament_id}")
+        if on_commit is not None:
+            _save_follow_ups.submit(_run_follow_up, on_commit, tournament_id)
+
+    if background:
+        write_queue.submit(
+            ("tournament", tournament_id), write, on_commit=committed,
+            label=f"Tournament {tournament_metadata.get('tournament_name', tournament_id)}",
+        )
+        return tournament_id
+
+    # Save to Firestore
+    try:
+        write()
+        committed()
     except Exception as e:
         raise RuntimeError(f"Failed to save tournament data to Firestore: {e}")
 
     return tournament_id
 
+
+@st.cache_data(ttl=600)
+def firestore_get_league_aggregates(league_id):
+    """
+    Fetch the career aggregate document for a league (one small read instead of scanning history).
+
+    Args:
+        league_id (str): The ID of the league.
+
+    Returns:
+        dict: The aggregate document, or an empty dict if none exists yet.
+    """
+    try:
+        return get_repositories().leagues.get_aggregates(league_id)
+    except Exception as e:
+        print(f"Error fetching league aggregates: {e}")
+        return {}
+
+
+def rebuild_league_aggregates(league_id):
+    """
+    Recompute a league's career aggregates from every saved tournament, replacing the stored values.
+
+    Use this when the incremental aggregates drift (e.g. after editing or deleting a tournament).
+
+    Args:
+        league_id (str): The ID of the league.
+
+    Returns:
+        dict: A success flag and a message.
+    """
+    try:
+        tournaments = firestore_query_tournaments_by_league(league_id)
+        players, league_totals = merge_career_summaries(
+            [summarize_tournament_careers(tournament) for tournament in tournaments]
+        )
+
+        get_repositories().leagues.replace_aggregates(
+            league_id,
+            {
+                "league_id": league_id,
+                **league_totals,
+                "tournament_ids": [t.get("metadata", {}).get("tournament_id") for t in tournaments],
+                "players": players,
+            },
+            {
+                player_document_id(player): {"player": player, "league_id": league_id, **stats}
+                for player, stats in players.items()
+            },
+        )
+
+        firestore_get_league_aggregates.clear()
+        return {"success": True, "message": f"Rebuilt aggregates from {len(tournaments)} tournaments."}
+    except Exception as e:
+        return {"success": False, "message": f"Error rebuilding league aggregates: {e}"}
+
+@st.cache_data(ttl=600)
+def firestore_get_league_ratings(league_id):
+    """
+    Fetch the compact Elo ratings document for a league.
+
+    Args:
+        league_id (str): The ID of the league.
+
+    Returns:
+        dict: Mapping of player -> {"rating": float, "games": int}; empty if the league has no ratings yet.
+    """
+    try:
+        return get_repositories().leagues.get_ratings(league_id).get("ratings", {})
+    except Exception as e:
+        print(f"Error fetching league ratings: {e}")
+        return {}
+
+
+def rebuild_league_ratings(league_id):
+    """
+    Recompute a league's ratings by replaying every saved tournament in date order.
+
+    Args:
+        league_id (str): The ID of the league.
+
+    Returns:
+        dict: A success flag and a message.
+    """
+    try:
+        tournaments = firestore_query_tournaments_by_league(league_id)
+        ratings = replay_ratings(tournaments)
+        get_repositories().leagues.set_ratings(league_id, {
+            "league_id": league_id,
+            "ratings": ratings,
+            "tournament_ids": [t.get("metadata", {}).get("tournament_id") for t in tournaments],
+        })
+        firestore_get_league_ratings.clear()
+        return {"success": True, "message": f"Rebuilt ratings from {len(tournaments)} tournaments."}
+    except Exception as e:
+        return {"success": False, "message": f"Error rebuilding league ratings: {e}"}
+
+
+# --- LIVE TOURNAMENT AUTOSAVE ---
+# While a tournament is played, every entered result is written as a small per-game document
+# (tournaments/{id}/games on Firestore) next to a "live" header, so a refresh or restart can resume it.
+# Writes go through the write-behind queue (utils/write_queue.py): entering a result returns at once,
+# repeated edits of a game coalesce and a tournament's pending games are committed in one batch.
+# Autosave failures are retried in the background and never interrupt the event; a tournament's
+# autosaves share one queue scope, so they land in order even when one of them is retried.
+
+LIVE_STAGES = {"results": "League", "playoff_results": "Playoff"}
+
+
+def tournament_saved_complete(tournament_id):
+    """
+    Check whether a tournament was saved complete: its save is queued in this process or it is in storage.
+
+    Storage is the record that survives restarts; the repositories also ignore late autosaves on their own.
+
+    Args:
+        tournament_id (str): The tournament ID.
+
+    Returns:
+        bool: True once the completed save was queued or stored.
+    """
+    if write_queue.is_queued(("tournament", tournament_id)):
+        return True
+    return bool(firestore_get_tournament(tournament_id))
+
+
+SAVED_COMPLETE_RESULT = {"success": True, "message": "Tournament already saved; autosave skipped."}
+
+
+def _live_value(value):
+    if value is None or (np.isscalar(value) and pd.isna(value)):
+        return None
+    if isinstance(value, np.generic):
+        return value.item()
+    return make_serializable(value)
+
+
+def autosave_tournament_header(session_state, progress=None):
+    """
+    Write (or merge) the header of the selected in-progress tournament.
+
+    Args:
+        session_state: Streamlit session state with "tournaments", "selected_tournament_id" and "schedule".
+        progress (dict): Optional progress flags, e.g. {"playoffs_generated": True}.
+
+    Returns:
+        dict: A success flag and a message.
+    """
+    try:
+        tournament_id = session_state.get("selected_tournament_id")
+        if tournament_saved_complete(tournament_id):
+            return SAVED_COMPLETE_RESULT
+        details = session_state["tournaments"][tournament_id]
+        header = {
+            "tournament_id": tournament_id,
+            "league_id": details.get("league_id"),
+            "created_by": session_state.get("user_id"),
+            "details": {key: _live_value(value) if not isinstance(value, (list, dict)) else value for key, value in details.items()},
+            "schedule": [{key: _live_value(value) for key, value in game.items()} for game in session_state.get("schedule", [])],
+        }
+        if progress:
+            header["progress"] = progress
+        header = copy.deepcopy(header)
+        write_queue.submit(
+            ("live_header", tournament_id),
+            lambda: get_repositories().tournaments.save_live_header(tournament_id, header),
+            item=header,
+            label=f"Tournament header {tournament_id}",
+            scope=("live", tournament_id),
+        )
+        return {"success": True, "message": "Tournament header queued."}
+    except Exception as e:
+        print(f"Error autosaving tournament header: {e}")
+        return {"success": False, "message": f"Error autosaving tournament header: {e}"}
+
+
+def autosave_tournament_progress(tournament_id, **progress):
+    """
+    Merge progress flags (playoffs_generated, finals_generated) into the in-progress header.
+
+    Returns:
+        dict: A success flag and a message.
+    """
+    try:
+        if tournament_saved_complete(tournament_id):
+            return SAVED_COMPLETE_RESULT
+        write_queue.submit(
+            ("live_progress", tournament_id, tuple(sorted(progress))),
+            lambda: get_repositories().tournaments.save_live_header(tournament_id, {"progress": progress}),
+            item={"progress": progress},
+            label=f"Tournament progress {tournament_id}",
+            scope=("live", tournament_id),
+        )
+        return {"success": True, "message": "Tournament progress queued."}
+    except Exception as e:
+        print(f"Error autosaving tournament progress: {e}")
+        return {"success": False, "message": f"Error autosaving tournament progress: {e}"}
+
+
+def autosave_games(tournament_id, stage, results_df, game_ids=None):
+    """
+    Write games of an in-progress tournament, one small document per game.
+
+    Args:
+        tournament_id (str): The tournament ID.
+        stage (str): "League" or "Playoff".
+        results_df (pd.DataFrame): The stage's results; a game's row position is kept for resume.
+        game_ids (list): Only write these "Game #" values (every row when None).
+
+    Returns:
+        dict: A success flag and a message.
+    """
+    try:
+        if tournament_saved_complete(tournament_id):
+            return SAVED_COMPLETE_RESULT
+        rows = results_df.reset_index(drop=True)
+        if game_ids is not None:
+            rows = rows[rows["Game #"].isin(game_ids)]
+        games = [
+            (stage, int(position), {key: _live_value(value) for key, value in record.items()})
+            for position, record in zip(rows.index, rows.to_dict(orient="records"))
+        ]
+        for game in games:
+            write_queue.submit(
+                ("live_game", tournament_id, game[0], game[2].get("Game #")),
+                lambda items: get_repositories().tournaments.save_live_games(tournament_id, items),
+                item=game,
+                group=("live_games", tournament_id),
+                label=f"{game[0]} game {game[2].get('Game #')} of {tournament_id}",
+                scope=("live", tournament_id),
+            )
+        return {"success": True, "message": f"{len(games)} games queued."}
+    except Exception as e:
+        print(f"Error autosaving games: {e}")
+        return {"success": False, "message": f"Error autosaving games: {e}"}
+
+
+def reset_live_games(tournament_id, stage):
+    """
+    Remove a stage's in-progress games (e.g. after a playoff reset).
+
+    Returns:
+        dict: A success flag and a message.
+    """
+    try:
+        if tournament_saved_complete(tournament_id):
+            return SAVED_COMPLETE_RESULT
+        write_queue.submit(
+            ("live_reset", tournament_id, stage),
+            lambda: get_repositories().tournaments.delete_live_games(tournament_id, stage),
+            item=stage,
+            label=f"Reset {stage} games of {tournament_id}",
+            scope=("live", tournament_id),
+        )
+        return {"success": True, "message": f"{stage} games cleared."}
+    except Exception as e:
+        print(f"Error clearing live games: {e}")
+        return {"success": False, "message": f"Error clearing live games: {e}"}
+
+
+def _with_queued_autosaves(tournament_id, live):
+    # Apply this process's autosaves that are still queued (e.g. resuming right after a page reload)
+    # to what storage returned, rather than waiting for the queue to commit them
+    queued = write_queue.queued(("live", tournament_id))
+    if not queued:
+        return live
+    header = copy.deepcopy(live["header"]) if live else {}
+    games = {live_game_id(stage, record): (stage, position, record) for stage, position, record in (live or {}).get("games", [])}
+    for key, item in queued:
+        if key[0] in ["live_header", "live_progress"]:
+            for field, value in item.items():
+                header[field] = {**header[field], **value} if isinstance(value, dict) and isinstance(header.get(field), dict) else value
+        elif key[0] == "live_game":
+            games[live_game_id(item[0], item[2])] = item
+        elif key[0] == "live_reset":
+            games = {game_id: game for game_id, game in games.items() if game[0] != item}
+    if "details" not in header:
+        return live  # The header itself was never written
+    return {"header": header, "games": list(games.values())}
+
+
+def firestore_list_live_tournaments(league_ids):
+    """
+    List in-progress tournaments of the given leagues.
+
+    Args:
+        league_ids (list): League IDs.
+
+    Returns:
+        dict: tournament_id -> header.
+    """
+    try:
+        return get_repositories().tournaments.list_live(league_ids) if league_ids else {}
+    except Exception as e:
+        print(f"Error listing live tournaments: {e}")
+        return {}
+
+
+def firestore_load_live_tournament(tournament_id):
+    """
+    Load an in-progress tournament's header and all of its games in one batched read.
+
+    Args:
+        tournament_id (str): The tournament ID.
+
+    Returns:
+        dict: "header" and per-stage results DataFrames under "results" and "playoff_results"; None if not found.
+    """
+    live = _with_queued_autosaves(tournament_id, get_repositories().tournaments.load_live(tournament_id))
+    if live is None:
+        return None
+
+    loaded = {"header": live["header"]}
+    for key, stage in LIVE_STAGES.items():
+        records = [record for game_stage, _, record in sorted(live["games"], key=lambda game: game[1]) if game_stage == stage]
+        results = pd.DataFrame(records)
+        for column in ["Home Goals", "Away Goals", "Home xG", "Away xG"]:
+            if column in results:
+                results[column] = pd.to_numeric(results[column], errors="coerce")
+        loaded[key] = results
+    return loaded
+
+
 # --- DATA MANIPULATION FUNCTIONS ---
 
 def create_league_mapping(league_catalog):
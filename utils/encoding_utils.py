@@ -0,0 +1,109 @@
+import math
+
+# --- SAVED TOURNAMENT DOCUMENT FORMAT ---
+# Version 1 (no "format" field): standings, results and playoff_results are lists of row records, each
+# repeating every column name and the tournament_id.
+# Version 2: each table is stored column-wise, {"rows": n, "order": [...], "columns": {name: [...]}},
+# the tournament ID is kept once at the top level and player names are dictionary-encoded: the
+# document's "players" list holds each name once and player columns store indices into it. A column
+# missing from some rows lists those rows under "missing", so they decode without the key.
+# (Firestore forbids nested arrays, so columns live in a map and "order" keeps the column order.)
+
+TOURNAMENT_FORMAT_VERSION = 2
+
+TOURNAMENT_TABLES = ["standings", "results", "playoff_results"]
+
+# Columns holding player names
+PLAYER_COLUMNS = ["Player", "Home", "Away"]
+
+
+def _is_missing(value):
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def _encode_table(records, tournament_id, players):
+    order = list(dict.fromkeys(column for record in records for column in record))
+    # The tournament ID is stored once per document, not once per row
+    stamped = "tournament_id" in order and all(record.get("tournament_id") == tournament_id for record in records)
+    if stamped:
+        order.remove("tournament_id")
+
+    columns = {}
+    encoded = []
+    missing = {}
+    for column in order:
+        absent = [row for row, record in enumerate(records) if column not in record]
+        if absent:
+            missing[column] = absent
+        values = [record.get(column) for record in records]
+        if column in PLAYER_COLUMNS and all(_is_missing(value) or isinstance(value, str) for value in values):
+            values = [None if _is_missing(value) else players.setdefault(value, len(players)) for value in values]
+            encoded.append(column)
+        columns[column] = values
+
+    return {
+        "rows": len(records), "order": order, "columns": columns, "players": encoded,
+        "missing": missing, "tournament_id": stamped,
+    }
+
+
+def _decode_table(table, tournament_id, players):
+    columns = {
+        column: [None if index is None else players[index] for index in values] if column in table.get("players", []) else values
+        for column, values in table.get("columns", {}).items()
+    }
+    order = [column for column in table.get("order", []) if column in columns]
+    missing = {column: set(rows) for column, rows in table.get("missing", {}).items()}
+    records = [
+        {column: columns[column][row] for column in order if row not in missing.get(column, ())}
+        for row in range(table.get("rows", 0))
+    ]
+    if table.get("tournament_id"):
+        for record in records:
+            record["tournament_id"] = tournament_id
+    return records
+
+
+def encode_tournament_document(tournament_data):
+    """
+    Encode a saved tournament (tables as lists of records) into the compact columnar format.
+
+    Args:
+        tournament_data (dict): "standings", "results", "playoff_results" (lists of records) and "metadata".
+
+    Returns:
+        dict: The version 2 document; other top-level fields are kept as they are.
+    """
+    tournament_id = tournament_data.get("metadata", {}).get("tournament_id")
+    players = {}
+    document = {key: value for key, value in tournament_data.items() if key not in TOURNAMENT_TABLES}
+    for table in TOURNAMENT_TABLES:
+        if table in tournament_data:
+            document[table] = _encode_table(tournament_data[table] or [], tournament_id, players)
+    document.update({"format": TOURNAMENT_FORMAT_VERSION, "tournament_id": tournament_id, "players": list(players)})
+    return document
+
+
+def decode_tournament_document(document):
+    """
+    Decode a stored tournament document of any version into tables of records.
+
+    Args:
+        document (dict): The stored document (possibly projected to a subset of fields).
+
+    Returns:
+        dict: The document with "standings", "results" and "playoff_results" as lists of records.
+    """
+    version = document.get("format", 1)
+    if version == 1:
+        return document
+    if version != TOURNAMENT_FORMAT_VERSION:
+        raise ValueError(f"Unsupported tournament document format {version}.")
+
+    tournament_id = document.get("tournament_id")
+    players = document.get("players", [])
+    decoded = {key: value for key, value in document.items() if key not in ["format", "tournament_id", "players"]}
+    for table in TOURNAMENT_TABLES:
+        if table in document:
+            decoded[table] = _decode_table(document[table], tournament_id, players)
+    return decoded
@@ -4,7 +4,7 @@ import pandas as pd
 import random
 
 
-def generate_unique_id(existing_ids=None, id_length=9, id_type='numeric'):
+def generate_unique_id(existing_ids=None, id_length=9, id_type='numeric', verify=None, max_attempts=None):
     """
     Generates a unique ID not present in the existing_ids collection.
 
@@ -12,6 +12,9 @@ def generate_unique_id(existing_ids=None, id_length=9, id_type='numeric'):
         existing_ids (set or list, optional): A collection of existing IDs to avoid duplicates. Default is None.
         id_length (int): The length of the ID to be generated (applies to numeric type).
         id_type (str): Type of ID to generate - 'numeric' or 'uuid'.
+        verify (callable, optional): Checks one candidate against the store and returns True to accept it,
+            e.g. a point lookup or a create-only write that claims the ID. Avoids loading every existing ID.
+        max_attempts (int, optional): Give up after this many candidates. Default is None (no limit).
 
     Returns:
         str: A unique ID.
@@ -22,7 +25,9 @@ def generate_unique_id(existing_ids=None, id_length=9, id_type='numeric'):
     elif not isinstance(existing_ids, set):
         existing_ids = set(existing_ids)
 
-    while True:
+    attempts = 0
+    while max_attempts is None or attempts < max_attempts:
+        attempts += 1
         if id_type == 'numeric':
             # Generate a numeric ID with the specified length
             random_id = ''.join([str(random.randint(0, 9)) for _ in range(id_length)])
@@ -32,10 +37,12 @@ def generate_unique_id(existing_ids=None, id_length=9, id_type='numeric'):
         else:
             raise ValueError("Invalid id_type. Choose 'numeric' or 'uuid'.")
 
-        # Check uniqueness
-        if random_id not in existing_ids:
+        # Check uniqueness (locally first, then with the store)
+        if random_id not in existing_ids and (verify is None or verify(random_id)):
             return random_id
-        
+
+    raise RuntimeError(f"No unique ID found after {max_attempts} attempts.")
+
 
 def initialize_session_state():
     defaults = {
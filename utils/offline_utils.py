@@ -0,0 +1,512 @@
+import os
+import json
+import threading
+from datetime import date, datetime, timezone
+import numpy as np
+from utils.cache_utils import reset_storage_caches
+from utils.rating_utils import apply_tournament
+from utils.repositories import (
+    Repositories,
+    STORAGE_BACKEND,
+    MemoryStore,
+    MemoryLeagueRepo,
+    MemoryUserRepo,
+    MemoryTournamentRepo,
+    create_repositories,
+    get_repositories,
+    set_repositories,
+)
+from utils.write_queue import write_queue
+
+# --- OFFLINE EVENT MODE ---
+# <OFFLINE_DIR>/event_pack.json   leagues, members and per-league documents prefetched while online
+# <OFFLINE_DIR>/journal.jsonl     append-only log of tournament writes made offline, one JSON entry per line
+# <OFFLINE_DIR>/synced.jsonl      journal entries already synced to the online backend
+# <OFFLINE_DIR>/active.json       present while the app runs offline (survives a restart mid-event)
+
+OFFLINE_DIR = os.getenv("TOURNALYTICS_OFFLINE_DIR", "offline")
+
+# Backend the journal is synced to
+SYNC_BACKEND = os.getenv("TOURNALYTICS_SYNC_STORAGE", STORAGE_BACKEND if STORAGE_BACKEND != "offline" else "firestore")
+
+# Per-league documents copied into the pack, with the repository method that reads them
+PACK_LEAGUE_DOCUMENTS = {
+    "duration_profiles": "get_duration_profile",
+    "league_ratings": "get_ratings",
+    "league_stats": "get_aggregates",
+}
+
+
+class OfflineError(Exception):
+    """Raised for writes that need the online backend (league and account changes)."""
+
+
+def _paths(offline_dir=None):
+    offline_dir = offline_dir or OFFLINE_DIR
+    return {
+        "pack": os.path.join(offline_dir, "event_pack.json"),
+        "journal": os.path.join(offline_dir, "journal.jsonl"),
+        "synced": os.path.join(offline_dir, "synced.jsonl"),
+        "active": os.path.join(offline_dir, "active.json"),
+    }
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Cannot store {type(value).__name__} offline.")
+
+
+def _write_json(path, payload):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(payload, f, default=_json_default)
+    os.replace(f"{path}.tmp", path)
+
+
+# One journal object (and lock) per file, shared by the offline repositories and the sync
+_journals = {}
+_journals_lock = threading.Lock()
+
+
+def _journal(paths):
+    with _journals_lock:
+        if paths["journal"] not in _journals:
+            _journals[paths["journal"]] = OfflineJournal(paths["journal"], paths["synced"])
+        return _journals[paths["journal"]]
+
+
+def _member_ids(league_data):
+    members = league_data.get("members") or {}
+    return list(members) if isinstance(members, (dict, list)) else []
+
+
+# --- JOURNAL ---
+
+
+class OfflineJournal:
+    """
+    Append-only JSON Lines log of the tournament writes made offline.
+
+    Every entry is flushed and fsynced before the write is applied to the local store, so a result
+    survives a crash or a restart. sync_offline_journal() replays the pending entries against the online
+    backend and moves the synced ones to an archive, which start-up still replays into the local store
+    (an event synced halfway keeps its earlier games) until offline mode is left.
+    """
+
+    def __init__(self, path, archive_path):
+        self.path = path
+        self.archive_path = archive_path
+        self._lock = threading.Lock()
+
+    def append(self, op, tournament_id, **args):
+        entry = {
+            "op": op,
+            "tournament_id": tournament_id,
+            "args": args,
+            "recorded_at": datetime.now(timezone.utc).isoformat(),
+        }
+        line = json.dumps(entry, default=_json_default)
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a") as f:
+                f.write(line + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+        return entry
+
+    @staticmethod
+    def _read(path):
+        try:
+            with open(path, "r") as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return []
+        entries = []
+        for line in lines:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                print(f"Skipping a damaged offline journal line: {line[:80]!r}")  # e.g. a write cut short by a crash
+        return entries
+
+    def entries(self):
+        """Return the entries not synced yet, oldest first."""
+        with self._lock:
+            return self._read(self.path)
+
+    def history(self):
+        """Return every entry of this offline session, synced ones first."""
+        with self._lock:
+            return self._read(self.archive_path) + self._read(self.path)
+
+    def mark_synced(self, processed, synced_ids):
+        """
+        Archive the entries of synced tournaments among the first `processed` entries; entries appended
+        since they were read stay pending.
+        """
+        with self._lock:
+            entries = self._read(self.path)
+            done = [entry for entry in entries[:processed] if entry["tournament_id"] in synced_ids]
+            pending = [entry for entry in entries[:processed] if entry["tournament_id"] not in synced_ids] + entries[processed:]
+            with open(self.archive_path, "a") as f:
+                for entry in done:
+                    f.write(json.dumps(entry, default=_json_default) + "\n")
+            with open(f"{self.path}.tmp", "w") as f:
+                for entry in pending:
+                    f.write(json.dumps(entry, default=_json_default) + "\n")
+            os.replace(f"{self.path}.tmp", self.path)
+
+    def clear(self):
+        """Forget the whole offline session (pending and synced entries)."""
+        with self._lock:
+            for path in [self.path, self.archive_path]:
+                if os.path.exists(path):
+                    os.remove(path)
+
+
+def _replay(tournaments, entry):
+    # Apply one journal entry to a tournament repository (the local store on start-up, the online backend on sync)
+    tournament_id, args = entry["tournament_id"], entry["args"]
+    if entry["op"] == "save_live_header":
+        tournaments.save_live_header(tournament_id, args["header"])
+    elif entry["op"] == "save_live_games":
+        tournaments.save_live_games(tournament_id, [tuple(game) for game in args["games"]])
+    elif entry["op"] == "delete_live_games":
+        tournaments.delete_live_games(tournament_id, args["stage"])
+    elif entry["op"] == "save_complete":
+        tournament_data = args["tournament_data"]
+        tournaments.save_complete(
+            tournament_id,
+            tournament_data,
+            args["league_id"],
+            args["player_increments"],
+            args["league_totals"],
+            update_ratings=lambda ratings: apply_tournament(ratings, tournament_data),
+        )
+    else:
+        raise ValueError(f"Unknown offline journal operation '{entry['op']}'.")
+
+
+# --- OFFLINE REPOSITORIES ---
+
+
+class OfflineLeagueRepo(MemoryLeagueRepo):
+    """
+    Prefetched leagues. Derived documents (duration profile, aggregates, ratings) may change locally since
+    they are recomputed online after a sync; league changes need the online backend.
+    """
+
+    def add(self, league_data, league_id=None):
+        raise OfflineError("Creating a league is not available in offline event mode.")
+
+    def update(self, league_id, fields):
+        raise OfflineError("Editing a league is not available in offline event mode.")
+
+    def change_members(self, league_id, add=None, remove=None):
+        raise OfflineError("Changing league members is not available in offline event mode.")
+
+
+class OfflineUserRepo(MemoryUserRepo):
+    """
+    Prefetched league members; account changes need the online backend.
+    """
+
+    def create(self, user_id, user_data):
+        raise OfflineError("Creating an account is not available in offline event mode.")
+
+    def update_many(self, user_updates):
+        raise OfflineError("Updating accounts is not available in offline event mode.")
+
+
+class OfflineTournamentRepo(MemoryTournamentRepo):
+    """
+    Tournament writes go to the journal first, then to the local store.
+    """
+
+    def __init__(self, store, journal):
+        super().__init__(store)
+        self.journal = journal
+
+    def save_live_header(self, tournament_id, header):
+        self.journal.append("save_live_header", tournament_id, header=header)
+        super().save_live_header(tournament_id, header)
+
+    def save_live_games(self, tournament_id, games):
+        self.journal.append("save_live_games", tournament_id, games=[list(game) for game in games])
+        super().save_live_games(tournament_id, games)
+
+    def delete_live_games(self, tournament_id, stage):
+        self.journal.append("delete_live_games", tournament_id, stage=stage)
+        super().delete_live_games(tournament_id, stage)
+
+    def save_complete(self, tournament_id, tournament_data, league_id, player_increments, league_totals, update_ratings):
+        self.journal.append(
+            "save_complete", tournament_id, tournament_data=tournament_data, league_id=league_id,
+            player_increments=player_increments, league_totals=league_totals,
+        )
+        super().save_complete(tournament_id, tournament_data, league_id, player_increments, league_totals, update_ratings)
+
+
+def create_offline_repositories(offline_dir=None):
+    """
+    Build repositories over the prefetched event pack, with the journaled writes of earlier runs replayed.
+
+    Args:
+        offline_dir (str): Directory holding the pack and the journal (defaults to OFFLINE_DIR).
+
+    Returns:
+        Repositories: A (leagues, users, tournaments) named tuple.
+    """
+    paths = _paths(offline_dir)
+    try:
+        with open(paths["pack"], "r") as f:
+            pack = json.load(f)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"No event pack at {paths['pack']}; prefetch the event's leagues while online first.") from None
+
+    store = MemoryStore(seed=pack.get("collections", {}))
+    journal = _journal(paths)
+    tournaments = MemoryTournamentRepo(store)
+    for entry in journal.history():
+        _replay(tournaments, entry)
+    return Repositories(OfflineLeagueRepo(store), OfflineUserRepo(store), OfflineTournamentRepo(store, journal))
+
+
+# --- PREFETCH & MODE SWITCHING ---
+
+
+def prefetch_event_pack(league_ids, user_ids=(), offline_dir=None):
+    """
+    Copy everything an event needs from the current backend into the local event pack: the leagues, their
+    members and admins, and their duration profiles, ratings and career aggregates.
+
+    Args:
+        league_ids (list): The leagues that will run tournaments offline.
+        user_ids (iterable): Further users to include (e.g. the admin running the event).
+        offline_dir (str): Target directory (defaults to OFFLINE_DIR).
+
+    Returns:
+        dict: A success flag, a message and the league and user counts.
+    """
+    if offline_mode_active(offline_dir):
+        return {"success": False, "message": "Leave offline mode before prefetching a new event pack."}
+    try:
+        repositories = get_repositories()
+        leagues = {
+            league_id: league_data
+            for league_id, league_data in repositories.leagues.get_many(list(league_ids)).items()
+            if league_data
+        }
+        wanted = set(user_ids)
+        for league_data in leagues.values():
+            wanted.update(_member_ids(league_data))
+            wanted.update(league_data.get("admins") or [])
+            if league_data.get("super_admin"):
+                wanted.add(league_data["super_admin"])
+
+        collections = {"leagues": leagues, "users": {}}
+        for user_id in wanted:
+            user_data = repositories.users.get(user_id)
+            if user_data:
+                collections["users"][user_id] = user_data
+        for collection, method in PACK_LEAGUE_DOCUMENTS.items():
+            collections[collection] = {}
+            for league_id in leagues:
+                document = getattr(repositories.leagues, method)(league_id)
+                if document:
+                    collections[collection][league_id] = document
+
+        _write_json(_paths(offline_dir)["pack"], {
+            "prefetched_at": datetime.now(timezone.utc).isoformat(),
+            "league_ids": list(leagues),
+            "collections": collections,
+        })
+        return {
+            "success": True,
+            "message": f"Prefetched {len(leagues)} leagues and {len(collections['users'])} users for offline use.",
+            "leagues": len(leagues),
+            "users": len(collections["users"]),
+        }
+    except Exception as e:
+        return {"success": False, "message": f"Error prefetching the event pack: {e}"}
+
+
+def offline_pack_info(offline_dir=None):
+    """
+    Describe the local event pack.
+
+    Returns:
+        dict: prefetched_at and league_ids, or None if nothing was prefetched.
+    """
+    try:
+        with open(_paths(offline_dir)["pack"], "r") as f:
+            pack = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return {"prefetched_at": pack.get("prefetched_at"), "league_ids": pack.get("league_ids", [])}
+
+
+def offline_mode_active(offline_dir=None):
+    """
+    Return True while the app runs in offline event mode.
+    """
+    return os.path.exists(_paths(offline_dir)["active"])
+
+
+def pending_offline_writes(offline_dir=None):
+    """
+    Return the number of journaled writes not yet synced.
+    """
+    return len(_journal(_paths(offline_dir)).entries())
+
+
+def _switch_repositories(repositories):
+    # Let queued autosaves reach the backend they were made against, then drop what was cached from it
+    write_queue.flush(timeout=10)
+    set_repositories(repositories)
+    reset_storage_caches()
+    from utils.data_utils import firestore_get_duration_profile, firestore_get_league_aggregates, firestore_get_league_ratings
+
+    for cached in [firestore_get_duration_profile, firestore_get_league_aggregates, firestore_get_league_ratings]:
+        cached.clear()
+
+
+def enter_offline_mode(offline_dir=None):
+    """
+    Run this process against the event pack: reads are local, tournament writes are journaled.
+
+    Returns:
+        dict: A success flag and a message.
+    """
+    try:
+        repositories = create_offline_repositories(offline_dir)
+        _write_json(_paths(offline_dir)["active"], {"entered_at": datetime.now(timezone.utc).isoformat()})
+        _switch_repositories(repositories)
+        return {"success": True, "message": "Offline event mode is on; results are saved on this device."}
+    except Exception as e:
+        return {"success": False, "message": f"Error entering offline mode: {e}"}
+
+
+def exit_offline_mode(offline_dir=None, discard=False):
+    """
+    Switch back to the online backend. Refuses while journaled writes are unsynced, unless discard=True.
+
+    Returns:
+        dict: A success flag and a message.
+    """
+    try:
+        paths = _paths(offline_dir)
+        pending = pending_offline_writes(offline_dir)
+        if pending and not discard:
+            return {"success": False, "message": f"{pending} offline writes are not synced yet. Sync them first."}
+        repositories = create_repositories(SYNC_BACKEND)
+        _journal(paths).clear()
+        if os.path.exists(paths["active"]):
+            os.remove(paths["active"])
+        _switch_repositories(repositories)
+        return {"success": True, "message": "Back online."}
+    except Exception as e:
+        return {"success": False, "message": f"Error leaving offline mode: {e}"}
+
+
+# --- DEFERRED SYNC ---
+
+
+def _sync_conflicts(online, tournament_id, complete):
+    # Reasons the online backend no longer accepts this tournament as it was recorded offline
+    metadata = complete["args"]["tournament_data"].get("metadata", {})
+    league_id = complete["args"]["league_id"]
+    conflicts = []
+    if online.tournaments.get(tournament_id) is not None:
+        conflicts.append("a tournament with this ID was already saved online")
+    if league_id:
+        league_data = online.leagues.get(league_id)
+        if league_data is None:
+            conflicts.append(f"league {league_id} no longer exists")
+        else:
+            members = league_data.get("members") or {}
+            if isinstance(members, dict):
+                usernames = set(members.values())
+            else:
+                usernames = {(online.users.get(user_id) or {}).get("username") for user_id in members}
+            removed = [player for player in metadata.get("selected_players") or [] if player not in usernames]
+            if removed:
+                conflicts.append(f"no longer league members: {', '.join(removed)}")
+    return conflicts
+
+
+def sync_offline_journal(force=False, target=None, offline_dir=None):
+    """
+    Replay the offline journal against the online backend, one tournament at a time.
+
+    A completed tournament is saved once (its autosaves are superseded); one still in progress gets its
+    live header and games. A completed tournament is held back as a conflict when the online backend
+    already has a tournament with its ID, its league was deleted, or one of its players has left the
+    league; force=True saves it anyway (league aggregates and ratings still count it only once).
+    Synced entries are archived; conflicted and failed ones stay pending for another attempt.
+
+    Args:
+        force (bool): Save conflicting tournaments anyway.
+        target (Repositories): The backend to sync to (defaults to TOURNALYTICS_SYNC_STORAGE).
+        offline_dir (str): Directory holding the journal (defaults to OFFLINE_DIR).
+
+    Returns:
+        dict: A success flag, a message, and synced (tournament IDs), leagues (league IDs of synced
+        tournaments), conflicts and failed ({tournament_id: reason}).
+    """
+    journal = _journal(_paths(offline_dir))
+    synced, leagues, conflicts, failed = [], [], {}, {}
+    try:
+        write_queue.flush(timeout=10)
+        entries = journal.entries()
+        if not entries:
+            return {"success": True, "message": "Nothing to sync.", "synced": [], "leagues": [], "conflicts": {}, "failed": {}}
+        online = target or create_repositories(SYNC_BACKEND)
+
+        by_tournament = {}
+        for entry in entries:
+            by_tournament.setdefault(entry["tournament_id"], []).append(entry)
+
+        for tournament_id, tournament_entries in by_tournament.items():
+            complete = next((entry for entry in reversed(tournament_entries) if entry["op"] == "save_complete"), None)
+            try:
+                if complete is not None:
+                    reasons = _sync_conflicts(online, tournament_id, complete)
+                    if reasons and not force:
+                        conflicts[tournament_id] = "; ".join(reasons)
+                        continue
+                    _replay(online.tournaments, complete)
+                    if complete["args"]["league_id"]:
+                        leagues.append(complete["args"]["league_id"])
+                else:
+                    if online.tournaments.get(tournament_id) is not None and not force:
+                        conflicts[tournament_id] = "a tournament with this ID was already saved online"
+                        continue
+                    for entry in tournament_entries:
+                        _replay(online.tournaments, entry)
+                synced.append(tournament_id)
+            except Exception as e:
+                failed[tournament_id] = str(e)
+
+        journal.mark_synced(len(entries), set(synced))
+        message = f"Synced {len(synced)} tournaments"
+        if conflicts:
+            message += f", {len(conflicts)} held back as conflicts"
+        if failed:
+            message += f", {len(failed)} failed"
+        return {
+            "success": not conflicts and not failed,
+            "message": message + ".",
+            "synced": synced,
+            "leagues": list(dict.fromkeys(leagues)),
+            "conflicts": conflicts,
+            "failed": failed,
+        }
+    except Exception as e:
+        return {
+            "success": False, "message": f"Error syncing offline results: {e}",
+            "synced": synced, "leagues": leagues, "conflicts": conflicts, "failed": failed,
+        }
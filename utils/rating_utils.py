@@ -0,0 +1,188 @@
+import math
+import pandas as pd
+
+# Elo parameters: every player starts at DEFAULT_RATING; K_FACTOR is the maximum change per game
+DEFAULT_RATING = 1500.0
+K_FACTOR = 24.0
+
+
+def expected_score(rating, opponent_rating):
+    """
+    Expected score (win = 1, draw = 0.5) of a player against an opponent under the Elo model.
+
+    Args:
+        rating (float): The player's rating.
+        opponent_rating (float): The opponent's rating.
+
+    Returns:
+        float: Expected score between 0 and 1.
+    """
+    return 1.0 / (1.0 + 10 ** ((opponent_rating - rating) / 400.0))
+
+
+def margin_multiplier(goal_difference):
+    """
+    Scale the K factor by the margin of victory (World Football Elo convention).
+    """
+    goal_difference = abs(goal_difference)
+    if goal_difference <= 1:
+        return 1.0
+    if goal_difference == 2:
+        return 1.5
+    return (11.0 + goal_difference) / 8.0
+
+
+def get_rating(ratings, player):
+    """
+    Return a player's current rating, or the default for unrated players.
+    """
+    return ratings.get(player, {}).get("rating", DEFAULT_RATING)
+
+
+def update_ratings(ratings, home, away, home_goals, away_goals, k_factor=K_FACTOR):
+    """
+    Apply a single game result to the ratings in place (O(1) per game).
+
+    Args:
+        ratings (dict): Mapping of player -> {"rating": float, "games": int}.
+        home (str): Home player.
+        away (str): Away player.
+        home_goals (int): Goals scored by the home player.
+        away_goals (int): Goals scored by the away player.
+        k_factor (float): Maximum rating change for a one-goal game.
+
+    Returns:
+        dict: The updated ratings.
+    """
+    home_rating, away_rating = get_rating(ratings, home), get_rating(ratings, away)
+    home_score = 1.0 if home_goals > away_goals else 0.5 if home_goals == away_goals else 0.0
+
+    change = k_factor * margin_multiplier(home_goals - away_goals) * (home_score - expected_score(home_rating, away_rating))
+
+    for player, rating, delta in [(home, home_rating, change), (away, away_rating, -change)]:
+        entry = ratings.setdefault(player, {"rating": DEFAULT_RATING, "games": 0})
+        entry["rating"] = rating + delta  # Full precision keeps the updates zero-sum; tables round for display
+        entry["games"] = entry.get("games", 0) + 1
+    return ratings
+
+
+def _game_order(column):
+    # Sort game IDs by their number: playoff IDs are not zero-padded, so "Game10" must follow "Game9"
+    if column.name != "Game #":
+        return column
+    return pd.to_numeric(column.astype(str).str.extract(r"(\d+)\s*$", expand=False), errors="coerce")
+
+
+def order_tournament_games(tournament):
+    """
+    List a tournament's completed games in the order they were played (league first, then playoffs).
+
+    Args:
+        tournament (dict): Tournament with "results" and "playoff_results" (lists of dicts or DataFrames).
+
+    Returns:
+        list: (home, away, home_goals, away_goals) tuples in chronological order.
+    """
+    games = []
+    for key in ["results", "playoff_results"]:
+        stage = pd.DataFrame(tournament.get(key, []))
+        if stage.empty or not {"Home", "Away", "Home Goals", "Away Goals"}.issubset(stage.columns):
+            continue
+        stage = stage.dropna(subset=["Home Goals", "Away Goals"])
+        sort_columns = [column for column in ["Round", "Game #"] if column in stage.columns]
+        if sort_columns:
+            stage = stage.sort_values(sort_columns, kind="stable", key=_game_order)
+        games.extend(
+            zip(stage["Home"], stage["Away"], stage["Home Goals"].astype(int), stage["Away Goals"].astype(int))
+        )
+    return games
+
+
+def apply_tournament(ratings, tournament, k_factor=K_FACTOR):
+    """
+    Apply every game of a tournament to the ratings, game by game.
+
+    Args:
+        ratings (dict): Mapping of player -> {"rating": float, "games": int}. Updated in place.
+        tournament (dict): Tournament with "results" and "playoff_results".
+        k_factor (float): Maximum rating change for a one-goal game.
+
+    Returns:
+        dict: The updated ratings.
+    """
+    for home, away, home_goals, away_goals in order_tournament_games(tournament):
+        update_ratings(ratings, home, away, home_goals, away_goals, k_factor=k_factor)
+    return ratings
+
+
+def replay_ratings(tournaments, k_factor=K_FACTOR):
+    """
+    Rebuild ratings from scratch by replaying a league's full history in chronological order.
+
+    Args:
+        tournaments (list): Saved tournament dictionaries.
+        k_factor (float): Maximum rating change for a one-goal game.
+
+    Returns:
+        dict: Mapping of player -> {"rating": float, "games": int}.
+    """
+    ratings = {}
+    ordered = sorted(tournaments, key=lambda t: str(t.get("metadata", {}).get("event_date", "")))
+    for tournament in ordered:
+        apply_tournament(ratings, tournament, k_factor=k_factor)
+    return ratings
+
+
+def matchup_expected_score(ratings, player, opponent):
+    """
+    Elo expected score of player against opponent (win = 1, draw = 0.5). Not a win probability:
+    the model does not separate draws, so a likely draw reads as 50%.
+
+    Args:
+        ratings (dict): Mapping of player -> {"rating": float, "games": int}.
+        player (str): The player.
+        opponent (str): The opponent.
+
+    Returns:
+        float: Expected score between 0 and 1.
+    """
+    return expected_score(get_rating(ratings, player), get_rating(ratings, opponent))
+
+
+def seed_by_ratings(players, ratings):
+    """
+    Order players by rating, highest first (unrated players last, in their original order).
+
+    Args:
+        players (list): Players to seed.
+        ratings (dict): Mapping of player -> {"rating": float, "games": int}.
+
+    Returns:
+        list: Players sorted by rating.
+    """
+    return sorted(players, key=lambda player: -get_rating(ratings, player) if player in ratings else math.inf)
+
+
+def build_ratings_table(ratings):
+    """
+    Turn a ratings mapping into a display table.
+
+    Args:
+        ratings (dict): Mapping of player -> {"rating": float, "games": int}.
+
+    Returns:
+        pd.DataFrame: Rank, Player, Rating and Games, best first.
+    """
+    if not ratings:
+        return pd.DataFrame(columns=["Rank", "Player", "Rating", "Games"])
+    table = (
+        pd.DataFrame.from_dict(ratings, orient="index")
+        .rename_axis("Player")
+        .reset_index()
+        .rename(columns={"rating": "Rating", "games": "Games"})
+        .sort_values("Rating", ascending=False)
+        .reset_index(drop=True)
+    )
+    table["Rating"] = table["Rating"].round(1)
+    table["Rank"] = range(1, len(table) + 1)
+    return table[["Rank", "Player", "Rating", "Games"]]
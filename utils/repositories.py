@@ -0,0 +1,1101 @@
+import os
+import copy
+import json
+import uuid
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import pandas as pd
+from utils.analytics_utils import PLAYER_GAME_COLUMNS, build_player_game_table, aggregate_player_games
+from utils.encoding_utils import encode_tournament_document, decode_tournament_document
+
+# Storage backend used by get_repositories(): "firestore" (default), "memory", "sql" or "offline"
+STORAGE_BACKEND = os.getenv("TOURNALYTICS_STORAGE", "firestore")
+
+# SQLAlchemy URL for the "sql" backend (SQLite by default; Postgres works too)
+DATABASE_URL = os.getenv("TOURNALYTICS_DATABASE_URL", "sqlite:///tournalytics.db")
+
+# Optional JSON file ({"leagues": {...}, "users": {...}, "tournaments": {...}}) loaded into the memory backend
+MEMORY_SEED_PATH = os.getenv("TOURNALYTICS_MEMORY_SEED")
+
+Repositories = namedtuple("Repositories", ["leagues", "users", "tournaments"])
+
+# Maximum writes per Firestore batch
+FIRESTORE_BATCH_LIMIT = 500
+
+# Batches a bulk write commits in parallel
+BULK_WRITE_WORKERS = int(os.getenv("TOURNALYTICS_BULK_WRITE_WORKERS", "4"))
+
+# Metadata fields returned by the lightweight tournament listing
+TOURNAMENT_LISTING_FIELDS = ["tournament_id", "tournament_name", "event_date"]
+
+
+# --- REPOSITORY INTERFACES ---
+
+class AlreadyExistsError(Exception):
+    """
+    Raised by create-only writes when the document ID is already taken.
+    """
+
+
+class LeagueRepo:
+    """
+    Leagues and the per-league documents derived from them (duration profile, career aggregates, ratings).
+    """
+
+    def get(self, league_id):
+        """Return a league's data, or None if it does not exist."""
+        raise NotImplementedError
+
+    def get_many(self, league_ids):
+        """Return {league_id: data or None} for several leagues in one round trip."""
+        raise NotImplementedError
+
+    def get_all(self):
+        """Return {league_id: data} for every league."""
+        raise NotImplementedError
+
+    def watch_all(self, on_changes):
+        """
+        Stream changes to every league: on_changes({league_id: data, or None when deleted}) is called with
+        the whole collection first, then with each batch of changes. Returns an object with unsubscribe(),
+        or None when the backend cannot push changes (callers then poll get_all).
+        """
+        return None
+
+    def find_by_name(self, league_name):
+        """Return {league_id: data} for leagues with exactly this name."""
+        raise NotImplementedError
+
+    def list_for_admin(self, user_id):
+        """Return {league_id: data} for leagues the user administers (admin or super admin)."""
+        return {
+            league_id: league_data
+            for league_id, league_data in self.get_all().items()
+            if user_id in (league_data.get("admins") or []) or league_data.get("super_admin") == user_id
+        }
+
+    def list_for_member(self, user_id):
+        """Return {league_id: data} for leagues the user is a member of."""
+        return {
+            league_id: league_data
+            for league_id, league_data in self.get_all().items()
+            if user_id in (league_data.get("members") or [])
+        }
+
+    def add(self, league_data, league_id=None):
+        """
+        Create a league (stamping created_at) and return its ID; a new ID is generated when none is given.
+        Create-only: raises AlreadyExistsError if league_id is taken, so callers can retry with another ID.
+        """
+        raise NotImplementedError
+
+    def update(self, league_id, fields):
+        """Update top-level fields of an existing league."""
+        raise NotImplementedError
+
+    def change_members(self, league_id, add=None, remove=None):
+        """
+        Atomically add ({user_id: username}) and remove (user IDs) league members, updating the
+        league's members and each affected user's league_id list together, without a read-modify-write.
+        On Firestore, changes touching more users than fit in one transaction update the users in bulk
+        right after the league.
+        """
+        raise NotImplementedError
+
+    def get_duration_profile(self, league_id):
+        """Return the league's calibrated duration profile, or an empty dict."""
+        raise NotImplementedError
+
+    def save_duration_profile(self, league_id, profile):
+        """Store the league's calibrated duration profile."""
+        raise NotImplementedError
+
+    def get_aggregates(self, league_id):
+        """Return the league's career aggregate document, or an empty dict."""
+        raise NotImplementedError
+
+    def replace_aggregates(self, league_id, aggregates, players):
+        """Overwrite the aggregate document and the per-player aggregate documents."""
+        raise NotImplementedError
+
+    def get_ratings(self, league_id):
+        """Return the league's ratings document, or an empty dict."""
+        raise NotImplementedError
+
+    def set_ratings(self, league_id, ratings_doc):
+        """Overwrite the league's ratings document."""
+        raise NotImplementedError
+
+
+class UserRepo:
+    """
+    User metadata documents (authentication itself stays with Firebase Auth).
+    """
+
+    def get(self, user_id):
+        """Return a user's data, or None if it does not exist."""
+        raise NotImplementedError
+
+    def get_all(self):
+        """Return {user_id: data} for every user."""
+        raise NotImplementedError
+
+    def watch_all(self, on_changes):
+        """Stream changes to every user, like LeagueRepo.watch_all; None when the backend cannot push changes."""
+        return None
+
+    def find_by_email(self, email):
+        """Return (user_id, data) for the first user with this email, or (None, None)."""
+        raise NotImplementedError
+
+    def find_by_username(self, username):
+        """Return (user_id, data) for the first user with this username, or (None, None)."""
+        raise NotImplementedError
+
+    def create(self, user_id, user_data):
+        """Create or overwrite a user document (stamping created_at if missing)."""
+        raise NotImplementedError
+
+    def update_many(self, user_updates):
+        """
+        Apply {user_id: fields} updates in bulk.
+
+        Returns {"written": int, "failed": {user_id: error}}; a missing or failing user does not stop the others.
+        """
+        raise NotImplementedError
+
+
+class TournamentRepo:
+    """
+    Saved tournaments.
+    """
+
+    def list_by_league(self, league_id):
+        """Return a league's tournaments, each with an "update_time" ISO string."""
+        raise NotImplementedError
+
+    def list_timings_by_league(self, league_id):
+        """Return only "results", "playoff_results" and "metadata.half_duration" for a league's tournaments."""
+        raise NotImplementedError
+
+    def list_metadata_by_league(self, league_id):
+        """Return only "metadata" (tournament_id, tournament_name, event_date) and "update_time" for a league's tournaments."""
+        return [
+            {
+                "metadata": {field: t.get("metadata", {}).get(field) for field in TOURNAMENT_LISTING_FIELDS},
+                "update_time": t.get("update_time"),
+            }
+            for t in self.list_by_league(league_id)
+        ]
+
+    def get(self, tournament_id):
+        """Return one full tournament (with "update_time"), or None if it does not exist."""
+        raise NotImplementedError
+
+    def save_live_header(self, tournament_id, header):
+        """
+        Create or merge the header of an in-progress tournament (league_id, details, schedule, progress).
+        Ignored once the tournament was saved complete.
+        """
+        raise NotImplementedError
+
+    def save_live_games(self, tournament_id, games):
+        """
+        Upsert in-progress games, given as (stage, position, record) tuples, one small document each.
+        Ignored once the tournament was saved complete.
+        """
+        raise NotImplementedError
+
+    def delete_live_games(self, tournament_id, stage):
+        """Delete every in-progress game of a stage (e.g. when the playoffs are reset)."""
+        raise NotImplementedError
+
+    def load_live(self, tournament_id):
+        """Return {"header": dict, "games": [(stage, position, record), ...]} for an in-progress tournament, or None."""
+        raise NotImplementedError
+
+    def list_live(self, league_ids):
+        """Return {tournament_id: header} for the in-progress tournaments of these leagues."""
+        raise NotImplementedError
+
+    def _league_player_games(self, league_id):
+        frames = []
+        for tournament in self.list_by_league(league_id):
+            metadata = tournament.get("metadata", {})
+            for key, stage in [("results", "League"), ("playoff_results", "Playoff")]:
+                facts = build_player_game_table(pd.DataFrame(tournament.get(key, [])), stage=stage)
+                if facts.empty:
+                    continue
+                frames.append(facts.assign(
+                    tournament_id=metadata.get("tournament_id"), event_date=str(metadata.get("event_date", ""))
+                ))
+        if not frames:
+            return pd.DataFrame(columns=PLAYER_GAME_COLUMNS + ["tournament_id", "event_date"])
+        return pd.concat(
+            [frame.astype({"Player": str, "Opponent": str, "Result": str, "Match": str, "Stage": str}) for frame in frames],
+            ignore_index=True,
+        )
+
+    def player_history(self, league_id, player):
+        """Return a player's games in a league (player-game rows plus tournament_id and event_date), oldest first."""
+        facts = self._league_player_games(league_id)
+        return facts[facts["Player"] == player].sort_values(["event_date", "Game #"], kind="stable").reset_index(drop=True)
+
+    def player_totals(self, league_id, stage=None):
+        """Return per-player totals over a league's history (aggregate_player_games columns)."""
+        facts = self._league_player_games(league_id)
+        if stage:
+            facts = facts[facts["Stage"] == stage]
+        return aggregate_player_games(facts)
+
+    def save_complete(self, tournament_id, tournament_data, league_id, player_increments, league_totals, update_ratings):
+        """
+        Save a tournament and, atomically, fold it into the league's aggregates and ratings.
+        Its in-progress header and game documents are removed.
+
+        Args:
+            tournament_id (str): The tournament ID.
+            tournament_data (dict): The full tournament document.
+            league_id (str): The league ID (league updates are skipped when None).
+            player_increments (dict): Per-player career increments.
+            league_totals (dict): League-level increments.
+            update_ratings (callable): Takes the current ratings mapping and returns the updated one.
+        """
+        raise NotImplementedError
+
+
+# --- FIRESTORE IMPLEMENTATION ---
+
+def _watch_collection(collection_ref, on_changes):
+    # on_snapshot delivers every document as ADDED first, then only the documents that changed
+    def on_snapshot(snapshot, changes, read_time):
+        on_changes({
+            change.document.id: None if change.type.name == "REMOVED" else change.document.to_dict()
+            for change in changes
+        })
+
+    return collection_ref.on_snapshot(on_snapshot)
+
+
+class FirestoreBulkWriter:
+    """
+    Drop-in replacement for db.batch() without the 500-write cap.
+
+    Queued writes are split into FIRESTORE_BATCH_LIMIT chunks that commit concurrently on a bounded
+    thread pool. Chunks are independent (not atomic together); when one fails, its writes are retried
+    one by one so the result names exactly the documents that could not be written.
+    """
+
+    def __init__(self, db, chunk_size=FIRESTORE_BATCH_LIMIT, max_workers=BULK_WRITE_WORKERS):
+        self.db = db
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self._writes = []
+
+    def __len__(self):
+        return len(self._writes)
+
+    def set(self, ref, data, merge=False):
+        self._writes.append(("set", ref, data, {"merge": merge}))
+
+    def update(self, ref, data):
+        self._writes.append(("update", ref, data, {}))
+
+    def create(self, ref, data):
+        self._writes.append(("create", ref, data, {}))
+
+    def delete(self, ref):
+        self._writes.append(("delete", ref, None, {}))
+
+    @staticmethod
+    def _apply(writer, write):
+        method, ref, data, options = write
+        if method == "delete":
+            return writer.delete(ref)
+        return getattr(writer, method)(ref, data, **options)
+
+    def _commit_chunk(self, chunk):
+        try:
+            batch = self.db.batch()
+            for write in chunk:
+                self._apply(batch, write)
+            batch.commit()
+            return {}
+        except Exception:
+            # Find the offending documents: retry each write of the chunk on its own
+            failed = {}
+            for method, ref, data, options in chunk:
+                try:
+                    if method == "delete":
+                        ref.delete()
+                    else:
+                        getattr(ref, method)(data, **options)
+                except Exception as e:
+                    failed[ref.id] = str(e)
+            return failed
+
+    def commit(self):
+        """
+        Commit every queued write.
+
+        Returns:
+            dict: "written" (number of writes committed) and "failed" (document ID -> error message).
+        """
+        chunks = [self._writes[start:start + self.chunk_size] for start in range(0, len(self._writes), self.chunk_size)]
+        failed = {}
+        if len(chunks) == 1:
+            failed.update(self._commit_chunk(chunks[0]))
+        elif chunks:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(chunks))) as pool:
+                for chunk_failed in pool.map(self._commit_chunk, chunks):
+                    failed.update(chunk_failed)
+        written = len(self._writes) - len(failed)
+        self._writes = []
+        return {"written": written, "failed": failed}
+
+
+class FirestoreLeagueRepo(LeagueRepo):
+    def __init__(self, db, firestore):
+        self.db = db
+        self.firestore = firestore
+
+    def get(self, league_id):
+        doc = self.db.collection("leagues").document(league_id).get()
+        return doc.to_dict() if doc.exists else None
+
+    def get_many(self, league_ids):
+        doc_refs = [self.db.collection("leagues").document(league_id) for league_id in league_ids]
+        return {doc.id: doc.to_dict() if doc.exists else None for doc in self.db.get_all(doc_refs)}
+
+    def get_all(self):
+        return {league.id: league.to_dict() for league in self.db.collection("leagues").get()}
+
+    def watch_all(self, on_changes):
+        return _watch_collection(self.db.collection("leagues"), on_changes)
+
+    def find_by_name(self, league_name):
+        leagues = self.db.collection("leagues").where("league_name", "==", league_name).get()
+        return {league.id: league.to_dict() for league in leagues}
+
+    def _admin_index_ref(self, user_id):
+        return self.db.collection("user_admin_leagues").document(user_id)
+
+    def _index_admin_changes(self, writer, league_id, added, removed):
+        # Per-user "leagues I administer" index, written in the same batch/transaction as the league
+        for user_id in added:
+            writer.set(self._admin_index_ref(user_id), {"league_ids": self.firestore.ArrayUnion([league_id])}, merge=True)
+        for user_id in removed:
+            writer.set(self._admin_index_ref(user_id), {"league_ids": self.firestore.ArrayRemove([league_id])}, merge=True)
+
+    def list_for_admin(self, user_id):
+        index_doc = self._admin_index_ref(user_id).get()
+        if index_doc.exists and index_doc.to_dict().get("complete"):
+            league_ids = index_doc.to_dict().get("league_ids", [])
+            leagues = self.get_many(league_ids) if league_ids else {}
+            return {league_id: data for league_id, data in leagues.items() if data is not None}
+
+        # No complete index yet (e.g. leagues created before it existed): two indexed queries, merged here
+        leagues_ref = self.db.collection("leagues")
+        leagues = {league.id: league.to_dict() for league in leagues_ref.where("admins", "array_contains", user_id).get()}
+        for league in leagues_ref.where("super_admin", "==", user_id).get():
+            leagues.setdefault(league.id, league.to_dict())
+
+        # ArrayUnion keeps leagues indexed by concurrent writes while this backfill ran
+        self._admin_index_ref(user_id).set(
+            {"league_ids": self.firestore.ArrayUnion(list(leagues)), "complete": True}, merge=True
+        )
+        return leagues
+
+    def add(self, league_data, league_id=None):
+        collection = self.db.collection("leagues")
+        league_ref = collection.document(league_id) if league_id else collection.document()
+        from google.api_core.exceptions import AlreadyExists
+
+        batch = self.db.batch()
+        # create() carries an exists=False precondition: a taken ID fails the whole batch, index included
+        batch.create(league_ref, {**league_data, "created_at": self.firestore.SERVER_TIMESTAMP})
+        self._index_admin_changes(batch, league_ref.id, _league_administrators(league_data), set())
+        try:
+            batch.commit()
+        except AlreadyExists:
+            raise AlreadyExistsError(f"League {league_ref.id} already exists.")
+        return league_ref.id
+
+    def update(self, league_id, fields):
+        league_ref = self.db.collection("leagues").document(league_id)
+        if "admins" not in fields and "super_admin" not in fields:
+            league_ref.update(fields)
+            return
+
+        @self.firestore.transactional
+        def update_with_index(transaction):
+            league_doc = league_ref.get(transaction=transaction)
+            if not league_doc.exists:
+                raise KeyError(f"League {league_id} not found.")
+            before = _league_administrators(league_doc.to_dict())
+            after = _league_administrators({**league_doc.to_dict(), **fields})
+            transaction.update(league_ref, fields)
+            self._index_admin_changes(transaction, league_id, after - before, before - after)
+
+        update_with_index(self.db.transaction())
+
+    def change_members(self, league_id, add=None, remove=None):
+        add, remove = dict(add or {}), [user_id for user_id in (remove or []) if user_id not in (add or {})]
+        league_ref = self.db.collection("leagues").document(league_id)
+        users = self.db.collection("users")
+
+        @self.firestore.transactional
+        def change_with_users(transaction):
+            # Reads come first (Firestore transactions require it): the league, only to tell the members'
+            # shape, and removed members' user documents, which may belong to deleted accounts
+            league_doc = league_ref.get(transaction=transaction)
+            if not league_doc.exists:
+                raise KeyError(f"League {league_id} not found.")
+            removed_users = self.db.get_all([users.document(user_id) for user_id in remove], transaction=transaction) if remove else []
+
+            # Both member shapes are changed with server-side deltas
+            if isinstance(league_doc.to_dict().get("members"), list):
+                if add:
+                    transaction.update(league_ref, {"members": self.firestore.ArrayUnion(list(add))})
+                if remove:
+                    transaction.update(league_ref, {"members": self.firestore.ArrayRemove(remove)})
+            else:
+                member_path = lambda user_id: self.firestore.FieldPath("members", user_id).to_api_repr()
+                changes = {member_path(user_id): username for user_id, username in add.items()}
+                changes.update({member_path(user_id): self.firestore.DELETE_FIELD for user_id in remove})
+                transaction.update(league_ref, changes)
+            user_changes = [
+                (users.document(user_id), {"league_id": self.firestore.ArrayUnion([league_id])}) for user_id in add
+            ] + [
+                (user_doc.reference, {"league_id": self.firestore.ArrayRemove([league_id])})
+                for user_doc in removed_users if user_doc.exists
+            ]
+            if len(user_changes) + 2 > FIRESTORE_BATCH_LIMIT:
+                return user_changes  # Too many for one transaction: written in bulk once the league is changed
+            for user_ref, change in user_changes:
+                transaction.update(user_ref, change)
+            return []
+
+        user_changes = change_with_users(self.db.transaction())
+        if user_changes:
+            # The deltas are idempotent, so repeating the same change repairs any user listed as failed
+            writer = FirestoreBulkWriter(self.db)
+            for user_ref, change in user_changes:
+                writer.update(user_ref, change)
+            result = writer.commit()
+            if result["failed"]:
+                raise RuntimeError(f"League updated, but these users were not: {sorted(result['failed'])}")
+
+    def get_duration_profile(self, league_id):
+        doc = self.db.collection("duration_profiles").document(league_id).get()
+        return doc.to_dict() if doc.exists else {}
+
+    def save_duration_profile(self, league_id, profile):
+        self.db.collection("duration_profiles").document(league_id).set(
+            {**profile, "league_id": league_id, "updated_at": self.firestore.SERVER_TIMESTAMP}
+        )
+
+    def get_aggregates(self, league_id):
+        doc = self.db.collection("league_stats").document(league_id).get()
+        return doc.to_dict() if doc.exists else {}
+
+    def replace_aggregates(self, league_id, aggregates, players):
+        aggregate_ref = self.db.collection("league_stats").document(league_id)
+        writer = FirestoreBulkWriter(self.db)
+        writer.set(aggregate_ref, {**aggregates, "updated_at": self.firestore.SERVER_TIMESTAMP})
+
+        # Replace the per-player documents, removing players no longer present
+        for player_doc in aggregate_ref.collection("players").stream():
+            if player_doc.id not in players:
+                writer.delete(player_doc.reference)
+        for player_doc_id, player_data in players.items():
+            writer.set(aggregate_ref.collection("players").document(player_doc_id), player_data)
+        result = writer.commit()
+        if result["failed"]:
+            raise RuntimeError(f"Aggregates not written for {sorted(result['failed'])}: {next(iter(result['failed'].values()))}")
+
+    def get_ratings(self, league_id):
+        doc = self.db.collection("league_ratings").document(league_id).get()
+        return doc.to_dict() if doc.exists else {}
+
+    def set_ratings(self, league_id, ratings_doc):
+        self.db.collection("league_ratings").document(league_id).set(
+            {**ratings_doc, "updated_at": self.firestore.SERVER_TIMESTAMP}
+        )
+
+
+class FirestoreUserRepo(UserRepo):
+    def __init__(self, db, firestore):
+        self.db = db
+        self.firestore = firestore
+
+    def get(self, user_id):
+        doc = self.db.collection("users").document(user_id).get()
+        return doc.to_dict() if doc.exists else None
+
+    def get_all(self):
+        return {user.id: user.to_dict() for user in self.db.collection("users").get()}
+
+    def watch_all(self, on_changes):
+        return _watch_collection(self.db.collection("users"), on_changes)
+
+    def _find_by(self, field, value):
+        docs = self.db.collection("users").where(field, "==", value).limit(1).get()
+        return (docs[0].id, docs[0].to_dict()) if docs else (None, None)
+
+    def find_by_email(self, email):
+        return self._find_by("email", email)
+
+    def find_by_username(self, username):
+        return self._find_by("username", username)
+
+    def create(self, user_id, user_data):
+        self.db.collection("users").document(user_id).set(
+            {"created_at": self.firestore.SERVER_TIMESTAMP, **user_data}
+        )
+
+    def update_many(self, user_updates):
+        writer = FirestoreBulkWriter(self.db)
+        for user_id, updates in user_updates.items():
+            writer.update(self.db.collection("users").document(user_id), updates)
+        return writer.commit()
+
+
+class FirestoreTournamentRepo(TournamentRepo):
+    def __init__(self, db, firestore):
+        self.db = db
+        self.firestore = firestore
+
+    def list_by_league(self, league_id):
+        tournaments_ref = self.db.collection("tournaments").where("metadata.league_id", "==", league_id).stream()
+        # Keep the update time so cached analyses can be invalidated
+        return [
+            {**decode_tournament_document(doc.to_dict()), "update_time": doc.update_time.isoformat() if doc.update_time else None}
+            for doc in tournaments_ref
+        ]
+
+    def list_metadata_by_league(self, league_id):
+        # Projected query: the results, playoff results and standings arrays are never transferred
+        tournaments_ref = (
+            self.db.collection("tournaments")
+            .where("metadata.league_id", "==", league_id)
+            .select([f"metadata.{field}" for field in TOURNAMENT_LISTING_FIELDS])
+            .stream()
+        )
+        return [
+            {**doc.to_dict(), "update_time": doc.update_time.isoformat() if doc.update_time else None}
+            for doc in tournaments_ref
+        ]
+
+    def get(self, tournament_id):
+        doc = self.db.collection("tournaments").document(tournament_id).get()
+        if not doc.exists:
+            return None
+        return {**decode_tournament_document(doc.to_dict()), "update_time": doc.update_time.isoformat() if doc.update_time else None}
+
+    def save_live_header(self, tournament_id, header):
+        # Kept under "live" (no "metadata"), so league queries ignore the tournament until it is saved complete
+        doc_ref = self.db.collection("tournaments").document(tournament_id)
+
+        @self.firestore.transactional
+        def write_header(transaction):
+            # Only the metadata field is read: present once the tournament was saved complete
+            saved = doc_ref.get(field_paths=["metadata"], transaction=transaction)
+            if saved.exists and "metadata" in (saved.to_dict() or {}):
+                return  # A late autosave must not make a finished tournament resumable again
+            transaction.set(doc_ref, {"live": {**header, "updated_at": self.firestore.SERVER_TIMESTAMP}}, merge=True)
+
+        write_header(self.db.transaction())
+
+    def save_live_games(self, tournament_id, games):
+        doc_ref = self.db.collection("tournaments").document(tournament_id)
+        games_ref = doc_ref.collection("games")
+
+        @self.firestore.transactional
+        def write_games(transaction, chunk):
+            # save_complete deletes the games: a late autosave must not write them back as orphans
+            saved = doc_ref.get(field_paths=["metadata"], transaction=transaction)
+            if saved.exists and "metadata" in (saved.to_dict() or {}):
+                return
+            for stage, position, record in chunk:
+                transaction.set(games_ref.document(live_game_id(stage, record)), {
+                    "stage": stage,
+                    "position": position,
+                    "record": record,
+                    "updated_at": self.firestore.SERVER_TIMESTAMP,
+                })
+
+        games = list(games)
+        for start in range(0, len(games), FIRESTORE_BATCH_LIMIT):
+            write_games(self.db.transaction(), games[start:start + FIRESTORE_BATCH_LIMIT])
+
+    def delete_live_games(self, tournament_id, stage):
+        games_ref = self.db.collection("tournaments").document(tournament_id).collection("games")
+        writer = FirestoreBulkWriter(self.db)
+        for game_doc in games_ref.where("stage", "==", stage).stream():
+            writer.delete(game_doc.reference)
+        result = writer.commit()
+        if result["failed"]:
+            raise RuntimeError(f"Games not deleted: {sorted(result['failed'])}")
+
+    def load_live(self, tournament_id):
+        tournament_ref = self.db.collection("tournaments").document(tournament_id)
+        header_doc = tournament_ref.get()
+        if not header_doc.exists or "live" not in header_doc.to_dict():
+            return None
+        # One query returns every game document of the tournament
+        games = [game_doc.to_dict() for game_doc in tournament_ref.collection("games").stream()]
+        return {
+            "header": header_doc.to_dict()["live"],
+            "games": [(game["stage"], game["position"], game["record"]) for game in games],
+        }
+
+    def list_live(self, league_ids):
+        live = {}
+        league_ids = list(league_ids)
+        # Firestore "in" filters take at most 30 values
+        for start in range(0, len(league_ids), 30):
+            query = self.db.collection("tournaments").where("live.league_id", "in", league_ids[start:start + 30])
+            for doc in query.select(["live.league_id", "live.details", "live.progress"]).stream():
+                live[doc.id] = doc.to_dict()["live"]
+        return live
+
+    def list_timings_by_league(self, league_id):
+        # A single projected query: only the results tables (with the fields needed to decode them) and the half duration are transferred
+        tournaments_ref = (
+            self.db.collection("tournaments")
+            .where("metadata.league_id", "==", league_id)
+            .select(["results", "playoff_results", "metadata.half_duration", "format", "tournament_id", "players"])
+            .stream()
+        )
+        return [decode_tournament_document(doc.to_dict()) for doc in tournaments_ref]
+
+    def save_complete(self, tournament_id, tournament_data, league_id, player_increments, league_totals, update_ratings):
+        firestore = self.firestore
+        doc_ref = self.db.collection("tournaments").document(tournament_id)
+        aggregate_ref = self.db.collection("league_stats").document(league_id) if league_id else None
+        ratings_ref = self.db.collection("league_ratings").document(league_id) if league_id else None
+
+        @firestore.transactional
+        def write_tournament(transaction):
+            # All reads happen before the writes, as Firestore transactions require
+            already_counted, ratings_data = False, {}
+            if aggregate_ref is not None:
+                aggregate_doc = aggregate_ref.get(transaction=transaction)
+                already_counted = aggregate_doc.exists and tournament_id in (
+                    aggregate_doc.to_dict().get("tournament_ids", [])
+                )
+                ratings_doc = ratings_ref.get(transaction=transaction)
+                ratings_data = ratings_doc.to_dict() if ratings_doc.exists else {}
+
+            transaction.set(doc_ref, encode_tournament_document(tournament_data))
+
+            if ratings_ref is not None and tournament_id not in ratings_data.get("tournament_ids", []):
+                transaction.set(ratings_ref, {
+                    "league_id": league_id,
+                    "ratings": update_ratings(ratings_data.get("ratings", {})),
+                    "tournament_ids": ratings_data.get("tournament_ids", []) + [tournament_id],
+                    "updated_at": firestore.SERVER_TIMESTAMP,
+                })
+
+            if aggregate_ref is not None and not already_counted:
+                # Server-side increments, so concurrent saves for the same league never lose updates
+                transaction.set(
+                    aggregate_ref,
+                    {
+                        "league_id": league_id,
+                        **{field: firestore.Increment(value) for field, value in league_totals.items()},
+                        "tournament_ids": firestore.ArrayUnion([tournament_id]),
+                        "players": {
+                            player: {field: firestore.Increment(value) for field, value in stats.items()}
+                            for player, stats in player_increments.items()
+                        },
+                        "updated_at": firestore.SERVER_TIMESTAMP,
+                    },
+                    merge=True,
+                )
+                for player_doc_id, (player, stats) in _player_documents(player_increments).items():
+                    transaction.set(
+                        aggregate_ref.collection("players").document(player_doc_id),
+                        {
+                            "player": player,
+                            "league_id": league_id,
+                            **{field: firestore.Increment(value) for field, value in stats.items()},
+                        },
+                        merge=True,
+                    )
+
+        write_tournament(self.db.transaction())
+
+        # The saved results replace the in-progress game documents
+        writer = FirestoreBulkWriter(self.db)
+        for game_doc in doc_ref.collection("games").stream():
+            writer.delete(game_doc.reference)
+        result = writer.commit()
+        if result["failed"]:
+            # Raised so a queued save is retried; the tournament_ids guards keep it idempotent
+            raise RuntimeError(f"In-progress games of {tournament_id} not deleted: {sorted(result['failed'])}")
+
+
+# --- IN-MEMORY IMPLEMENTATION ---
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def live_game_id(stage, record):
+    """
+    Document ID of an in-progress game: one per stage and game number, so re-entering a result overwrites it.
+    """
+    return f"{stage}_{record.get('Game #')}".replace("/", "-")
+
+
+def _league_administrators(league_data):
+    # Everyone who may administer a league: its admins plus the super admin
+    administrators = set(league_data.get("admins") or [])
+    if league_data.get("super_admin"):
+        administrators.add(league_data["super_admin"])
+    return administrators
+
+
+def player_document_id(player):
+    """
+    Build a document-safe ID for a player name.
+    """
+    return str(player).replace("/", "_").strip() or "unknown"
+
+
+def _player_documents(player_increments):
+    return {player_document_id(player): (player, stats) for player, stats in player_increments.items()}
+
+
+class MemoryStore:
+    """
+    Process-local document store shared by the in-memory repositories.
+
+    Documents are deep-copied on the way in and out, so callers cannot mutate stored state
+    (matching Firestore semantics), and every operation holds one lock (so multi-document
+    updates are atomic).
+    """
+
+    def __init__(self, seed=None):
+        self.lock = threading.RLock()
+        self.collections = {name: {} for name in [
+            "leagues", "users", "tournaments", "duration_profiles", "league_stats", "league_ratings",
+            "live_tournaments",
+        ]}
+        self.live_games = {}  # tournament_id -> {game document ID: (stage, position, record)}
+        self.league_player_stats = {}  # league_id -> {player_doc_id: data}
+        self.update_times = {}  # tournament_id -> datetime
+        for name, documents in (seed or {}).items():
+            self.collections.setdefault(name, {}).update(copy.deepcopy(documents))
+        # Seeded tournaments get one fixed update time, so update-time keyed caches can hit
+        seeded_at = _now()
+        self.update_times.update({tournament_id: seeded_at for tournament_id in self.collections["tournaments"]})
+
+    def read(self, collection, doc_id):
+        with self.lock:
+            document = self.collections[collection].get(doc_id)
+            return copy.deepcopy(document)
+
+    def write(self, collection, doc_id, data):
+        with self.lock:
+            self.collections[collection][doc_id] = copy.deepcopy(data)
+
+    def scan(self, collection, predicate=None):
+        with self.lock:
+            return {
+                doc_id: copy.deepcopy(data)
+                for doc_id, data in self.collections[collection].items()
+                if predicate is None or predicate(data)
+            }
+
+
+def _merge_increments(document, increments):
+    for field, value in increments.items():
+        document[field] = document.get(field, 0) + value
+    return document
+
+
+class MemoryLeagueRepo(LeagueRepo):
+    def __init__(self, store):
+        self.store = store
+
+    def get(self, league_id):
+        return self.store.read("leagues", league_id)
+
+    def get_many(self, league_ids):
+        return {league_id: self.store.read("leagues", league_id) for league_id in league_ids}
+
+    def get_all(self):
+        return self.store.scan("leagues")
+
+    def find_by_name(self, league_name):
+        return self.store.scan("leagues", lambda league: league.get("league_name") == league_name)
+
+    def add(self, league_data, league_id=None):
+        league_id = league_id or uuid.uuid4().hex[:20]
+        with self.store.lock:
+            if league_id in self.store.collections["leagues"]:
+                raise AlreadyExistsError(f"League {league_id} already exists.")
+            self.store.write("leagues", league_id, {**league_data, "created_at": _now()})
+        return league_id
+
+    def update(self, league_id, fields):
+        with self.store.lock:
+            league = self.store.collections["leagues"].get(league_id)
+            if league is None:
+                raise KeyError(f"League {league_id} not found.")
+            league.update(copy.deepcopy(fields))
+
+    def change_members(self, league_id, add=None, remove=None):
+        add, remove = dict(add or {}), [user_id for user_id in (remove or []) if user_id not in (add or {})]
+        with self.store.lock:
+            users = self.store.collections["users"]
+            missing = [user_id for user_id in add if user_id not in users]
+            if league_id not in self.store.collections["leagues"] or missing:
+                raise KeyError(f"League {league_id} or users {missing} not found.")
+            league = self.store.collections["leagues"][league_id]
+            members = league.get("members") or {}
+            if isinstance(members, list):
+                league["members"] = [user_id for user_id in dict.fromkeys(members + list(add)) if user_id not in remove]
+            else:
+                league["members"] = {
+                    user_id: username for user_id, username in {**members, **add}.items() if user_id not in remove
+                }
+            for user_id in add:
+                league_ids = users[user_id].get("league_id") or []
+                users[user_id]["league_id"] = league_ids + [league_id] if league_id not in league_ids else list(league_ids)
+            for user_id in remove:
+                if user_id in users:
+                    users[user_id]["league_id"] = [lid for lid in users[user_id].get("league_id") or [] if lid != league_id]
+
+    def get_duration_profile(self, league_id):
+        return self.store.read("duration_profiles", league_id) or {}
+
+    def save_duration_profile(self, league_id, profile):
+        self.store.write("duration_profiles", league_id, {**profile, "league_id": league_id, "updated_at": _now()})
+
+    def get_aggregates(self, league_id):
+        return self.store.read("league_stats", league_id) or {}
+
+    def replace_aggregates(self, league_id, aggregates, players):
+        with self.store.lock:
+            self.store.write("league_stats", league_id, {**aggregates, "updated_at": _now()})
+            self.store.league_player_stats[league_id] = copy.deepcopy(players)
+
+    def get_ratings(self, league_id):
+        return self.store.read("league_ratings", league_id) or {}
+
+    def set_ratings(self, league_id, ratings_doc):
+        self.store.write("league_ratings", league_id, {**ratings_doc, "updated_at": _now()})
+
+
+class MemoryUserRepo(UserRepo):
+    def __init__(self, store):
+        self.store = store
+
+    def get(self, user_id):
+        return self.store.read("users", user_id)
+
+    def get_all(self):
+        return self.store.scan("users")
+
+    def _find_by(self, field, value):
+        matches = self.store.scan("users", lambda user: user.get(field) == value)
+        return next(iter(matches.items()), (None, None))
+
+    def find_by_email(self, email):
+        return self._find_by("email", email)
+
+    def find_by_username(self, username):
+        return self._find_by("username", username)
+
+    def create(self, user_id, user_data):
+        self.store.write("users", user_id, {"created_at": _now(), **user_data})
+
+    def update_many(self, user_updates):
+        with self.store.lock:
+            missing = [user_id for user_id in user_updates if user_id not in self.store.collections["users"]]
+            for user_id, updates in user_updates.items():
+                if user_id not in missing:
+                    self.store.collections["users"][user_id].update(copy.deepcopy(updates))
+        return {"written": len(user_updates) - len(missing), "failed": {user_id: "User not found." for user_id in missing}}
+
+
+class MemoryTournamentRepo(TournamentRepo):
+    def __init__(self, store):
+        self.store = store
+
+    def list_by_league(self, league_id):
+        with self.store.lock:
+            tournaments = self.store.scan(
+                "tournaments", lambda t: t.get("metadata", {}).get("league_id") == league_id
+            )
+            return [
+                {**tournament, "update_time": self.store.update_times[tournament_id].isoformat()}
+                for tournament_id, tournament in tournaments.items()
+            ]
+
+    def get(self, tournament_id):
+        with self.store.lock:
+            tournament = self.store.read("tournaments", tournament_id)
+            if tournament is None:
+                return None
+            return {**tournament, "update_time": self.store.update_times[tournament_id].isoformat()}
+
+    def save_live_header(self, tournament_id, header):
+        with self.store.lock:
+            if tournament_id in self.store.collections["tournaments"]:
+                return  # Saved complete: a late autosave must not make it resumable again
+            current = self.store.read("live_tournaments", tournament_id) or {}
+            for field, value in header.items():
+                current[field] = {**current[field], **value} if isinstance(value, dict) and isinstance(current.get(field), dict) else value
+            self.store.write("live_tournaments", tournament_id, {**current, "updated_at": _now()})
+
+    def save_live_games(self, tournament_id, games):
+        with self.store.lock:
+            if tournament_id in self.store.collections["tournaments"]:
+                return  # Saved complete: a late autosave must not write the games back
+            stored = self.store.live_games.setdefault(tournament_id, {})
+            for stage, position, record in games:
+                stored[live_game_id(stage, record)] = (stage, position, copy.deepcopy(record))
+
+    def delete_live_games(self, tournament_id, stage):
+        with self.store.lock:
+            stored = self.store.live_games.get(tournament_id, {})
+            for game_id in [game_id for game_id, game in stored.items() if game[0] == stage]:
+                del stored[game_id]
+
+    def load_live(self, tournament_id):
+        with self.store.lock:
+            header = self.store.read("live_tournaments", tournament_id)
+            if header is None:
+                return None
+            return {"header": header, "games": copy.deepcopy(list(self.store.live_games.get(tournament_id, {}).values()))}
+
+    def list_live(self, league_ids):
+        return self.store.scan("live_tournaments", lambda header: header.get("league_id") in league_ids)
+
+    def list_timings_by_league(self, league_id):
+        return [
+            {
+                "results": tournament.get("results", []),
+                "playoff_results": tournament.get("playoff_results", []),
+                "metadata": {"half_duration": tournament.get("metadata", {}).get("half_duration")},
+            }
+            for tournament in self.list_by_league(league_id)
+        ]
+
+    def save_complete(self, tournament_id, tournament_data, league_id, player_increments, league_totals, update_ratings):
+        with self.store.lock:
+            self.store.write("tournaments", tournament_id, tournament_data)
+            self.store.update_times[tournament_id] = _now()
+            self.store.collections["live_tournaments"].pop(tournament_id, None)  # No longer in progress
+            self.store.live_games.pop(tournament_id, None)
+            if not league_id:
+                return
+
+            ratings_data = self.store.read("league_ratings", league_id) or {}
+            if tournament_id not in ratings_data.get("tournament_ids", []):
+                self.store.write("league_ratings", league_id, {
+                    "league_id": league_id,
+                    "ratings": update_ratings(ratings_data.get("ratings", {})),
+                    "tournament_ids": ratings_data.get("tournament_ids", []) + [tournament_id],
+                    "updated_at": _now(),
+                })
+
+            aggregates = self.store.read("league_stats", league_id) or {"league_id": league_id}
+            if tournament_id in aggregates.get("tournament_ids", []):
+                return
+            _merge_increments(aggregates, league_totals)
+            aggregates["tournament_ids"] = aggregates.get("tournament_ids", []) + [tournament_id]
+            players = aggregates.setdefault("players", {})
+            for player, stats in player_increments.items():
+                _merge_increments(players.setdefault(player, {}), stats)
+            aggregates["updated_at"] = _now()
+            self.store.write("league_stats", league_id, aggregates)
+
+            player_docs = self.store.league_player_stats.setdefault(league_id, {})
+            for player_doc_id, (player, stats) in _player_documents(player_increments).items():
+                document = player_docs.setdefault(player_doc_id, {"player": player, "league_id": league_id})
+                _merge_increments(document, stats)
+
+
+# --- BACKEND SELECTION ---
+
+_repositories = None
+_repositories_lock = threading.Lock()
+
+
+def create_repositories(backend):
+    """
+    Build the league, user and tournament repositories for a storage backend.
+
+    Args:
+        backend (str): "firestore", "memory", "sql" or "offline" (the prefetched event pack, see offline_utils).
+
+    Returns:
+        Repositories: A (leagues, users, tournaments) named tuple.
+    """
+    if backend == "memory":
+        seed = None
+        if MEMORY_SEED_PATH:
+            with open(MEMORY_SEED_PATH, "r") as f:
+                seed = json.load(f)
+        store = MemoryStore(seed=seed)
+        return Repositories(MemoryLeagueRepo(store), MemoryUserRepo(store), MemoryTournamentRepo(store))
+
+    if backend == "firestore":
+        import firebase_admin
+        from firebase_admin import firestore
+
+        if not firebase_admin._apps:
+            firebase_admin.initialize_app()
+        db = firestore.client()
+        return Repositories(
+            FirestoreLeagueRepo(db, firestore), FirestoreUserRepo(db, firestore), FirestoreTournamentRepo(db, firestore)
+        )
+
+    if backend == "sql":
+        from utils.sql_repositories import create_sql_repositories
+
+        return create_sql_repositories(DATABASE_URL)
+
+    if backend == "offline":
+        from utils.offline_utils import create_offline_repositories
+
+        return create_offline_repositories()
+
+    raise ValueError(f"Unknown storage backend '{backend}'. Choose 'firestore', 'memory', 'sql' or 'offline'.")
+
+
+def get_repositories():
+    """
+    Return the process-wide repositories for the configured backend (TOURNALYTICS_STORAGE), or the
+    offline backend if the process was restarted in the middle of an offline event.
+
+    Returns:
+        Repositories: A (leagues, users, tournaments) named tuple.
+    """
+    global _repositories
+    with _repositories_lock:
+        if _repositories is None:
+            from utils.offline_utils import offline_mode_active
+
+            _repositories = create_repositories("offline" if offline_mode_active() else STORAGE_BACKEND)
+        return _repositories
+
+
+def set_repositories(repositories):
+    """
+    Replace the process-wide repositories (e.g. with a seeded memory backend for benchmarks).
+
+    Args:
+        repositories (Repositories): The repositories to use from now on.
+    """
+    global _repositories
+    with _repositories_lock:
+        _repositories = repositories
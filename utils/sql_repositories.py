@@ -0,0 +1,871 @@
+import os
+import math
+from datetime import datetime, timezone
+import pandas as pd
+import sqlalchemy as sa
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.dialects import postgresql, sqlite
+from utils.analytics_utils import build_player_game_table
+from utils.repositories import (
+    Repositories,
+    LeagueRepo,
+    UserRepo,
+    TournamentRepo,
+    AlreadyExistsError,
+    player_document_id,
+    live_game_id,
+    TOURNAMENT_LISTING_FIELDS,
+)
+
+# Connection pool sizing for server databases (ignored for in-memory SQLite)
+POOL_SIZE = int(os.getenv("TOURNALYTICS_DB_POOL_SIZE", "5"))
+MAX_OVERFLOW = int(os.getenv("TOURNALYTICS_DB_MAX_OVERFLOW", "10"))
+
+
+# --- SCHEMA ---
+
+metadata = sa.MetaData()
+
+users_table = sa.Table(
+    "users", metadata,
+    sa.Column("user_id", sa.String(128), primary_key=True),
+    sa.Column("username", sa.String(128), index=True),
+    sa.Column("email", sa.String(320), index=True),
+    sa.Column("role", sa.String(32)),
+    sa.Column("data", sa.JSON, nullable=False),
+    sa.Column("created_at", sa.DateTime(timezone=True)),
+)
+
+leagues_table = sa.Table(
+    "leagues", metadata,
+    sa.Column("league_id", sa.String(128), primary_key=True),
+    sa.Column("league_name", sa.String(256), index=True),
+    sa.Column("league_type", sa.String(32)),
+    sa.Column("super_admin", sa.String(128), index=True),
+    sa.Column("data", sa.JSON, nullable=False),
+    sa.Column("created_at", sa.DateTime(timezone=True)),
+)
+
+league_admins_table = sa.Table(
+    "league_admins", metadata,
+    sa.Column("league_id", sa.String(128), primary_key=True),
+    sa.Column("user_id", sa.String(128), primary_key=True, index=True),
+)
+
+memberships_table = sa.Table(
+    "memberships", metadata,
+    sa.Column("league_id", sa.String(128), primary_key=True),
+    sa.Column("user_id", sa.String(128), primary_key=True, index=True),
+    sa.Column("username", sa.String(128)),
+)
+
+tournaments_table = sa.Table(
+    "tournaments", metadata,
+    sa.Column("tournament_id", sa.String(128), primary_key=True),
+    sa.Column("league_id", sa.String(128), index=True),
+    sa.Column("tournament_name", sa.String(256)),
+    sa.Column("event_date", sa.String(32)),
+    sa.Column("document", sa.JSON, nullable=False),  # metadata and standings
+    sa.Column("update_time", sa.DateTime(timezone=True)),
+)
+
+games_table = sa.Table(
+    "games", metadata,
+    sa.Column("tournament_id", sa.String(128), primary_key=True),
+    sa.Column("stage", sa.String(16), primary_key=True),
+    sa.Column("position", sa.Integer, primary_key=True),  # original order within the stage
+    sa.Column("league_id", sa.String(128), index=True),
+    sa.Column("game_no", sa.String(32)),
+    sa.Column("round", sa.Float),
+    sa.Column("match", sa.String(32)),
+    sa.Column("home", sa.String(128)),
+    sa.Column("away", sa.String(128)),
+    sa.Column("home_goals", sa.Integer),
+    sa.Column("away_goals", sa.Integer),
+    sa.Column("home_xg", sa.Float),
+    sa.Column("away_xg", sa.Float),
+    sa.Column("extra", sa.JSON),  # every other result column (teams, console, timestamps, ...)
+    sa.Index("ix_games_tournament_id", "tournament_id"),
+)
+
+# One row per player per completed game (the player-game fact table), for per-player history and SQL aggregates
+results_table = sa.Table(
+    "results", metadata,
+    sa.Column("tournament_id", sa.String(128), primary_key=True),
+    sa.Column("stage", sa.String(16), primary_key=True),
+    sa.Column("game_no", sa.String(32), primary_key=True),
+    sa.Column("player", sa.String(128), primary_key=True),
+    sa.Column("league_id", sa.String(128)),
+    sa.Column("opponent", sa.String(128)),
+    sa.Column("goals_for", sa.Integer),
+    sa.Column("goals_against", sa.Integer),
+    sa.Column("xg_for", sa.Float),
+    sa.Column("xg_against", sa.Float),
+    sa.Column("result", sa.String(1)),
+    sa.Column("points", sa.Integer),
+    sa.Column("round", sa.Float),
+    sa.Column("match", sa.String(32)),
+    sa.Index("ix_results_league_id_player", "league_id", "player"),
+    sa.Index("ix_results_tournament_id", "tournament_id"),
+)
+
+# Per-league documents: "duration_profile", "aggregates" and "ratings"
+league_documents_table = sa.Table(
+    "league_documents", metadata,
+    sa.Column("league_id", sa.String(128), primary_key=True),
+    sa.Column("kind", sa.String(32), primary_key=True),
+    sa.Column("data", sa.JSON, nullable=False),
+    sa.Column("updated_at", sa.DateTime(timezone=True)),
+)
+
+# In-progress tournaments: a header row plus one small row per game, written as results are entered
+live_tournaments_table = sa.Table(
+    "live_tournaments", metadata,
+    sa.Column("tournament_id", sa.String(128), primary_key=True),
+    sa.Column("league_id", sa.String(128), index=True),
+    sa.Column("header", sa.JSON, nullable=False),
+    sa.Column("updated_at", sa.DateTime(timezone=True)),
+)
+
+live_games_table = sa.Table(
+    "live_games", metadata,
+    sa.Column("tournament_id", sa.String(128), primary_key=True),
+    sa.Column("game_id", sa.String(160), primary_key=True),
+    sa.Column("stage", sa.String(16)),
+    sa.Column("position", sa.Integer),
+    sa.Column("record", sa.JSON, nullable=False),
+    sa.Column("updated_at", sa.DateTime(timezone=True)),
+)
+
+league_player_stats_table = sa.Table(
+    "league_player_stats", metadata,
+    sa.Column("league_id", sa.String(128), primary_key=True),
+    sa.Column("player_doc_id", sa.String(128), primary_key=True),
+    sa.Column("data", sa.JSON, nullable=False),
+)
+
+# Result columns stored in their own games columns; anything else goes to "extra"
+GAME_COLUMNS = {
+    "Game #": "game_no",
+    "Round": "round",
+    "Match": "match",
+    "Home": "home",
+    "Away": "away",
+    "Home Goals": "home_goals",
+    "Away Goals": "away_goals",
+    "Home xG": "home_xg",
+    "Away xG": "away_xg",
+}
+STAGE_KEYS = {"League": "results", "Playoff": "playoff_results"}
+
+
+# --- HELPERS ---
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def _jsonable(value):
+    """
+    Make a document JSON-safe: NaN becomes None and dates/other objects become strings.
+    """
+    if isinstance(value, dict):
+        return {str(key): _jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    if isinstance(value, float):
+        return None if math.isnan(value) else value
+    if value is None or isinstance(value, (str, int, bool)):
+        return value
+    if hasattr(value, "item"):  # numpy scalars
+        return _jsonable(value.item())
+    return str(value)
+
+
+def _clean(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    return value
+
+
+def _number(value, cast=float):
+    value = _clean(value)
+    try:
+        return cast(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _member_mapping(members):
+    # Members are stored either as a list of user IDs or a {user_id: username} mapping
+    if isinstance(members, dict):
+        return dict(members)
+    return {user_id: "" for user_id in (members or [])}
+
+
+# Dialects with INSERT ... ON CONFLICT; others fall back to delete-then-insert
+_CONFLICT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+def _upsert(connection, table, keys, values):
+    # A single INSERT ... ON CONFLICT DO UPDATE: two transactions creating the same row both succeed
+    insert = _CONFLICT_INSERTS.get(connection.dialect.name)
+    if insert is None:
+        connection.execute(table.delete().where(sa.and_(*[table.c[key] == value for key, value in keys.items()])))
+        connection.execute(table.insert().values(**keys, **values))
+        return
+    connection.execute(insert(table).values(**keys, **values).on_conflict_do_update(index_elements=list(keys), set_=values))
+
+
+def _insert_missing(connection, table, keys, values):
+    # Create the row unless it exists, so a following SELECT ... FOR UPDATE has a row to lock
+    insert = _CONFLICT_INSERTS.get(connection.dialect.name)
+    if insert is not None:
+        connection.execute(insert(table).values(**keys, **values).on_conflict_do_nothing(index_elements=list(keys)))
+        return
+    exists = connection.execute(
+        sa.select(*[table.c[key] for key in keys]).where(sa.and_(*[table.c[key] == value for key, value in keys.items()]))
+    ).first()
+    if exists is None:
+        connection.execute(table.insert().values(**keys, **values))
+
+
+def _game_rows(tournament_id, league_id, stage, records):
+    rows = []
+    for position, record in enumerate(records or []):
+        round_value = _number(record.get("Round"))
+        extra = {key: value for key, value in record.items() if key not in GAME_COLUMNS}
+        if record.get("Round") is not None and round_value is None:
+            extra["Round"] = record.get("Round")  # Non-numeric round labels are kept verbatim
+        rows.append({
+            "tournament_id": tournament_id,
+            "stage": stage,
+            "position": position,
+            "league_id": league_id,
+            "game_no": _clean(record.get("Game #")),
+            "round": round_value,
+            "match": _clean(record.get("Match")),
+            "home": _clean(record.get("Home")),
+            "away": _clean(record.get("Away")),
+            "home_goals": _number(record.get("Home Goals"), int),
+            "away_goals": _number(record.get("Away Goals"), int),
+            "home_xg": _number(record.get("Home xG")),
+            "away_xg": _number(record.get("Away xG")),
+            "extra": _jsonable(extra),
+        })
+    return rows
+
+
+def _game_record(row):
+    record = {column: row[field] for column, field in GAME_COLUMNS.items() if row[field] is not None}
+    if record.get("Round") is not None and float(record["Round"]).is_integer():
+        record["Round"] = int(record["Round"])
+    for column in ["Home Goals", "Away Goals", "Home xG", "Away xG"]:
+        record.setdefault(column, float("nan"))
+    return {**record, **(row["extra"] or {})}
+
+
+def _result_rows(tournament_id, league_id, stage, records):
+    facts = build_player_game_table(pd.DataFrame(records or []), stage=stage)
+    return [
+        {
+            "tournament_id": tournament_id,
+            "stage": stage,
+            "game_no": str(fact["Game #"]),
+            "player": str(fact["Player"]),
+            "league_id": league_id,
+            "opponent": str(fact["Opponent"]),
+            "goals_for": int(fact["Goals For"]),
+            "goals_against": int(fact["Goals Against"]),
+            "xg_for": _number(fact["xG For"]),
+            "xg_against": _number(fact["xG Against"]),
+            "result": str(fact["Result"]),
+            "points": int(fact["Points"]),
+            "round": _number(fact["Round"]),
+            "match": str(fact["Match"]),
+        }
+        for fact in facts.to_dict(orient="records")
+    ]
+
+
+# --- SQL IMPLEMENTATION ---
+
+class SqlLeagueRepo(LeagueRepo):
+    def __init__(self, engine):
+        self.engine = engine
+
+    def _load(self, connection, condition=None):
+        query = sa.select(leagues_table)
+        if condition is not None:
+            query = query.where(condition)
+        rows = connection.execute(query).mappings().all()
+        league_ids = [row["league_id"] for row in rows]
+        if not league_ids:
+            return {}
+
+        admins, members = {}, {}
+        for row in connection.execute(
+            sa.select(league_admins_table).where(league_admins_table.c.league_id.in_(league_ids))
+        ).mappings():
+            admins.setdefault(row["league_id"], []).append(row["user_id"])
+        for row in connection.execute(
+            sa.select(memberships_table).where(memberships_table.c.league_id.in_(league_ids))
+        ).mappings():
+            members.setdefault(row["league_id"], {})[row["user_id"]] = row["username"] or ""
+
+        return {
+            row["league_id"]: {
+                **row["data"],
+                "super_admin": row["super_admin"],
+                "admins": admins.get(row["league_id"], []),
+                "members": members.get(row["league_id"], {}),
+                "created_at": row["created_at"],
+            }
+            for row in rows
+        }
+
+    def _replace_members(self, connection, league_id, members):
+        usernames = dict(connection.execute(
+            sa.select(users_table.c.user_id, users_table.c.username)
+            .where(users_table.c.user_id.in_(list(members)))
+        ).all()) if members else {}
+        connection.execute(memberships_table.delete().where(memberships_table.c.league_id == league_id))
+        if members:
+            connection.execute(memberships_table.insert(), [
+                {"league_id": league_id, "user_id": user_id, "username": username or usernames.get(user_id, "")}
+                for user_id, username in members.items()
+            ])
+
+    def _replace_admins(self, connection, league_id, admins):
+        connection.execute(league_admins_table.delete().where(league_admins_table.c.league_id == league_id))
+        if admins:
+            connection.execute(league_admins_table.insert(), [
+                {"league_id": league_id, "user_id": user_id} for user_id in dict.fromkeys(admins)
+            ])
+
+    def get(self, league_id):
+        with self.engine.connect() as connection:
+            return self._load(connection, leagues_table.c.league_id == league_id).get(league_id)
+
+    def get_many(self, league_ids):
+        with self.engine.connect() as connection:
+            leagues = self._load(connection, leagues_table.c.league_id.in_(list(league_ids)))
+        return {league_id: leagues.get(league_id) for league_id in league_ids}
+
+    def get_all(self):
+        with self.engine.connect() as connection:
+            return self._load(connection)
+
+    def find_by_name(self, league_name):
+        with self.engine.connect() as connection:
+            return self._load(connection, leagues_table.c.league_name == league_name)
+
+    def list_for_admin(self, user_id):
+        admin_of = sa.select(league_admins_table.c.league_id).where(league_admins_table.c.user_id == user_id)
+        with self.engine.connect() as connection:
+            return self._load(
+                connection, sa.or_(leagues_table.c.league_id.in_(admin_of), leagues_table.c.super_admin == user_id)
+            )
+
+    def list_for_member(self, user_id):
+        member_of = sa.select(memberships_table.c.league_id).where(memberships_table.c.user_id == user_id)
+        with self.engine.connect() as connection:
+            return self._load(connection, leagues_table.c.league_id.in_(member_of))
+
+    def add(self, league_data, league_id=None):
+        league_id = league_id or os.urandom(10).hex()
+        data = {key: value for key, value in league_data.items() if key not in ["admins", "members", "created_at"]}
+        with self.engine.begin() as connection:
+            try:
+                # The primary key is the create-only precondition
+                connection.execute(leagues_table.insert().values(
+                    league_id=league_id,
+                    league_name=data.get("league_name"),
+                    league_type=data.get("league_type"),
+                    super_admin=data.pop("super_admin", None),
+                    data=_jsonable(data),
+                    created_at=_now(),
+                ))
+            except sa.exc.IntegrityError:
+                raise AlreadyExistsError(f"League {league_id} already exists.")
+            self._replace_admins(connection, league_id, league_data.get("admins") or [])
+            self._replace_members(connection, league_id, _member_mapping(league_data.get("members")))
+        return league_id
+
+    def update(self, league_id, fields):
+        with self.engine.begin() as connection:
+            row = connection.execute(
+                sa.select(leagues_table).where(leagues_table.c.league_id == league_id).with_for_update()
+            ).mappings().first()
+            if row is None:
+                raise KeyError(f"League {league_id} not found.")
+
+            data = dict(row["data"])
+            values = {}
+            for field, value in fields.items():
+                if field == "admins":
+                    self._replace_admins(connection, league_id, value or [])
+                elif field == "members":
+                    self._replace_members(connection, league_id, _member_mapping(value))
+                elif field == "super_admin":
+                    values["super_admin"] = value
+                else:
+                    data[field] = value
+                    if field in ["league_name", "league_type"]:
+                        values[field] = value
+            connection.execute(
+                leagues_table.update().where(leagues_table.c.league_id == league_id).values(data=_jsonable(data), **values)
+            )
+
+    def change_members(self, league_id, add=None, remove=None):
+        # One memberships row serves both the league's members and the user's league_id list
+        add, remove = dict(add or {}), [user_id for user_id in (remove or []) if user_id not in (add or {})]
+        with self.engine.begin() as connection:
+            if connection.execute(
+                sa.select(leagues_table.c.league_id).where(leagues_table.c.league_id == league_id)
+            ).first() is None:
+                raise KeyError(f"League {league_id} not found.")
+            usernames = dict(connection.execute(
+                sa.select(users_table.c.user_id, users_table.c.username).where(users_table.c.user_id.in_(list(add)))
+            ).all())
+            missing = [user_id for user_id in add if user_id not in usernames]
+            if missing:
+                raise KeyError(f"Users {missing} not found.")
+            connection.execute(memberships_table.delete().where(
+                memberships_table.c.league_id == league_id, memberships_table.c.user_id.in_([*add, *remove])
+            ))
+            if add:
+                connection.execute(memberships_table.insert(), [
+                    {"league_id": league_id, "user_id": user_id, "username": username or usernames[user_id] or ""}
+                    for user_id, username in add.items()
+                ])
+
+    def _get_document(self, league_id, kind):
+        with self.engine.connect() as connection:
+            row = connection.execute(
+                sa.select(league_documents_table.c.data).where(
+                    league_documents_table.c.league_id == league_id, league_documents_table.c.kind == kind
+                )
+            ).first()
+        return dict(row[0]) if row else {}
+
+    def _set_document(self, connection, league_id, kind, data):
+        _upsert(connection, league_documents_table, {"league_id": league_id, "kind": kind},
+                {"data": _jsonable(data), "updated_at": _now()})
+
+    def get_duration_profile(self, league_id):
+        return self._get_document(league_id, "duration_profile")
+
+    def save_duration_profile(self, league_id, profile):
+        with self.engine.begin() as connection:
+            self._set_document(connection, league_id, "duration_profile", {**profile, "league_id": league_id})
+
+    def get_aggregates(self, league_id):
+        return self._get_document(league_id, "aggregates")
+
+    def replace_aggregates(self, league_id, aggregates, players):
+        with self.engine.begin() as connection:
+            self._set_document(connection, league_id, "aggregates", aggregates)
+            connection.execute(
+                league_player_stats_table.delete().where(league_player_stats_table.c.league_id == league_id)
+            )
+            if players:
+                connection.execute(league_player_stats_table.insert(), [
+                    {"league_id": league_id, "player_doc_id": player_doc_id, "data": _jsonable(data)}
+                    for player_doc_id, data in players.items()
+                ])
+
+    def get_ratings(self, league_id):
+        return self._get_document(league_id, "ratings")
+
+    def set_ratings(self, league_id, ratings_doc):
+        with self.engine.begin() as connection:
+            self._set_document(connection, league_id, "ratings", ratings_doc)
+
+
+class SqlUserRepo(UserRepo):
+    def __init__(self, engine):
+        self.engine = engine
+
+    @staticmethod
+    def replace_user_leagues(connection, user_id, league_ids):
+        row = connection.execute(
+            sa.select(users_table.c.username).where(users_table.c.user_id == user_id)
+        ).first()
+        if row is None:
+            raise KeyError(f"User {user_id} not found.")
+        connection.execute(memberships_table.delete().where(memberships_table.c.user_id == user_id))
+        if league_ids:
+            connection.execute(memberships_table.insert(), [
+                {"league_id": league_id, "user_id": user_id, "username": row[0]}
+                for league_id in dict.fromkeys(league_ids)
+            ])
+
+    def _load(self, connection, condition=None, limit=None):
+        query = sa.select(users_table)
+        if condition is not None:
+            query = query.where(condition)
+        if limit:
+            query = query.limit(limit)
+        rows = connection.execute(query).mappings().all()
+        user_ids = [row["user_id"] for row in rows]
+        if not user_ids:
+            return {}
+
+        league_ids = {}
+        for row in connection.execute(
+            sa.select(memberships_table.c.user_id, memberships_table.c.league_id)
+            .where(memberships_table.c.user_id.in_(user_ids))
+        ):
+            league_ids.setdefault(row[0], []).append(row[1])
+
+        return {
+            row["user_id"]: {**row["data"], "league_id": league_ids.get(row["user_id"], []), "created_at": row["created_at"]}
+            for row in rows
+        }
+
+    def get(self, user_id):
+        with self.engine.connect() as connection:
+            return self._load(connection, users_table.c.user_id == user_id).get(user_id)
+
+    def get_all(self):
+        with self.engine.connect() as connection:
+            return self._load(connection)
+
+    def _find_by(self, column, value):
+        with self.engine.connect() as connection:
+            users = self._load(connection, column == value, limit=1)
+        return next(iter(users.items()), (None, None))
+
+    def find_by_email(self, email):
+        return self._find_by(users_table.c.email, email)
+
+    def find_by_username(self, username):
+        return self._find_by(users_table.c.username, username)
+
+    def create(self, user_id, user_data):
+        created_at = user_data.get("created_at")
+        data = {key: value for key, value in user_data.items() if key not in ["league_id", "created_at"]}
+        league_ids = user_data.get("league_id") or []
+        with self.engine.begin() as connection:
+            _upsert(connection, users_table, {"user_id": user_id}, {
+                "username": data.get("username"),
+                "email": data.get("email"),
+                "role": data.get("role"),
+                "data": _jsonable(data),
+                "created_at": created_at if isinstance(created_at, datetime) else _now(),
+            })
+            self.replace_user_leagues(connection, user_id, league_ids if isinstance(league_ids, list) else [league_ids])
+
+    def update_many(self, user_updates):
+        failed = {}
+        with self.engine.begin() as connection:
+            for user_id, updates in user_updates.items():
+                row = connection.execute(
+                    sa.select(users_table.c.data).where(users_table.c.user_id == user_id).with_for_update()
+                ).first()
+                if row is None:
+                    failed[user_id] = "User not found."
+                    continue
+                data = dict(row[0])
+                for field, value in updates.items():
+                    if field == "league_id":
+                        self.replace_user_leagues(connection, user_id, value or [])
+                    else:
+                        data[field] = value
+                connection.execute(users_table.update().where(users_table.c.user_id == user_id).values(
+                    username=data.get("username"), email=data.get("email"), role=data.get("role"), data=_jsonable(data)
+                ))
+        return {"written": len(user_updates) - len(failed), "failed": failed}
+
+
+class SqlTournamentRepo(TournamentRepo):
+    def __init__(self, engine):
+        self.engine = engine
+
+    def _load(self, condition, game_condition, stages_only=False):
+        with self.engine.connect() as connection:
+            tournaments = connection.execute(sa.select(tournaments_table).where(condition)).mappings().all()
+            games = connection.execute(
+                sa.select(games_table)
+                .where(game_condition)
+                .order_by(games_table.c.tournament_id, games_table.c.stage, games_table.c.position)
+            ).mappings().all()
+
+        records = {}
+        for row in games:
+            records.setdefault((row["tournament_id"], row["stage"]), []).append(_game_record(row))
+
+        loaded = []
+        for row in tournaments:
+            tournament_id = row["tournament_id"]
+            stages = {key: records.get((tournament_id, stage), []) for stage, key in STAGE_KEYS.items()}
+            if stages_only:
+                half_duration = (row["document"].get("metadata") or {}).get("half_duration")
+                loaded.append({**stages, "metadata": {"half_duration": half_duration}})
+            else:
+                update_time = row["update_time"]
+                loaded.append({
+                    **row["document"],
+                    **stages,
+                    "update_time": update_time.isoformat() if update_time else None,
+                })
+        return loaded
+
+    def list_by_league(self, league_id):
+        return self._load(tournaments_table.c.league_id == league_id, games_table.c.league_id == league_id)
+
+    def list_timings_by_league(self, league_id):
+        return self._load(
+            tournaments_table.c.league_id == league_id, games_table.c.league_id == league_id, stages_only=True
+        )
+
+    def list_metadata_by_league(self, league_id):
+        # Only the tournaments table is read; games and results stay on disk
+        with self.engine.connect() as connection:
+            rows = connection.execute(
+                sa.select(
+                    tournaments_table.c.tournament_id,
+                    tournaments_table.c.tournament_name,
+                    tournaments_table.c.event_date,
+                    tournaments_table.c.update_time,
+                ).where(tournaments_table.c.league_id == league_id)
+            ).mappings().all()
+        return [
+            {
+                "metadata": {field: row[field] for field in TOURNAMENT_LISTING_FIELDS},
+                "update_time": row["update_time"].isoformat() if row["update_time"] else None,
+            }
+            for row in rows
+        ]
+
+    def get(self, tournament_id):
+        loaded = self._load(
+            tournaments_table.c.tournament_id == tournament_id, games_table.c.tournament_id == tournament_id
+        )
+        return loaded[0] if loaded else None
+
+    @staticmethod
+    def _saved_complete(connection, tournament_id):
+        return connection.execute(
+            sa.select(tournaments_table.c.tournament_id).where(tournaments_table.c.tournament_id == tournament_id)
+        ).first() is not None
+
+    def save_live_header(self, tournament_id, header):
+        with self.engine.begin() as connection:
+            if self._saved_complete(connection, tournament_id):
+                return  # Saved complete: a late autosave must not make it resumable again
+            row = connection.execute(
+                sa.select(live_tournaments_table.c.header)
+                .where(live_tournaments_table.c.tournament_id == tournament_id)
+                .with_for_update()
+            ).first()
+            current = dict(row[0]) if row else {}
+            for field, value in header.items():
+                current[field] = {**current[field], **value} if isinstance(value, dict) and isinstance(current.get(field), dict) else value
+            _upsert(connection, live_tournaments_table, {"tournament_id": tournament_id}, {
+                "league_id": current.get("league_id"),
+                "header": _jsonable(current),
+                "updated_at": _now(),
+            })
+
+    def save_live_games(self, tournament_id, games):
+        with self.engine.begin() as connection:
+            if self._saved_complete(connection, tournament_id):
+                return  # Saved complete: a late autosave must not write the games back
+            for stage, position, record in games:
+                _upsert(connection, live_games_table, {"tournament_id": tournament_id, "game_id": live_game_id(stage, record)}, {
+                    "stage": stage,
+                    "position": position,
+                    "record": _jsonable(record),
+                    "updated_at": _now(),
+                })
+
+    def delete_live_games(self, tournament_id, stage):
+        with self.engine.begin() as connection:
+            connection.execute(live_games_table.delete().where(
+                live_games_table.c.tournament_id == tournament_id, live_games_table.c.stage == stage
+            ))
+
+    def load_live(self, tournament_id):
+        with self.engine.connect() as connection:
+            header = connection.execute(
+                sa.select(live_tournaments_table.c.header).where(live_tournaments_table.c.tournament_id == tournament_id)
+            ).first()
+            if header is None:
+                return None
+            games = connection.execute(
+                sa.select(live_games_table.c.stage, live_games_table.c.position, live_games_table.c.record)
+                .where(live_games_table.c.tournament_id == tournament_id)
+            ).all()
+        return {"header": dict(header[0]), "games": [(stage, position, record) for stage, position, record in games]}
+
+    def list_live(self, league_ids):
+        with self.engine.connect() as connection:
+            rows = connection.execute(
+                sa.select(live_tournaments_table.c.tournament_id, live_tournaments_table.c.header)
+                .where(live_tournaments_table.c.league_id.in_(list(league_ids)))
+            ).all()
+        return {tournament_id: dict(header) for tournament_id, header in rows}
+
+    def player_history(self, league_id, player):
+        query = (
+            sa.select(
+                results_table.c.game_no.label("Game #"),
+                results_table.c.player.label("Player"),
+                results_table.c.opponent.label("Opponent"),
+                results_table.c.goals_for.label("Goals For"),
+                results_table.c.goals_against.label("Goals Against"),
+                results_table.c.xg_for.label("xG For"),
+                results_table.c.xg_against.label("xG Against"),
+                results_table.c.result.label("Result"),
+                results_table.c.points.label("Points"),
+                results_table.c.round.label("Round"),
+                results_table.c.match.label("Match"),
+                results_table.c.stage.label("Stage"),
+                results_table.c.tournament_id,
+                tournaments_table.c.event_date,
+            )
+            .join(tournaments_table, tournaments_table.c.tournament_id == results_table.c.tournament_id)
+            .where(results_table.c.league_id == league_id, results_table.c.player == player)
+            .order_by(tournaments_table.c.event_date, results_table.c.game_no)
+        )
+        with self.engine.connect() as connection:
+            return pd.read_sql(query, connection)
+
+    def player_totals(self, league_id, stage=None):
+        result = results_table.c.result
+        query = (
+            sa.select(
+                results_table.c.player.label("Player"),
+                sa.func.count().label("Games"),
+                sa.func.sum(sa.case((result == "W", 1), else_=0)).label("Wins"),
+                sa.func.sum(sa.case((result == "D", 1), else_=0)).label("Draws"),
+                sa.func.sum(sa.case((result == "L", 1), else_=0)).label("Losses"),
+                sa.func.sum(results_table.c.goals_for).label("Goals_For"),
+                sa.func.sum(results_table.c.goals_against).label("Goals_Against"),
+                sa.func.sum(results_table.c.xg_for).label("xG_For"),
+                sa.func.sum(results_table.c.xg_against).label("xG_Against"),
+                sa.func.sum(results_table.c.points).label("Points"),
+            )
+            .where(results_table.c.league_id == league_id)
+            .group_by(results_table.c.player)
+            .order_by(results_table.c.player)
+        )
+        if stage:
+            query = query.where(results_table.c.stage == stage)
+        with self.engine.connect() as connection:
+            return pd.read_sql(query, connection)
+
+    def save_complete(self, tournament_id, tournament_data, league_id, player_increments, league_totals, update_ratings):
+        document = {key: value for key, value in tournament_data.items() if key not in STAGE_KEYS.values()}
+        metadata_doc = tournament_data.get("metadata", {})
+
+        with self.engine.begin() as connection:
+            # The saved games replace the in-progress rows
+            for table in [games_table, results_table, live_tournaments_table, live_games_table]:
+                connection.execute(table.delete().where(table.c.tournament_id == tournament_id))
+            _upsert(connection, tournaments_table, {"tournament_id": tournament_id}, {
+                "league_id": league_id,
+                "tournament_name": metadata_doc.get("tournament_name"),
+                "event_date": str(metadata_doc.get("event_date", "")),
+                "document": _jsonable(document),
+                "update_time": _now(),
+            })
+            for stage, key in STAGE_KEYS.items():
+                game_rows = _game_rows(tournament_id, league_id, stage, tournament_data.get(key))
+                result_rows = _result_rows(tournament_id, league_id, stage, tournament_data.get(key))
+                if game_rows:
+                    connection.execute(games_table.insert(), game_rows)
+                if result_rows:
+                    connection.execute(results_table.insert(), result_rows)
+
+            if not league_id:
+                return
+
+            # Concurrent first saves of a league would otherwise both read "no documents" (FOR UPDATE locks
+            # nothing) and overwrite each other's totals: create the rows first, then lock them
+            for kind in ["aggregates", "ratings"]:
+                _insert_missing(connection, league_documents_table, {"league_id": league_id, "kind": kind},
+                                {"data": {"league_id": league_id}, "updated_at": _now()})
+            documents = {
+                row["kind"]: dict(row["data"])
+                for row in connection.execute(
+                    sa.select(league_documents_table)
+                    .where(
+                        league_documents_table.c.league_id == league_id,
+                        league_documents_table.c.kind.in_(["aggregates", "ratings"]),
+                    )
+                    .with_for_update()
+                ).mappings()
+            }
+
+            ratings_data = documents.get("ratings", {})
+            if tournament_id not in ratings_data.get("tournament_ids", []):
+                _upsert(connection, league_documents_table, {"league_id": league_id, "kind": "ratings"}, {
+                    "data": _jsonable({
+                        "league_id": league_id,
+                        "ratings": update_ratings(ratings_data.get("ratings", {})),
+                        "tournament_ids": ratings_data.get("tournament_ids", []) + [tournament_id],
+                    }),
+                    "updated_at": _now(),
+                })
+
+            aggregates = documents.get("aggregates", {"league_id": league_id})
+            if tournament_id in aggregates.get("tournament_ids", []):
+                return
+            for field, value in league_totals.items():
+                aggregates[field] = aggregates.get(field, 0) + value
+            aggregates["tournament_ids"] = aggregates.get("tournament_ids", []) + [tournament_id]
+            players = aggregates.setdefault("players", {})
+            for player, stats in player_increments.items():
+                totals = players.setdefault(player, {})
+                for field, value in stats.items():
+                    totals[field] = totals.get(field, 0) + value
+            _upsert(connection, league_documents_table, {"league_id": league_id, "kind": "aggregates"},
+                    {"data": _jsonable(aggregates), "updated_at": _now()})
+
+            for player, stats in player_increments.items():
+                keys = {"league_id": league_id, "player_doc_id": player_document_id(player)}
+                _upsert(connection, league_player_stats_table, keys, {
+                    "data": _jsonable({"player": player, "league_id": league_id, **players[player]}),
+                })
+
+
+# --- ENGINE ---
+
+def create_engine(database_url):
+    """
+    Create a pooled SQLAlchemy engine and make sure the schema exists.
+
+    Args:
+        database_url (str): SQLAlchemy URL, e.g. "sqlite:///tournalytics.db" or "postgresql+psycopg://...".
+
+    Returns:
+        sqlalchemy.engine.Engine: The engine.
+    """
+    url = sa.engine.make_url(database_url)
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        # One shared connection, so every session sees the same in-memory database
+        engine = sa.create_engine(url, poolclass=StaticPool, connect_args={"check_same_thread": False})
+    elif url.get_backend_name() == "sqlite":
+        engine = sa.create_engine(url, pool_size=POOL_SIZE, max_overflow=MAX_OVERFLOW,
+                                  connect_args={"check_same_thread": False})
+    else:
+        engine = sa.create_engine(url, pool_size=POOL_SIZE, max_overflow=MAX_OVERFLOW, pool_pre_ping=True)
+    metadata.create_all(engine)
+    return engine
+
+
+def create_sql_repositories(database_url):
+    """
+    Build the SQL-backed league, user and tournament repositories.
+
+    Args:
+        database_url (str): SQLAlchemy URL.
+
+    Returns:
+        Repositories: A (leagues, users, tournaments) named tuple sharing one engine.
+    """
+    engine = create_engine(database_url)
+    return Repositories(SqlLeagueRepo(engine), SqlUserRepo(engine), SqlTournamentRepo(engine))
@@ -4,6 +4,31 @@ import streamlit as st
 import random
 import numpy as np
 import itertools
+from utils.data_utils import (
+    firestore_get_duration_profile,
+    firestore_query_tournament_timings_by_league,
+    firestore_save_duration_profile,
+    firestore_load_live_tournament,
+)
+from utils.analytics_utils import (
+    get_player_game_table,
+    aggregate_player_games,
+    calculate_basic_analysis,
+    calculate_playoff_ranks,
+    calculate_xpts_table,
+)
+from utils.cache_utils import analysis_cache, content_hash
+from utils.rating_utils import get_rating, seed_by_ratings
+
+# Bump when analyze_saved_tournament's output changes, so cached analyses are recomputed
+ANALYSIS_VERSION = 2
+
+# Duration parameters used until a league has enough history to calibrate its own
+DEFAULT_DURATION_PROFILE = {
+    "game_length_factor": 1.0,  # Multiplier applied to the two configured halves
+    "break_time": 3,            # Minutes between games (half-time, changeover)
+    "misc_time": 2,             # Extra minutes per round as a buffer
+}
 
 # Helper Functions
 def validate_schedule(schedule):
@@ -30,14 +55,18 @@ def set_schedule(schedule):
     st.session_state["tournament_ready"] = True
 
 
-def generate_league_schedule(tournament_details, debug=False):
+def generate_league_schedule(tournament_details, debug=False, ratings=None):
     """
     Generate a league schedule considering constraints such as games per player, consoles, fairness,
     and diverse matchups.
 
+    When ratings are given, candidate matchups are tried closest-rated first (Swiss-style seeding),
+    so partial schedules favour evenly matched games over random ones.
+
     Args:
         tournament_details (dict): Dictionary containing all tournament configuration details.
         debug (bool): If True, outputs debug information to the console/UI.
+        ratings (dict, optional): Mapping of player -> {"rating": float, "games": int} used for seeding.
 
     Returns:
         list: A schedule of league games.
@@ -68,6 +97,8 @@ def generate_league_schedule(tournament_details, debug=False):
     total_league_games = (num_players * games_per_player) // 2
     matchups = list(itertools.combinations(players, 2))  # All unique matchups
     random.shuffle(matchups)  # Randomize matchups for diversity
+    if ratings:
+        matchups.sort(key=lambda pair: abs(get_rating(ratings, pair[0]) - get_rating(ratings, pair[1])))
 
     # Initialize symmetric matchup count
     matchup_count = {}
@@ -154,6 +185,8 @@ def generate_league_schedule(tournament_details, debug=False):
             key=lambda x: matchup_count[x],
         )
         random.shuffle(matchups)  # Randomize within the sorted order
+        if ratings:
+            matchups.sort(key=lambda pair: abs(get_rating(ratings, pair[0]) - get_rating(ratings, pair[1])))
 
     return schedule
 
@@ -318,6 +351,11 @@ def upsert_results(results, new_result):
     if results is None or results.empty:
         return pd.DataFrame([new_result])
 
+    # Add any columns introduced by the new result (e.g. "Recorded At")
+    for key in new_result:
+        if key not in results.columns:
+            results[key] = None
+
     # Check if the 'Game #' already exists
     if new_result["Game #"] in results["Game #"].values:
         # Update the existing row by aligning new_result keys to DataFrame columns
@@ -360,6 +398,49 @@ def update_league_game_results(results_df, new_result, players, teams):
 
     return updated_results, updated_standings
 
+def resume_live_tournament(session_state, tournament_id):
+    """
+    Rebuild a tournament's session state from its autosaved header and per-game documents.
+
+    Args:
+        session_state: Streamlit session state to populate.
+        tournament_id (str): The in-progress tournament to resume.
+
+    Returns:
+        bool: True if the tournament was found and restored.
+    """
+    live = firestore_load_live_tournament(tournament_id)
+    if not live:
+        return False
+
+    header = live["header"]
+    details = header["details"]
+    progress = header.get("progress", {})
+    results = live["results"]
+    if results.empty:
+        # No game documents yet: start from the schedule, as schedule generation does
+        results = pd.DataFrame(header.get("schedule", [])).assign(
+            **{column: np.nan for column in ["Home Goals", "Away Goals", "Home xG", "Away xG"]}
+        )
+    players, teams = details["selected_players"], details["team_selection"]
+
+    session_state.setdefault("tournaments", {})[tournament_id] = details
+    session_state["selected_tournament_id"] = tournament_id
+    session_state["team_selection"] = teams
+    session_state["tiebreakers"] = details.get("tiebreakers", [])
+    session_state["schedule"] = header.get("schedule", [])
+    session_state["results"] = results
+    games_played = results.dropna(subset=["Home Goals", "Away Goals"]) if "Home Goals" in results else pd.DataFrame()
+    standings = initialize_standings(players, teams)
+    session_state["standings"] = update_standings(standings, games_played) if not games_played.empty else standings
+    if not live["playoff_results"].empty:
+        session_state["playoff_results"] = live["playoff_results"]
+    session_state["generate_playoffs_clicked"] = bool(progress.get("playoffs_generated")) or not live["playoff_results"].empty
+    session_state["generate_finals_clicked"] = bool(progress.get("finals_generated"))
+    session_state["tournament_ready"] = True
+    return True
+
+
 def update_playoff_results(results_df, new_result):
     """
     Update the playoff results DataFrame with new game results.
@@ -424,21 +505,15 @@ def update_standings(standings, results):
     """
     standings = standings.set_index("Player").assign(Points=0, Goals=0, xG=0.0, Games_Played=0)
 
-    for _, row in results.iterrows():
-        if pd.isna(row["Home Goals"]) or pd.isna(row["Away Goals"]):
-            continue  # Skip incomplete games
-
-        home, away = row["Home"], row["Away"]
-        home_goals, away_goals = int(row["Home Goals"]), int(row["Away Goals"])
-        home_xg, away_xg = float(row["Home xG"]), float(row["Away xG"])
-
-        for team, goals, xg, points in [
-            (home, home_goals, home_xg, 3 if home_goals > away_goals else 1 if home_goals == away_goals else 0),
-            (away, away_goals, away_xg, 3 if away_goals > home_goals else 1 if home_goals == away_goals else 0),
-        ]:
-            if team in standings.index:
-                standings.loc[team, ["Goals", "xG", "Games_Played"]] += [goals, xg, 1]
-                standings.loc[team, "Points"] += points
+    # Incomplete games are dropped when the player-game table is built
+    totals = (
+        aggregate_player_games(get_player_game_table(results))
+        .rename(columns={"Goals_For": "Goals", "xG_For": "xG", "Games": "Games_Played"})
+        .set_index("Player")
+    )
+    players = standings.index.intersection(totals.index)
+    for column in ["Points", "Goals", "xG", "Games_Played"]:
+        standings.loc[players, column] = totals.loc[players, column]
 
     return standings.reset_index()
 
@@ -447,22 +522,14 @@ def calculate_outcomes(results, players):
     """
     Calculates wins, losses, and draws for all players based on game results.
     """
-    outcomes = pd.DataFrame({"Player": players}).assign(Wins=0, Losses=0, Draws=0)
-
-    for _, game in results.iterrows():
-        home, away = game["Home"], game["Away"]
-        home_goals, away_goals = int(game["Home Goals"]), int(game["Away Goals"])
+    totals = aggregate_player_games(get_player_game_table(results))[["Player", "Wins", "Losses", "Draws"]]
 
-        if home_goals > away_goals:
-            outcomes.loc[outcomes["Player"] == home, "Wins"] += 1
-            outcomes.loc[outcomes["Player"] == away, "Losses"] += 1
-        elif away_goals > home_goals:
-            outcomes.loc[outcomes["Player"] == away, "Wins"] += 1
-            outcomes.loc[outcomes["Player"] == home, "Losses"] += 1
-        else:
-            outcomes.loc[outcomes["Player"].isin([home, away]), "Draws"] += 1
-
-    return outcomes
+    return (
+        pd.DataFrame({"Player": players})
+        .merge(totals, on="Player", how="left")
+        .fillna({"Wins": 0, "Losses": 0, "Draws": 0})
+        .astype({"Wins": int, "Losses": int, "Draws": int})
+    )
 
 # Sort Standings: Dynamically sort based on tiebreakers
 def sort_standings(
@@ -483,7 +550,75 @@ def sort_standings(
     )
 
 
-def estimate_league_duration(num_players, num_consoles, half_duration, games_per_player, league_format):
+def analyze_saved_tournament(tournament):
+    """
+    Compute the Stats page analysis for a saved tournament.
+
+    Args:
+        tournament (dict): Saved tournament with "results", "playoff_results" and "metadata".
+
+    Returns:
+        dict: "stats" (calculate_basic_analysis output), "league_table" (overall stats sorted by the
+        tournament's tiebreakers), "playoff_rankings" (None when there were no playoffs) and
+        "expected_points" (league-stage xPts table).
+    """
+    stats = calculate_basic_analysis(tournament)
+
+    league_table = (
+        stats["overall"]
+        .assign(Rank=lambda df: range(1, len(df) + 1))
+        .rename(
+            columns={
+                "Goals_For": "GF",
+                "Goals_Against": "GA",
+                "xG_For": "xGF",
+                "xG_Against": "xGA",
+                "Wins": "W",
+                "Draws": "D",
+                "Losses": "L",
+            }
+        )
+    )
+    display_columns = ["Rank", "Player", "Points", "Games", "W", "D", "L", "GF", "GA", "xGF", "xGA"]
+    tiebreakers = tournament.get("metadata", {}).get("tiebreakers", [])
+    column_mapping = {"Goals For": "GF", "xG For": "xGF", "Wins": "W", "Draws": "D"}
+    league_table = sort_standings(league_table[display_columns], tiebreakers, column_mapping)
+
+    playoff_results = pd.DataFrame(tournament.get("playoff_results", []))
+    playoff_rankings = calculate_playoff_ranks(playoff_results) if not playoff_results.empty else None
+
+    expected_points = calculate_xpts_table(pd.DataFrame(tournament.get("results", [])))
+
+    return {
+        "stats": stats,
+        "league_table": league_table,
+        "playoff_rankings": playoff_rankings,
+        "expected_points": expected_points,
+    }
+
+
+def get_saved_tournament_analysis(tournament):
+    """
+    Return the analysis of a saved tournament from the process-wide analysis cache.
+
+    Saved tournaments are immutable, so the analysis is computed once per document version
+    (its update time, or a content hash if unknown) and shared by every session and viewer.
+    Callers must treat the returned DataFrames as read-only.
+
+    Args:
+        tournament (dict): Saved tournament as returned by firestore_get_tournament.
+
+    Returns:
+        dict: See analyze_saved_tournament.
+    """
+    tournament_id = tournament.get("metadata", {}).get("tournament_id")
+    version = f"v{ANALYSIS_VERSION}:{tournament.get('update_time') or content_hash(tournament)}"
+    if not tournament_id:
+        return analyze_saved_tournament(tournament)
+    return analysis_cache.get_or_compute(tournament_id, version, lambda: analyze_saved_tournament(tournament))
+
+
+def estimate_league_duration(num_players, num_consoles, half_duration, games_per_player, league_format, game_length_factor=1.0, break_time=3):
     """
     Estimate the total league duration based on the number of players, consoles, game duration, and league format.
 
@@ -493,6 +628,8 @@ def estimate_league_duration(num_players, num_consoles, half_duration, games_per
         half_duration (int): Duration of one half of a game in minutes.
         games_per_player (int): Number of games each player will play in the league phase.
         league_format (str): Format of the league ("League", "Group", or "Knockouts").
+        game_length_factor (float): Multiplier applied to the two halves to get the real game length.
+        break_time (float): Minutes between games (half-time, changeover).
 
     Returns:
         dict: League duration details, including total league games, rounds, and duration.
@@ -501,7 +638,7 @@ def estimate_league_duration(num_players, num_consoles, half_duration, games_per
         raise NotImplementedError(f"League format '{league_format}' is not yet supported.")
 
     total_league_games = (num_players * games_per_player) // 2
-    game_duration = (half_duration * 2) + 3  # Two halves + break
+    game_duration = int(round((half_duration * 2) * game_length_factor + break_time))  # Two halves + break
     league_rounds = (total_league_games + num_consoles - 1) // num_consoles
     league_duration = league_rounds * game_duration
 
@@ -548,10 +685,13 @@ def estimate_playoff_duration(num_players, num_consoles, game_duration, playoff_
     }
 
 
-def estimate_tournament_duration(num_players, num_consoles, half_duration, games_per_player, league_format, playoff_format, misc_time=2):
+def estimate_tournament_duration(num_players, num_consoles, half_duration, games_per_player, league_format, playoff_format, misc_time=None, league_id=None, duration_profile=None):
     """
     Estimate the total duration of the tournament, including league, playoff phases, and additional time for miscellaneous activities.
 
+    When a league_id is given, the league's calibrated duration profile (see
+    calibrate_league_duration_profile) is used in place of the default parameters.
+
     Args:
         num_players (int): Total number of players in the tournament.
         num_consoles (int): Number of consoles available.
@@ -559,17 +699,29 @@ def estimate_tournament_duration(num_players, num_consoles, half_duration, games
         games_per_player (int): Number of games each player will play in the league phase.
         league_format (str): Format of the league ("League", "Group", or "Knockouts").
         playoff_format (str): Format of the playoffs ("Single-Elimination" or "Double-Elimination").
-        misc_time (int): Number of extra minutes per round as a buffer
+        misc_time (int, optional): Number of extra minutes per round as a buffer. Overrides the profile value.
+        league_id (str, optional): League whose calibrated duration profile should be used.
+        duration_profile (dict, optional): Explicit duration parameters. Takes precedence over league_id.
 
     Returns:
         dict: A breakdown of the tournament's total duration, league duration, playoff duration, and additional time.
     """
+    if duration_profile is None and league_id:
+        duration_profile = firestore_get_duration_profile(league_id)
+    profile = {**DEFAULT_DURATION_PROFILE, **{
+        key: value for key, value in (duration_profile or {}).items() if key in DEFAULT_DURATION_PROFILE
+    }}
+    if misc_time is None:
+        misc_time = profile["misc_time"]
+
     league_details = estimate_league_duration(
         num_players=num_players,
         num_consoles=num_consoles,
         half_duration=half_duration,
         games_per_player=games_per_player,
         league_format=league_format,
+        game_length_factor=profile["game_length_factor"],
+        break_time=profile["break_time"],
     )
 
     playoff_details = estimate_playoff_duration(
@@ -579,7 +731,7 @@ def estimate_tournament_duration(num_players, num_consoles, half_duration, games
         playoff_format=playoff_format,
     )
 
-    additional_time = (league_details["league_rounds"] + playoff_details["playoff_rounds"]) * misc_time
+    additional_time = int(round((league_details["league_rounds"] + playoff_details["playoff_rounds"]) * misc_time))
 
     total_duration = league_details["league_duration"] + playoff_details["playoff_duration"] + additional_time
 
@@ -591,15 +743,131 @@ def estimate_tournament_duration(num_players, num_consoles, half_duration, games
     }
 
 
-def generate_playoffs_bracket(tournament_details, standings, last_game_id, debug=False):
+def extract_round_slots(tournament, max_slot_factor=3):
+    """
+    Extract observed round slot lengths (minutes between consecutive round completions) from a saved tournament.
+
+    A round is complete when its last result is recorded, so the gap between two consecutive
+    completions is one game plus the changeover. Gaps longer than max_slot_factor times the
+    nominal game length are treated as planned breaks and skipped.
+
+    Args:
+        tournament (dict): Saved tournament with "results", "playoff_results" and "metadata".
+        max_slot_factor (float): Upper bound on a slot, relative to the nominal two halves plus break.
+
+    Returns:
+        pd.DataFrame: One row per slot with "half_duration" and "slot" (minutes) columns.
+    """
+    half_duration = tournament.get("metadata", {}).get("half_duration")
+    if not half_duration:
+        return pd.DataFrame(columns=["half_duration", "slot"])
+
+    stages = []
+    for stage, key in [("League", "results"), ("Playoff", "playoff_results")]:
+        games = pd.DataFrame(tournament.get(key, []))
+        if games.empty or "Recorded At" not in games.columns:
+            continue
+        games = games.assign(
+            Stage=stage,
+            **{"Recorded At": pd.to_datetime(games["Recorded At"], errors="coerce", utc=True)},
+        ).dropna(subset=["Recorded At", "Round"])
+        stages.append(games[["Stage", "Round", "Recorded At"]])
+
+    if not stages:
+        return pd.DataFrame(columns=["half_duration", "slot"])
+
+    # Completion time of each round, in play order
+    completions = (
+        pd.concat(stages, ignore_index=True)
+        .groupby(["Stage", "Round"], as_index=False)["Recorded At"]
+        .max()
+        .sort_values("Recorded At")
+    )
+    slots = completions["Recorded At"].diff().dt.total_seconds().div(60).dropna()
+
+    nominal = half_duration * 2 + DEFAULT_DURATION_PROFILE["break_time"]
+    slots = slots[(slots > 0) & (slots <= nominal * max_slot_factor)]
+
+    return pd.DataFrame({"half_duration": float(half_duration), "slot": slots.to_numpy()})
+
+
+def fit_duration_profile(tournaments, min_samples=5):
+    """
+    Fit per-league duration parameters from the recorded result timestamps of saved tournaments.
+
+    Each observed round slot is modelled as slot = game_length_factor * (2 * half_duration) + break_time.
+    The factor is only fitted when the history covers more than one half duration; otherwise it stays at 1.
+    The break is the median residual (robust to the odd long delay), and misc_time is the average amount
+    by which slots overrun that median, i.e. the per-round buffer actually needed.
+
+    Args:
+        tournaments (list): Saved tournament dictionaries.
+        min_samples (int): Minimum number of observed slots required to fit a profile.
+
+    Returns:
+        dict or None: The fitted profile, or None if there is not enough history.
+    """
+    slots = pd.concat([extract_round_slots(t) for t in tournaments] or [pd.DataFrame()], ignore_index=True)
+    if len(slots) < min_samples:
+        return None
+
+    game_time = slots["half_duration"].to_numpy() * 2
+    observed = slots["slot"].to_numpy()
+
+    game_length_factor = DEFAULT_DURATION_PROFILE["game_length_factor"]
+    if np.unique(game_time).size > 1:
+        design = np.column_stack([game_time, np.ones_like(game_time)])
+        (fitted_factor, _), *_ = np.linalg.lstsq(design, observed, rcond=None)
+        if fitted_factor > 0:
+            game_length_factor = float(fitted_factor)
+
+    residuals = observed - game_length_factor * game_time
+    break_time = float(np.median(residuals))
+    misc_time = float(max(np.mean(residuals) - break_time, 0.0))
+
+    return {
+        "game_length_factor": round(game_length_factor, 3),
+        "break_time": round(max(break_time, 0.0), 2),
+        "misc_time": round(misc_time, 2),
+        "samples": int(len(slots)),
+    }
+
+
+def calibrate_league_duration_profile(league_id, min_samples=5):
+    """
+    Calibration job: read a league's saved tournaments in bulk, fit its duration profile and store it.
+
+    The stored profile is picked up automatically by estimate_tournament_duration(league_id=...).
+
+    Args:
+        league_id (str): The ID of the league to calibrate.
+        min_samples (int): Minimum number of observed slots required to fit a profile.
+
+    Returns:
+        dict: A success flag, a message and the fitted profile (if any).
+    """
+    tournaments = firestore_query_tournament_timings_by_league(league_id)
+    profile = fit_duration_profile(tournaments, min_samples=min_samples)
+    if profile is None:
+        return {"success": False, "message": "Not enough timed results to calibrate this league yet.", "profile": None}
+
+    result = firestore_save_duration_profile(league_id, profile)
+    return {**result, "profile": profile}
+
+
+def generate_playoffs_bracket(tournament_details, standings, last_game_id, debug=False, ratings=None):
     """
     Generate a playoffs bracket based on league standings and tournament details.
 
+    The top 6 of the standings qualify. By default they are seeded by points; when ratings are
+    given, the qualifiers are seeded by rating instead.
+
     Args:
         tournament_details (dict): Dictionary containing tournament configuration details.
         standings (pd.DataFrame): Standings DataFrame, ranked by tournament tiebreakers.
         last_game_id (int): The last game ID from the league stage to continue numbering.
         debug (bool): Whether to enable debug output.
+        ratings (dict, optional): Mapping of player -> {"rating": float, "games": int} used for seeding.
 
     Returns:
         list: A playoffs bracket as a list of dictionaries.
@@ -621,6 +889,11 @@ def generate_playoffs_bracket(tournament_details, standings, last_game_id, debug
     if ranked_standings.shape[0] < 6:
         raise ValueError("Not enough players to generate a playoffs bracket (minimum 6 required).")
 
+    # Seed the qualifiers by rating instead of points
+    if ratings:
+        qualifiers = seed_by_ratings(ranked_standings.iloc[:6]["Player"].tolist(), ratings)
+        ranked_standings = pd.DataFrame({"Player": qualifiers}, index=pd.RangeIndex(1, 7, name="Rank"))
+
     # Extract top-ranked players for wildcard and semifinals
     top_two = ranked_standings.iloc[:2]["Player"].tolist()
     wildcard_players = ranked_standings.iloc[2:6][["Player"]].reset_index()
@@ -0,0 +1,412 @@
+import os
+import json
+import shutil
+import threading
+from contextlib import contextmanager
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from utils.analytics_utils import build_player_game_table, aggregate_player_games, calculate_xpts_table_from_facts
+from utils.cache_utils import content_hash
+from utils.data_utils import firestore_query_tournaments_by_league, firestore_get_tournament
+
+try:
+    import fcntl  # POSIX file locks; without them the manifest lock only covers this process
+except ImportError:
+    fcntl = None
+
+# --- WAREHOUSE LAYOUT ---
+# <WAREHOUSE_DIR>/manifests/league_id=<id>.json                      tournament_id -> synced version, one per league
+# <WAREHOUSE_DIR>/<table>/league_id=<id>/season=<year>/<tournament_id>.parquet
+
+WAREHOUSE_DIR = os.getenv("TOURNALYTICS_WAREHOUSE_DIR", "warehouse")
+
+# Partition columns live in the directory names (hive style), not inside the files
+PARTITIONING = ds.partitioning(pa.schema([("league_id", pa.string()), ("season", pa.int32())]), flavor="hive")
+
+WAREHOUSE_SCHEMAS = {
+    "player_games": pa.schema([
+        ("tournament_id", pa.string()),
+        ("event_date", pa.string()),
+        ("Game #", pa.string()),
+        ("Player", pa.string()),
+        ("Opponent", pa.string()),
+        ("Goals For", pa.int32()),
+        ("Goals Against", pa.int32()),
+        ("xG For", pa.float64()),
+        ("xG Against", pa.float64()),
+        ("Result", pa.string()),
+        ("Points", pa.int8()),
+        ("Round", pa.float64()),
+        ("Match", pa.string()),
+        ("Stage", pa.string()),
+    ]),
+    "tournaments": pa.schema([
+        ("tournament_id", pa.string()),
+        ("tournament_name", pa.string()),
+        ("event_date", pa.string()),
+        ("video_game", pa.string()),
+        ("num_players", pa.int32()),
+        ("league_games", pa.int32()),
+        ("playoff_games", pa.int32()),
+    ]),
+}
+
+# Serializes manifest read-modify-write cycles between sessions in this process (file locks cover other processes)
+_manifest_thread_lock = threading.Lock()
+
+
+def tournament_season(tournament):
+    """
+    Derive the season (calendar year of the event date) used to partition a tournament.
+
+    Args:
+        tournament (dict): Saved tournament dictionary.
+
+    Returns:
+        int: The season year, or 0 when the event date is missing or malformed.
+    """
+    event_date = str(tournament.get("metadata", {}).get("event_date", ""))
+    return int(event_date[:4]) if event_date[:4].isdigit() else 0
+
+
+def tournament_version(tournament):
+    """
+    Identify the stored version of a tournament (document update time, else a content hash).
+
+    Args:
+        tournament (dict): Saved tournament dictionary.
+
+    Returns:
+        str: The version string.
+    """
+    return tournament.get("update_time") or content_hash(
+        {key: value for key, value in tournament.items() if key != "update_time"}
+    )
+
+
+def flatten_tournament(tournament):
+    """
+    Flatten a nested tournament document into warehouse tables.
+
+    Args:
+        tournament (dict): Saved tournament dictionary.
+
+    Returns:
+        dict: Table name -> pyarrow.Table matching WAREHOUSE_SCHEMAS.
+    """
+    metadata = tournament.get("metadata", {})
+    tournament_id = metadata.get("tournament_id")
+    event_date = str(metadata.get("event_date", ""))
+
+    league_games = build_player_game_table(pd.DataFrame(tournament.get("results", [])), stage="League")
+    playoff_games = build_player_game_table(pd.DataFrame(tournament.get("playoff_results", [])), stage="Playoff")
+    facts = pd.concat([league_games, playoff_games], ignore_index=True)
+
+    # Categoricals and mixed object columns become plain strings so every file shares one schema
+    player_games = facts.assign(
+        tournament_id=tournament_id,
+        event_date=event_date,
+        **{
+            column: facts[column].astype(str)
+            for column in ["Game #", "Player", "Opponent", "Result", "Match", "Stage"]
+        },
+        Round=pd.to_numeric(facts["Round"], errors="coerce"),
+    )
+
+    tournament_row = pd.DataFrame([{
+        "tournament_id": tournament_id,
+        "tournament_name": metadata.get("tournament_name"),
+        "event_date": event_date,
+        "video_game": metadata.get("video_game"),
+        "num_players": int(metadata.get("num_players") or 0),
+        "league_games": len(league_games) // 2,
+        "playoff_games": len(playoff_games) // 2,
+    }])
+
+    return {
+        "player_games": pa.Table.from_pandas(
+            player_games, schema=WAREHOUSE_SCHEMAS["player_games"], preserve_index=False
+        ),
+        "tournaments": pa.Table.from_pandas(
+            tournament_row, schema=WAREHOUSE_SCHEMAS["tournaments"], preserve_index=False
+        ),
+    }
+
+
+def _partition_path(warehouse_dir, table_name, league_id, season):
+    return os.path.join(warehouse_dir, table_name, f"league_id={league_id}", f"season={season}")
+
+
+def _manifest_path(warehouse_dir, league_id):
+    return os.path.join(warehouse_dir, "manifests", f"league_id={league_id}.json")
+
+
+@contextmanager
+def _manifest_lock(warehouse_dir, league_id):
+    # The warehouse is shared by every server process: hold the league's lock file for the whole cycle
+    path = f"{_manifest_path(warehouse_dir, league_id)}.lock"
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with _manifest_thread_lock, open(path, "a") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _load_manifest(warehouse_dir, league_id):
+    try:
+        with open(_manifest_path(warehouse_dir, league_id), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"tournaments": {}}
+
+
+def _save_manifest(warehouse_dir, league_id, manifest):
+    path = _manifest_path(warehouse_dir, league_id)
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(f"{path}.tmp", path)
+
+
+def _remove_tournament_files(warehouse_dir, tournament_id, entry):
+    for table_name in WAREHOUSE_SCHEMAS:
+        path = os.path.join(
+            _partition_path(warehouse_dir, table_name, entry["league_id"], entry["season"]),
+            f"{tournament_id}.parquet",
+        )
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _write_tournament(warehouse_dir, synced, tournament, league_id):
+    # Write one tournament's files unless the manifest already has this version; returns True if written
+    tournament_id = tournament.get("metadata", {}).get("tournament_id")
+    entry = {
+        "league_id": league_id,
+        "season": tournament_season(tournament),
+        "version": tournament_version(tournament),
+    }
+    previous = synced.get(tournament_id)
+    if previous == entry:
+        return False
+
+    # The season may have changed with an edited event date; drop the old files first
+    if previous:
+        _remove_tournament_files(warehouse_dir, tournament_id, previous)
+
+    for table_name, table in flatten_tournament(tournament).items():
+        partition = _partition_path(warehouse_dir, table_name, league_id, entry["season"])
+        os.makedirs(partition, exist_ok=True)
+        pq.write_table(table, os.path.join(partition, f"{tournament_id}.parquet"))
+    synced[tournament_id] = entry
+    return True
+
+
+def sync_tournaments_to_warehouse(tournaments, league_id, warehouse_dir=None):
+    """
+    Incrementally sync a league's saved tournaments into the Parquet warehouse.
+
+    Only tournaments whose version differs from the manifest are (re)written; tournaments of this
+    league that are no longer present are removed. Each tournament is one file per table, so a
+    rewrite replaces exactly one file per partition.
+
+    Args:
+        tournaments (list): The league's saved tournament dictionaries.
+        league_id (str): The ID of the league being synced.
+        warehouse_dir (str): Warehouse root directory (defaults to WAREHOUSE_DIR).
+
+    Returns:
+        dict: A success flag, a message and the written/removed/unchanged counts.
+    """
+    warehouse_dir = warehouse_dir or WAREHOUSE_DIR
+    written, removed, unchanged = 0, 0, 0
+
+    try:
+        with _manifest_lock(warehouse_dir, league_id):
+            manifest = _load_manifest(warehouse_dir, league_id)
+            synced = manifest.setdefault("tournaments", {})
+
+            current_ids = set()
+            for tournament in tournaments:
+                tournament_id = tournament.get("metadata", {}).get("tournament_id")
+                if not tournament_id:
+                    continue
+                current_ids.add(tournament_id)
+                if _write_tournament(warehouse_dir, synced, tournament, league_id):
+                    written += 1
+                else:
+                    unchanged += 1
+
+            for tournament_id, entry in list(synced.items()):
+                if tournament_id not in current_ids:
+                    _remove_tournament_files(warehouse_dir, tournament_id, entry)
+                    del synced[tournament_id]
+                    removed += 1
+
+            _save_manifest(warehouse_dir, league_id, manifest)
+
+        return {
+            "success": True,
+            "message": f"Warehouse synced: {written} written, {removed} removed, {unchanged} unchanged.",
+            "written": written,
+            "removed": removed,
+            "unchanged": unchanged,
+        }
+    except Exception as e:
+        return {"success": False, "message": f"Error syncing warehouse: {e}"}
+
+
+def sync_league_warehouse(league_id, warehouse_dir=None):
+    """
+    Pull a league's tournaments from Firestore and sync them into the warehouse.
+
+    Args:
+        league_id (str): The ID of the league.
+        warehouse_dir (str): Warehouse root directory (defaults to WAREHOUSE_DIR).
+
+    Returns:
+        dict: The result of sync_tournaments_to_warehouse.
+    """
+    tournaments = firestore_query_tournaments_by_league(league_id)
+    return sync_tournaments_to_warehouse(tournaments, league_id, warehouse_dir=warehouse_dir)
+
+
+def export_tournament_to_warehouse(tournament_id, league_id, warehouse_dir=None):
+    """
+    Export one saved tournament (e.g. right after it was saved) without touching the rest of its league.
+
+    Args:
+        tournament_id (str): The ID of the tournament.
+        league_id (str): Its league.
+        warehouse_dir (str): Warehouse root directory (defaults to WAREHOUSE_DIR).
+
+    Returns:
+        dict: A success flag and a message.
+    """
+    warehouse_dir = warehouse_dir or WAREHOUSE_DIR
+    try:
+        tournament = firestore_get_tournament(tournament_id)
+        if not tournament:
+            return {"success": False, "message": f"Tournament {tournament_id} not found."}
+        with _manifest_lock(warehouse_dir, league_id):
+            manifest = _load_manifest(warehouse_dir, league_id)
+            written = _write_tournament(warehouse_dir, manifest.setdefault("tournaments", {}), tournament, league_id)
+            _save_manifest(warehouse_dir, league_id, manifest)
+        return {"success": True, "message": "Tournament exported to the warehouse." if written else "Tournament already up to date."}
+    except Exception as e:
+        return {"success": False, "message": f"Error exporting tournament to the warehouse: {e}"}
+
+
+def query_warehouse(table_name, columns=None, league_id=None, seasons=None, row_filter=None, warehouse_dir=None):
+    """
+    Read a warehouse table with column pruning and predicate pushdown.
+
+    Partition filters (league, season) skip whole directories; other predicates are pushed down to
+    the Parquet row-group statistics.
+
+    Args:
+        table_name (str): "player_games" or "tournaments".
+        columns (list): Columns to read (all when None). Partition columns may be included.
+        league_id (str): Only read this league's partition.
+        seasons (list): Only read these seasons.
+        row_filter (pyarrow.compute.Expression): Additional row filter, e.g. ds.field("Stage") == "Playoff".
+        warehouse_dir (str): Warehouse root directory (defaults to WAREHOUSE_DIR).
+
+    Returns:
+        pd.DataFrame: The matching rows; empty (with the requested columns) if nothing is synced.
+    """
+    path = os.path.join(warehouse_dir or WAREHOUSE_DIR, table_name)
+    if not os.path.isdir(path):
+        return pd.DataFrame(columns=columns or WAREHOUSE_SCHEMAS[table_name].names)
+
+    expression = row_filter
+    if league_id is not None:
+        league_filter = ds.field("league_id") == league_id
+        expression = league_filter if expression is None else expression & league_filter
+    if seasons:
+        season_filter = ds.field("season").isin([int(season) for season in seasons])
+        expression = season_filter if expression is None else expression & season_filter
+
+    schema = pa.unify_schemas([WAREHOUSE_SCHEMAS[table_name], PARTITIONING.schema])
+    dataset = ds.dataset(path, format="parquet", partitioning=PARTITIONING, schema=schema)
+    return dataset.to_table(columns=columns, filter=expression).to_pandas()
+
+
+def list_warehouse_seasons(league_id, warehouse_dir=None):
+    """
+    List the seasons synced for a league, newest first.
+
+    Args:
+        league_id (str): The ID of the league.
+        warehouse_dir (str): Warehouse root directory (defaults to WAREHOUSE_DIR).
+
+    Returns:
+        list: Season years.
+    """
+    seasons = query_warehouse("tournaments", columns=["season"], league_id=league_id, warehouse_dir=warehouse_dir)
+    return sorted(seasons["season"].unique().tolist(), reverse=True)
+
+
+def season_leaderboard(league_id, seasons=None, stage=None, warehouse_dir=None):
+    """
+    Per-player totals over a league's history, read from the warehouse.
+
+    Args:
+        league_id (str): The ID of the league.
+        seasons (list): Restrict to these seasons (all when None).
+        stage (str): Restrict to "League" or "Playoff" games (all when None).
+        warehouse_dir (str): Warehouse root directory (defaults to WAREHOUSE_DIR).
+
+    Returns:
+        pd.DataFrame: One row per player from aggregate_player_games, sorted by points.
+    """
+    facts = query_warehouse(
+        "player_games",
+        columns=["Game #", "Player", "Goals For", "Goals Against", "xG For", "xG Against", "Result", "Points"],
+        league_id=league_id,
+        seasons=seasons,
+        row_filter=(ds.field("Stage") == stage) if stage else None,
+        warehouse_dir=warehouse_dir,
+    )
+    if facts.empty:
+        return pd.DataFrame()
+    return aggregate_player_games(facts).sort_values(["Points", "Wins"], ascending=False).reset_index(drop=True)
+
+
+def season_luck_table(league_id, seasons=None, stage="League", warehouse_dir=None):
+    """
+    Points versus xG-implied expected points over a league's history, read from the warehouse.
+
+    Args:
+        league_id (str): The ID of the league.
+        seasons (list): Restrict to these seasons (all when None).
+        stage (str): Restrict to "League" or "Playoff" games (all when None).
+        warehouse_dir (str): Warehouse root directory (defaults to WAREHOUSE_DIR).
+
+    Returns:
+        pd.DataFrame: The calculate_xpts_table columns, sorted by Luck.
+    """
+    facts = query_warehouse(
+        "player_games",
+        columns=["Game #", "Player", "Goals For", "Goals Against", "xG For", "xG Against", "Points"],
+        league_id=league_id,
+        seasons=seasons,
+        row_filter=(ds.field("Stage") == stage) if stage else None,
+        warehouse_dir=warehouse_dir,
+    )
+    return calculate_xpts_table_from_facts(facts)
+
+
+def clear_warehouse(warehouse_dir=None):
+    """
+    Delete the whole warehouse so the next sync rewrites everything.
+
+    Args:
+        warehouse_dir (str): Warehouse root directory (defaults to WAREHOUSE_DIR).
+    """
+    shutil.rmtree(warehouse_dir or WAREHOUSE_DIR, ignore_errors=True)
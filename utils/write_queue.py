@@ -0,0 +1,382 @@
+import os
+import time
+import atexit
+import threading
+from collections import OrderedDict
+
+
+class WriteBehindQueue:
+    """
+    Process-wide write-behind queue: the Streamlit script submits writes and returns immediately,
+    a background worker thread commits them.
+
+    - Coalescing: a write submitted under a key that is still pending replaces the pending one
+      (last write wins) and moves to the back of the queue, so ordering follows the latest submit.
+    - Batching: consecutive pending writes that share a group are committed with a single call,
+      write(items), e.g. all games of a tournament in one Firestore batch.
+    - Retries: a failed commit goes back to the front of the queue with exponential backoff and the
+      worker moves on to other writes meanwhile. Writes sharing its scope (by default just its key)
+      wait behind it, so they are never overtaken; after max_retries it is recorded as failed and
+      can be resubmitted with retry_failed().
+    - Shutdown: close() (registered with atexit) flushes what is left before the process exits.
+
+    A write is marked committed as soon as write() returns; on_commit hooks run afterwards and must stay
+    cheap (cache invalidation), since every later write waits on the worker thread while they run.
+
+    With enabled=False every write is committed synchronously inside submit() (benchmarks, scripts).
+    """
+
+    def __init__(self, name="writes", batch_size=100, max_retries=5, backoff=0.5, max_backoff=30, enabled=True):
+        self.name = name
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.enabled = enabled
+        self.committed = 0
+        self.coalesced = 0
+        self.retries = 0
+        self.last_error = None
+        self._pending = OrderedDict()  # key -> operation
+        self._in_flight = {}
+        self._failed = OrderedDict()
+        self._states = OrderedDict()  # key -> "pending" / "committed" / "failed" (bounded)
+        self._condition = threading.Condition()
+        self._thread = None
+        self._closed = False
+
+    # --- SUBMIT ---
+
+    def submit(self, key, write, item=None, group=None, on_commit=None, label=None, scope=None):
+        """
+        Queue a write.
+
+        Args:
+            key (hashable): Identity of the written document; a pending write with the same key is replaced.
+            write (callable): write() for ungrouped writes, write(items) for grouped ones.
+            item: The payload passed (in a list) to write when grouped.
+            group (hashable): Writes sharing a group are committed together with one write(items) call.
+            on_commit (callable): Called without arguments after the write is committed, on the worker thread;
+                keep it cheap (e.g. cache invalidation) and hand slow follow-ups to another thread.
+            label (str): Human readable description for status displays.
+            scope (hashable): Writes sharing a scope are committed in submit order, even across retries
+                (defaults to the key); writes in other scopes go ahead while one waits to be retried.
+
+        Returns:
+            hashable: The key, for status(key).
+        """
+        operation = {
+            "key": key,
+            "write": write,
+            "item": item,
+            "group": group,
+            "on_commit": on_commit,
+            "label": label or str(key),
+            "scope": key if scope is None else scope,
+            "submitted_at": time.time(),
+        }
+        if not self.enabled:
+            self._commit([operation])
+            self.committed += 1
+            self._run_hooks([operation])
+            return key
+
+        with self._condition:
+            if self._closed:
+                raise RuntimeError(f"The {self.name} queue is closed.")
+            if self._pending.pop(key, None) is not None:
+                self.coalesced += 1
+            self._pending[key] = operation
+            self._failed.pop(key, None)
+            self._set_state(key, "pending")
+            self._start_worker()
+            self._condition.notify_all()
+        return key
+
+    def _resubmit(self, operation):
+        operation.pop("error", None)
+        self.submit(
+            operation["key"], operation["write"], operation["item"], operation["group"], operation["on_commit"],
+            operation["label"], operation["scope"],
+        )
+
+    def retry(self, key):
+        """
+        Resubmit one write that exhausted its retries.
+
+        Args:
+            key (hashable): The key the write was submitted under.
+
+        Returns:
+            bool: True if a failed write was resubmitted.
+        """
+        with self._condition:
+            operation = self._failed.pop(key, None)
+        if operation is None:
+            return False
+        self._resubmit(operation)
+        return True
+
+    def retry_failed(self):
+        """
+        Resubmit every write that exhausted its retries.
+
+        Returns:
+            int: Number of writes resubmitted.
+        """
+        with self._condition:
+            failed = list(self._failed.values())
+            self._failed.clear()
+        for operation in failed:
+            self._resubmit(operation)
+        return len(failed)
+
+    # --- WORKER ---
+
+    def _start_worker(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._work_forever, name=f"{self.name}-write-behind", daemon=True)
+            self._thread.start()
+
+    def _set_state(self, key, state):
+        self._states[key] = state
+        self._states.move_to_end(key)
+        while len(self._states) > 4096:
+            self._states.popitem(last=False)
+
+    def _take_batch(self):
+        # Called with the condition held: move up to batch_size due writes in flight, skipping every
+        # scope whose first pending write still waits for its retry
+        now = time.time()
+        batch, waiting = [], set()
+        for key, operation in list(self._pending.items()):
+            if len(batch) >= self.batch_size:
+                break
+            if operation["scope"] in waiting or operation.get("not_before", 0) > now:
+                waiting.add(operation["scope"])
+                continue
+            del self._pending[key]
+            self._in_flight[key] = operation
+            batch.append(operation)
+        return batch
+
+    def _next_retry_in(self):
+        # Seconds until the earliest waiting retry is due (None when nothing is pending)
+        if not self._pending:
+            return None
+        return max(0, min(operation.get("not_before", 0) for operation in self._pending.values()) - time.time())
+
+    def _units(self, batch):
+        # Consecutive writes of the same group become one unit
+        units = []
+        for operation in batch:
+            if operation["group"] is not None and units and units[-1][0]["group"] == operation["group"]:
+                units[-1].append(operation)
+            else:
+                units.append([operation])
+        return units
+
+    def _commit(self, unit):
+        if unit[0]["group"] is None:
+            unit[0]["write"]()
+        else:
+            unit[-1]["write"]([operation["item"] for operation in unit])
+
+    def _run_hooks(self, unit):
+        for operation in unit:
+            if operation["on_commit"] is not None:
+                try:
+                    operation["on_commit"]()
+                except Exception as e:
+                    print(f"Error after committing {operation['label']}: {e}")
+
+    def _requeue(self, failures, deferred):
+        # Called with the condition held: failed writes go back to the front, due after the backoff, and the
+        # writes of their scopes that were taken in the same batch go right behind them, untried
+        retried = []
+        for operation, error in failures:
+            if operation["key"] in self._pending:
+                continue  # Resubmitted meanwhile: the newer write supersedes it
+            attempts = operation.get("attempts", 0) + 1
+            if attempts > self.max_retries:
+                operation["error"] = str(error)
+                self._failed[operation["key"]] = operation
+                self._set_state(operation["key"], "failed")
+                print(f"Write failed after {self.max_retries} retries ({operation['label']}): {error}")
+                continue
+            operation["attempts"] = attempts
+            operation["not_before"] = time.time() + min(self.backoff * 2 ** (attempts - 1), self.max_backoff)
+            retried.append(operation)
+        self.retries += len(retried)
+        for operation in reversed(retried + [operation for operation in deferred if operation["key"] not in self._pending]):
+            self._pending[operation["key"]] = operation
+            self._pending.move_to_end(operation["key"], last=False)
+
+    def _work_forever(self):
+        while True:
+            with self._condition:
+                while True:
+                    batch = self._take_batch()
+                    if batch or (self._closed and not self._pending):
+                        break
+                    self._condition.wait(self._next_retry_in())
+                if not batch:
+                    return
+
+            failures, deferred, held = [], [], set()
+            for unit in self._units(batch):
+                if any(operation["scope"] in held for operation in unit):
+                    deferred.extend(unit)  # An earlier write of its scope failed: keep the order
+                    continue
+                try:
+                    self._commit(unit)
+                except Exception as e:
+                    self.last_error = f"{unit[0]['label']}: {e}"
+                    failures.extend((operation, e) for operation in unit)
+                    held.update(operation["scope"] for operation in unit)
+                    continue
+                with self._condition:
+                    committed = []
+                    for operation in unit:
+                        if operation["key"] in self._pending:
+                            continue  # Resubmitted meanwhile: the newer write is still to come
+                        self.committed += 1
+                        self._set_state(operation["key"], "committed")
+                        committed.append(operation)
+                # Committed is visible now; the writes stay in flight (flush() waits) until their hooks ran
+                self._run_hooks(committed)
+                with self._condition:
+                    for operation in unit:
+                        self._in_flight.pop(operation["key"], None)
+
+            with self._condition:
+                self._requeue(failures, deferred)
+                for operation, _ in failures:
+                    self._in_flight.pop(operation["key"], None)
+                for operation in deferred:
+                    self._in_flight.pop(operation["key"], None)
+                self._condition.notify_all()
+
+    # --- STATUS & SHUTDOWN ---
+
+    def status(self, key):
+        """
+        Return the state of the latest write submitted under key.
+
+        Returns:
+            str: "pending", "committed", "failed", or None if unknown.
+        """
+        with self._condition:
+            return self._states.get(key)
+
+    def is_queued(self, key):
+        """
+        Return whether a write submitted under key is still pending or being committed.
+
+        Unlike status(), this does not depend on the bounded state history.
+        """
+        with self._condition:
+            return key in self._pending or key in self._in_flight
+
+    def queued(self, scope):
+        """
+        Return the writes of a scope that are not committed yet, in the order they will be committed.
+
+        Lets readers overlay this process's pending writes on what storage returns, instead of flushing.
+
+        Args:
+            scope (hashable): The scope the writes were submitted under.
+
+        Returns:
+            list: (key, item) tuples.
+        """
+        with self._condition:
+            return [
+                (operation["key"], operation["item"])
+                for operation in [*self._in_flight.values(), *self._pending.values()]
+                if operation["scope"] == scope
+            ]
+
+    def failed(self, key=None):
+        """
+        Return the writes that exhausted their retries.
+
+        Args:
+            key (hashable): Only return the failed write submitted under this key.
+
+        Returns:
+            list: Dicts with key, label and error.
+        """
+        with self._condition:
+            return [
+                {"key": operation["key"], "label": operation["label"], "error": operation.get("error")}
+                for operation in self._failed.values()
+                if key is None or operation["key"] == key
+            ]
+
+    def stats(self):
+        """
+        Return queue counters.
+
+        Returns:
+            dict: pending, in_flight, committed, failed, coalesced, retries and last_error.
+        """
+        with self._condition:
+            return {
+                "pending": len(self._pending),
+                "in_flight": len(self._in_flight),
+                "committed": self.committed,
+                "failed": len(self._failed),
+                "coalesced": self.coalesced,
+                "retries": self.retries,
+                "last_error": self.last_error,
+            }
+
+    def flush(self, timeout=None):
+        """
+        Block until every submitted write is committed or failed.
+
+        Args:
+            timeout (float): Maximum seconds to wait (None waits indefinitely).
+
+        Returns:
+            bool: True if the queue drained, False on timeout.
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        with self._condition:
+            while self._pending or self._in_flight:
+                if self._thread is None or not self._thread.is_alive():
+                    return False
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def close(self, timeout=30):
+        """
+        Stop accepting writes and flush the remaining ones (registered to run at process exit).
+
+        Args:
+            timeout (float): Maximum seconds to wait for the flush.
+
+        Returns:
+            bool: True if everything was committed before the timeout.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        drained = self.flush(timeout)
+        if not drained:
+            print(f"{self.name} queue closed with {len(self._pending) + len(self._in_flight)} uncommitted writes.")
+        return drained
+
+
+# Shared by all sessions in this process
+write_queue = WriteBehindQueue(
+    "writes",
+    batch_size=int(os.getenv("TOURNALYTICS_WRITE_BATCH_SIZE", "100")),
+    max_retries=int(os.getenv("TOURNALYTICS_WRITE_RETRIES", "5")),
+    enabled=os.getenv("TOURNALYTICS_WRITE_BEHIND", "1") != "0",
+)
+atexit.register(write_queue.close)